@@ -17,6 +17,7 @@ from src.Appointments.clients_cancel_appt import cancel_appts
 from src.Appointments.users_add_appt_notes import add_notes
 from src.Email_Subscriptions.clients_mnge_email_subs import manage_email_sub
 from src.Auth.User import login_manager
+from helper import request_context
 from src.Appointments.schedule_appt import schedule_appt
 from src.Appointments.get_available_workers import get_avail_workers
 from src.Appointments.get_worker_slots import get_worker_slots
@@ -49,6 +50,7 @@ from src.Worker.profile import profile
 from src.Salon.deposit import deposit_rate
 from src.Salon.appointments import business_appointments
 from src.Admin.verifyadmin import verifyadmin
+from src.Images.images import images
 
 
 
@@ -199,10 +201,12 @@ app.secret_key = "dev-change-me"
 login_manager.init_app(app)
 login_manager.session_protection = "strong"
 login_manager.login_view = "signin.getSignin"
+request_context.init_app(app)
 
 CORS(
     app,
     supports_credentials=True,
+    expose_headers=["X-Next-Cursor"],
     resources={r"/*": {"origins": ["http://localhost:5173", "https://salon-navigation-app-frontend-hdhc.vercel.app", r"https://.*vercel\.app"]}}
 )
 
@@ -213,14 +217,17 @@ app.config.update(
     SESSION_COOKIE_HTTPONLY=True,
     SESSION_COOKIE_SAMESITE="None" if is_production else "Lax",
     SESSION_COOKIE_SECURE=True if is_production else False,
+    # larger request bodies are refused with 413 before they are read
+    MAX_CONTENT_LENGTH=int(os.getenv("MAX_REQUEST_BYTES", str(16 * 1024 * 1024))),
 )
 
-app.config['MAIL_SERVER']='smtp.gmail.com'
-app.config['MAIL_PORT'] = 465
+# point MAIL_SERVER at a local SMTP server (MAIL_USE_SSL=false) to test without sending
+app.config['MAIL_SERVER'] = os.getenv('MAIL_SERVER', 'smtp.gmail.com')
+app.config['MAIL_PORT'] = int(os.getenv('MAIL_PORT', '465'))
 app.config['MAIL_USERNAME'] = os.getenv('MAIL_USERNAME')
 app.config['MAIL_PASSWORD'] = os.getenv('MAIL_PASSWORD')
 app.config['MAIL_USE_TLS'] = False
-app.config['MAIL_USE_SSL'] = True
+app.config['MAIL_USE_SSL'] = os.getenv('MAIL_USE_SSL', 'true').lower() == 'true'
 app.config['MAIL_SUPPRESS_SEND'] = False
 
 mail.init_app(app)
@@ -267,6 +274,7 @@ app.register_blueprint(profile)
 app.register_blueprint(deposit_rate)
 app.register_blueprint(business_appointments)
 app.register_blueprint(verifyadmin)
+app.register_blueprint(images)
 
 swaggerui_blueprint = get_swaggerui_blueprint(
     SWAGGER_URL,
@@ -282,6 +290,14 @@ def swagger_spec():
 
 app.config['SECRET_KEY']=os.getenv('SECRET_KEY')
 
+
+@app.cli.command("migrate")
+def migrate_command():
+    """apply pending database migrations"""
+    from helper.migrations import migrate
+    applied = migrate()
+    print(f"Applied migrations: {applied}" if applied else "Database schema is up to date")
+
 # service = Service()
 
 # atexit.register(service.stop_monitoring)
@@ -290,10 +306,18 @@ app.config['SECRET_KEY']=os.getenv('SECRET_KEY')
 if __name__ == "__main__":
     if os.environ.get("WERKZEUG_RUN_MAIN") == "true" or not app.debug:
         from src.extensions import scheduler
+        from src.Admin.snapshot import start_snapshot_job
+        from src.LoyaltyProgram.accrual import start_accrual_job
+        from src.Notifications.outbox import start_outbox_job
+        from helper.migrations import migrate
         with app.app_context():
+            migrate()
             if not scheduler.running:
                 scheduler.start()
                 print("Scheduler started successfully")
+                start_snapshot_job(scheduler)
+                start_accrual_job(scheduler)
+                start_outbox_job(scheduler)
             # service.start()
     port = int(os.getenv("PORT", "5000"))
     app.run(host="0.0.0.0", port=port, debug=True)
\ No newline at end of file
@@ -0,0 +1,223 @@
+import base64
+import binascii
+import hashlib
+import os
+import re
+import tempfile
+import threading
+
+# where the local backend keeps blobs, and which backend to use
+BLOB_BACKEND = os.getenv("BLOB_BACKEND", "local")
+BLOB_STORE_DIR = os.getenv("BLOB_STORE_DIR", os.path.join(os.getcwd(), "blobs"))
+
+# images are served from here, the key is appended
+IMAGE_URL_PREFIX = "/api/images/"
+
+# largest image accepted by the upload endpoints, and the read size while storing one
+MAX_IMAGE_BYTES = int(os.getenv("MAX_IMAGE_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+KEY_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+# leading bytes of the image formats accepted, checked in order
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+def blob_key(data):
+    """content key of data: its sha256 in hex"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def is_blob_key(value):
+    return isinstance(value, str) and bool(KEY_PATTERN.match(value))
+
+
+def sniff_image_type(head):
+    """return the MIME type of an image from its first bytes, or None"""
+    for signature, mime_type in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return mime_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+class UploadError(ValueError):
+    """an upload rejected before it is stored; status is the HTTP status to
+    answer with"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class LocalBlobStore:
+    """blobs as files under root, sharded by the first bytes of the key
+
+    a blob is written to a temporary file and renamed into place, so readers
+    never see a partial blob and writing the same content twice is harmless
+    """
+
+    def __init__(self, root=BLOB_STORE_DIR):
+        self.root = root
+
+    def path(self, key):
+        if not is_blob_key(key):
+            raise ValueError(f"Invalid blob key {key!r}")
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def put(self, data):
+        """store data and return its key"""
+        key = blob_key(data)
+        path = self.path(key)
+        if os.path.exists(path):
+            return key
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return key
+
+    def put_stream(self, chunks):
+        """store the bytes of an iterable of chunks and return their key
+
+        chunks are hashed while they are written to a temporary file, so the
+        blob is never held in memory; an exception raised by the iterable
+        leaves nothing behind
+        """
+        os.makedirs(self.root, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    tmp.write(chunk)
+            key = digest.hexdigest()
+            path = self.path(key)
+            if os.path.exists(path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return key
+
+    def open(self, key):
+        """return a seekable binary file of the blob, FileNotFoundError if
+        there is none"""
+        return open(self.path(key), "rb")
+
+    def size(self, key):
+        return os.path.getsize(self.path(key))
+
+
+# backend name -> class; a backend provides put, put_stream, open, exists and size
+BACKENDS = {
+    "local": LocalBlobStore,
+}
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_blob_store():
+    """return the process-wide blob store, created on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if BLOB_BACKEND not in BACKENDS:
+                    raise ValueError(f"Unknown blob backend {BLOB_BACKEND!r}")
+                _store = BACKENDS[BLOB_BACKEND]()
+    return _store
+
+
+def decode_image(value):
+    """return the bytes of a base64 image, with or without a data: prefix,
+    or None if value is not one"""
+    if isinstance(value, bytes):
+        value = value.decode("utf-8", "ignore")
+    if not isinstance(value, str) or not value:
+        return None
+    if value.startswith("data:"):
+        value = value.partition(",")[2]
+    try:
+        return base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+
+
+def store_image(value):
+    """store a base64 or data: image and return its key
+
+    keys, URLs and anything else that is not an encoded image are returned
+    unchanged
+    """
+    if is_blob_key(value):
+        return value
+    data = decode_image(value)
+    if not data:
+        return value
+    return get_blob_store().put(data)
+
+
+def _image_chunks(stream, max_size):
+    """read an upload in chunks, rejecting it once it is not an image or
+    grows past max_size"""
+    size = 0
+    head = b""
+    while True:
+        chunk = stream.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        if size == 0:
+            head = chunk
+            if sniff_image_type(head) is None:
+                raise UploadError("Unsupported image type, expected JPEG, PNG, GIF or WebP", 415)
+        size += len(chunk)
+        if size > max_size:
+            raise UploadError(f"Image is larger than {max_size} bytes", 413)
+        yield chunk
+    if size == 0:
+        raise UploadError("Image file is empty")
+
+
+def store_upload(file, max_size=MAX_IMAGE_BYTES):
+    """stream an uploaded image file into the blob store and return its key
+
+    the type is taken from the leading bytes, not the filename or the
+    client's Content-Type; UploadError if the file is empty, too large or
+    not an image
+    """
+    return get_blob_store().put_stream(_image_chunks(file.stream, max_size))
+
+
+def image_url(value):
+    """return the URL an image column value is served from"""
+    if isinstance(value, bytes):
+        value = value.decode("utf-8", "ignore")
+    if not value:
+        return None
+    if is_blob_key(value):
+        return IMAGE_URL_PREFIX + value
+    if value.startswith(("http://", "https://", "/")):
+        return value
+    return None
@@ -0,0 +1,279 @@
+import os
+import threading
+import time
+from collections import deque
+from dotenv import load_dotenv
+import mysql.connector
+from mysql.connector import Error
+from mysql.connector.errors import PoolError
+
+load_dotenv()
+
+# upper bounds (seconds) of the checkout wait-time histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_float(name, default):
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+def _env_bool(name, default):
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+class PooledConnection:
+    """Proxy around a pooled mysql connection
+
+    behaves like the underlying connection except that close() hands the
+    connection back to the pool instead of tearing down the socket
+    """
+
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+
+    def __getattr__(self, name):
+        raw = self.__dict__.get("_raw")
+        if raw is None:
+            raise Error("Connection has already been returned to the pool")
+        return getattr(raw, name)
+
+    def close(self):
+        """return connection to the pool"""
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool._release(raw, self._created_at)
+
+    def is_connected(self):
+        return self._raw is not None and self._raw.is_connected()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __del__(self):
+        # connection was dropped without close(): free its slot but do not
+        # reuse it, its session state is unknown
+        raw = self.__dict__.get("_raw")
+        if raw is not None:
+            self._raw = None
+            self._pool._discard(raw)
+
+
+class ConnectionPool:
+    """Thread-safe MySQL connection pool
+
+    size: connections kept open while idle
+    max_overflow: extra connections opened under load, closed on release
+    timeout: seconds to wait for a free connection before raising PoolError
+    recycle: max age in seconds of a connection before it is reopened
+    pre_ping: check the connection is alive before handing it out
+    """
+
+    def __init__(self, connect_args, size=5, max_overflow=10, timeout=30.0,
+                 recycle=3600, pre_ping=True):
+        self.connect_args = connect_args
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+
+        self._idle = deque()
+        self._lock = threading.Condition()
+        self._opened = 0
+        self._in_use = 0
+
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._wait_time_total = 0.0
+        self._wait_histogram = [0] * (len(WAIT_BUCKETS) + 1)
+        self._recycled = 0
+        self._invalidated = 0
+
+    @classmethod
+    def from_env(cls):
+        """build pool from DB_* environment variables"""
+        connect_args = {
+            "host": os.getenv("DB_HOST"),
+            "user": os.getenv("DB_USER"),
+            "port": _env_int("DB_PORT", 3306),
+            "password": os.getenv("DB_PASSWORD"),
+            "database": os.getenv("DB_NAME"),
+        }
+        return cls(
+            connect_args,
+            size=_env_int("DB_POOL_SIZE", 5),
+            max_overflow=_env_int("DB_POOL_MAX_OVERFLOW", 10),
+            timeout=_env_float("DB_POOL_TIMEOUT", 30.0),
+            recycle=_env_int("DB_POOL_RECYCLE", 3600),
+            pre_ping=_env_bool("DB_POOL_PRE_PING", True),
+        )
+
+    def connect(self):
+        """return a PooledConnection, waiting up to timeout for a free slot"""
+        started = time.monotonic()
+        waited = False
+        with self._lock:
+            while True:
+                if self._idle:
+                    raw, created_at = self._idle.pop()
+                    break
+                if self._opened < self.size + self.max_overflow:
+                    raw, created_at = None, None
+                    self._opened += 1
+                    break
+                remaining = self.timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolError(
+                        f"Connection pool exhausted: {self._in_use} in use, "
+                        f"timed out after {self.timeout}s"
+                    )
+                waited = True
+                self._lock.wait(remaining)
+            self._in_use += 1
+            self._checkouts += 1
+            if waited:
+                self._record_wait(time.monotonic() - started)
+
+        try:
+            if raw is not None:
+                raw, created_at = self._validate(raw, created_at)
+            if raw is None:
+                raw, created_at = mysql.connector.connect(**self.connect_args), time.monotonic()
+        except Exception:
+            with self._lock:
+                self._opened -= 1
+                self._in_use -= 1
+                self._lock.notify()
+            raise
+        return PooledConnection(self, raw, created_at)
+
+    def _validate(self, raw, created_at):
+        """return (raw, created_at), or (None, None) if it must be reopened"""
+        if self.recycle and time.monotonic() - created_at > self.recycle:
+            self._close_quietly(raw)
+            with self._lock:
+                self._recycled += 1
+            return None, None
+        if self.pre_ping:
+            try:
+                raw.ping(reconnect=False)
+            except Exception:
+                self._close_quietly(raw)
+                with self._lock:
+                    self._invalidated += 1
+                return None, None
+        return raw, created_at
+
+    def _record_wait(self, seconds):
+        self._waits += 1
+        self._wait_time_total += seconds
+        for i, bound in enumerate(WAIT_BUCKETS):
+            if seconds <= bound:
+                self._wait_histogram[i] += 1
+                return
+        self._wait_histogram[-1] += 1
+
+    def _reset(self, raw):
+        """drop unread results and roll back any open transaction"""
+        if raw.unread_result:
+            raw.consume_results()
+        if raw.in_transaction:
+            raw.rollback()
+
+    def _release(self, raw, created_at):
+        try:
+            self._reset(raw)
+            healthy = True
+        except Exception:
+            healthy = False
+
+        with self._lock:
+            self._in_use -= 1
+            if healthy and len(self._idle) < self.size:
+                self._idle.append((raw, created_at))
+                raw = None
+            else:
+                self._opened -= 1
+            self._lock.notify()
+
+        if raw is not None:
+            self._close_quietly(raw)
+
+    def _discard(self, raw):
+        with self._lock:
+            self._in_use -= 1
+            self._opened -= 1
+            self._lock.notify()
+        self._close_quietly(raw)
+
+    @staticmethod
+    def _close_quietly(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def dispose(self):
+        """close every idle connection"""
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+            self._opened -= len(idle)
+        for raw, _ in idle:
+            self._close_quietly(raw)
+
+    def stats(self):
+        """return a snapshot of pool counters for monitoring"""
+        with self._lock:
+            histogram = {}
+            for bound, count in zip(WAIT_BUCKETS, self._wait_histogram):
+                histogram[f"le_{bound}s"] = count
+            histogram["gt_{}s".format(WAIT_BUCKETS[-1])] = self._wait_histogram[-1]
+            return {
+                "size": self.size,
+                "max_overflow": self.max_overflow,
+                "opened": self._opened,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "overflow": max(0, self._opened - self.size),
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "wait_time_total": round(self._wait_time_total, 6),
+                "wait_time_histogram": histogram,
+                "recycled": self._recycled,
+                "invalidated": self._invalidated,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """return the process-wide connection pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool.from_env()
+    return _pool
+
+
+def pool_stats():
+    return get_pool().stats()
@@ -0,0 +1,17 @@
+def select_fields(args, available, images=()):
+    """return the response fields a list request asks for, in the order of
+    available
+
+    ?fields=a,b picks fields by name and ?include=images adds the image
+    fields to that pick; without ?fields= every field is returned. raises
+    ValueError naming unknown fields
+    """
+    names = [n.strip() for n in args.get("fields", "").split(",") if n.strip()]
+    if not names:
+        return list(available)
+    unknown = [n for n in names if n not in available]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    if "images" in [n.strip() for n in args.get("include", "").split(",")]:
+        names.extend(images)
+    return [field for field in available if field in names]
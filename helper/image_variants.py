@@ -0,0 +1,145 @@
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from .blobstore import get_blob_store, is_blob_key
+from .db_pool import get_pool
+
+# variant name -> longest edge in pixels, smallest first
+VARIANTS = (
+    ("thumb", 128),
+    ("card", 480),
+    ("full", 1600),
+)
+
+# pixels the browse endpoints display images at, unless ?image_size= says otherwise
+AVATAR_SIZE = 96
+CARD_SIZE = 320
+
+JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", "82"))
+
+# uploads hand their images to this pool and return without waiting
+VARIANT_WORKERS = int(os.getenv("IMAGE_VARIANT_WORKERS", "2"))
+
+_executor = ThreadPoolExecutor(max_workers=VARIANT_WORKERS, thread_name_prefix="image-variants")
+
+# {rows} is one (%s, %s, %s, %s, %s) group per variant
+upsert_image_variants = """
+    INSERT INTO image_variants (blob_key, variant, variant_key, width, height)
+    VALUES {rows}
+    ON DUPLICATE KEY UPDATE variant_key = VALUES(variant_key), width = VALUES(width), height = VALUES(height)
+"""
+
+# every stored image without variants yet
+query_images_without_variants = """
+    SELECT image_key FROM (
+        SELECT before_image AS image_key FROM appointments
+        UNION SELECT after_image FROM appointments
+        UNION SELECT profile_picture FROM employee
+        UNION SELECT picture FROM employee_work_pictures
+        UNION SELECT image FROM products
+    ) images
+    WHERE LENGTH(image_key) = 64
+    AND NOT EXISTS (SELECT 1 FROM image_variants v WHERE v.blob_key = images.image_key)
+"""
+
+# joined by list queries to swap an image key for one of its variants:
+# LEFT JOIN image_variants v ON v.blob_key = <image column> AND v.variant = %s
+
+
+def variant_for(size):
+    """name of the smallest variant at least size pixels on its longest edge"""
+    for name, edge in VARIANTS:
+        if edge >= size:
+            return name
+    return VARIANTS[-1][0]
+
+
+def render_variants(data):
+    """return [(name, image bytes, width, height)] for every variant of an
+    image; bytes are None where the image already fits the variant"""
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        variants = []
+        for name, edge in VARIANTS:
+            if max(image.size) <= edge:
+                variants.append((name, None) + image.size)
+                continue
+            resized = image.copy()
+            resized.thumbnail((edge, edge), Image.LANCZOS)
+            out = io.BytesIO()
+            if has_alpha:
+                resized.save(out, "PNG", optimize=True)
+            else:
+                resized.convert("RGB").save(out, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+            variants.append((name, out.getvalue()) + resized.size)
+    return variants
+
+
+def generate_variants(key, conn=None):
+    """render the variants of blob key, store them and record their keys"""
+    store = get_blob_store()
+    with store.open(key) as blob:
+        data = blob.read()
+
+    rows = []
+    for name, variant, width, height in render_variants(data):
+        variant_key = store.put(variant) if variant is not None else key
+        rows.append((key, name, variant_key, width, height))
+
+    owned = conn is None
+    if owned:
+        conn = get_pool().connect()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            upsert_image_variants.format(rows=", ".join(["(%s, %s, %s, %s, %s)"] * len(rows))),
+            [value for row in rows for value in row],
+        )
+        conn.commit()
+    finally:
+        cursor.close()
+        if owned:
+            conn.close()
+    return rows
+
+
+def _generate(key):
+    try:
+        generate_variants(key)
+    except ImportError:
+        print("[WARN] Pillow is not installed, image variants are not generated")
+    except Exception as err:
+        print(f"[WARN] Image variants failed for {key}: {err}")
+
+
+def schedule_variants(key):
+    """generate the variants of blob key in the background"""
+    if is_blob_key(key):
+        _executor.submit(_generate, key)
+
+
+def backfill_variants():
+    """generate variants of every stored image lacking them, return how many"""
+    conn = get_pool().connect()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query_images_without_variants)
+        keys = [row[0].decode() if isinstance(row[0], bytes) else row[0] for row in cursor.fetchall()]
+        done = 0
+        for key in keys:
+            try:
+                generate_variants(key, conn)
+                done += 1
+            except Exception as err:
+                print(f"[WARN] Image variants failed for {key}: {err}")
+        return done
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    print(f"Generated variants of {backfill_variants()} images")
@@ -0,0 +1,338 @@
+from mysql.connector import Error
+from .db_pool import get_pool
+from .blobstore import is_blob_key, store_image
+
+# applied versions are recorded here, one row per migration
+create_schema_migrations = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INT PRIMARY KEY,
+        description VARCHAR(255) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    ) ENGINE=InnoDB
+"""
+
+query_applied_versions = "SELECT version FROM schema_migrations"
+
+insert_applied_version = "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)"
+
+query_column_exists = """
+    SELECT COUNT(*) FROM information_schema.columns
+    WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+"""
+
+# MySQL named lock held while migrating so concurrent deploys apply each
+# migration once
+MIGRATION_LOCK_NAME = "salon_app.migrations"
+MIGRATION_LOCK_TIMEOUT = 60
+
+
+def add_column_if_missing(table, column, definition):
+    """return a step adding column to table unless it is already there"""
+    def step(cursor):
+        cursor.execute(query_column_exists, (table, column))
+        if not cursor.fetchone()[0]:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    return step
+
+
+query_index_exists = """
+    SELECT COUNT(*) FROM information_schema.statistics
+    WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+"""
+
+
+def add_index_if_missing(table, index, columns):
+    """return a step adding index on columns to table unless it is already there"""
+    def step(cursor):
+        cursor.execute(query_index_exists, (table, index))
+        if not cursor.fetchone()[0]:
+            cursor.execute(f"ALTER TABLE {table} ADD INDEX {index} ({columns})")
+    return step
+
+
+def move_images_to_blob_store(table, id_column, column, batch_size=100):
+    """return a step replacing the base64 images in table.column with blob
+    store keys, a batch of rows at a time"""
+    def step(cursor):
+        last_id = 0
+        while True:
+            cursor.execute(
+                f"SELECT {id_column}, {column} FROM {table} "
+                f"WHERE {id_column} > %s AND LENGTH({column}) > 64 "
+                f"ORDER BY {id_column} LIMIT %s",
+                (last_id, batch_size),
+            )
+            rows = cursor.fetchall()
+            for row_id, value in rows:
+                key = store_image(value)
+                if is_blob_key(key):
+                    cursor.execute(f"UPDATE {table} SET {column} = %s WHERE {id_column} = %s", (key, row_id))
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1][0]
+    return step
+
+
+# unique keys of a table with their columns in order, e.g. "PRIMARY" -> "bid,year,month"
+query_unique_keys = """
+    SELECT index_name, GROUP_CONCAT(column_name ORDER BY seq_in_index) FROM information_schema.statistics
+    WHERE table_schema = DATABASE() AND table_name = %s AND non_unique = 0
+    GROUP BY index_name
+"""
+
+
+def merge_monthly_revenue(cursor):
+    """give monthly_revenue a primary key on (bid, year, month), summing
+    the duplicate rows its upserts added while the key was missing
+
+    the merged rows are built in a side table swapped in by one RENAME, so
+    a stop at any point leaves monthly_revenue whole
+    """
+    cursor.execute("DROP TABLE IF EXISTS monthly_revenue_old")
+    cursor.execute(query_unique_keys, ("monthly_revenue",))
+    if "bid,year,month" in {columns for _, columns in cursor.fetchall()}:
+        return
+    cursor.execute("DROP TABLE IF EXISTS monthly_revenue_merged")
+    cursor.execute("""
+        CREATE TABLE monthly_revenue_merged (
+            bid INT NOT NULL,
+            year INT NOT NULL,
+            month INT NOT NULL,
+            revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+            PRIMARY KEY (bid, year, month)
+        ) ENGINE=InnoDB
+    """)
+    cursor.execute("""
+        INSERT INTO monthly_revenue_merged (bid, year, month, revenue)
+        SELECT bid, year, month, COALESCE(SUM(revenue), 0)
+        FROM monthly_revenue
+        WHERE bid IS NOT NULL
+        GROUP BY bid, year, month
+    """)
+    cursor.execute("RENAME TABLE monthly_revenue TO monthly_revenue_old, monthly_revenue_merged TO monthly_revenue")
+    cursor.execute("DROP TABLE monthly_revenue_old")
+
+
+# (version, description, steps). A step is a SQL string or a callable taking
+# a cursor. MySQL commits DDL implicitly, so every step must be safe to run
+# again if a migration stops halfway. Never edit a released migration, append
+# a new one
+MIGRATIONS = [
+    (1, "create loyalty tables", [
+        """
+        CREATE TABLE IF NOT EXISTS customer_loyalty_points (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            cid INT NOT NULL,
+            bid INT NOT NULL,
+            pts_balance DECIMAL(12, 2) NOT NULL DEFAULT 0,
+            prod_purchased INT NOT NULL DEFAULT 0,
+            appt_complete INT NOT NULL DEFAULT 0,
+            amount_spent DECIMAL(12, 2) NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            UNIQUE KEY uniq_customer_business (cid, bid)
+        ) ENGINE=InnoDB
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS loyalty_point_events (
+            event_id INT AUTO_INCREMENT PRIMARY KEY,
+            aid INT NULL,
+            cid INT NOT NULL,
+            bid INT NOT NULL,
+            points INT NOT NULL,
+            source VARCHAR(32) NOT NULL DEFAULT 'visit',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE KEY uniq_aid (aid)
+        ) ENGINE=InnoDB
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS loyalty_redemptions (
+            redemption_id INT AUTO_INCREMENT PRIMARY KEY,
+            cid INT NOT NULL,
+            bid INT NOT NULL,
+            points INT NOT NULL,
+            discount DECIMAL(12, 2) NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB
+        """,
+    ]),
+    # tables created by the old per-request bootstrap lack the progress
+    # counters that checkout and accrual update
+    (2, "add loyalty progress counters", [
+        add_column_if_missing("customer_loyalty_points", "prod_purchased", "INT NOT NULL DEFAULT 0"),
+        add_column_if_missing("customer_loyalty_points", "appt_complete", "INT NOT NULL DEFAULT 0"),
+        add_column_if_missing("customer_loyalty_points", "amount_spent", "DECIMAL(12, 2) NOT NULL DEFAULT 0"),
+    ]),
+    (3, "create and backfill revenue_daily", [
+        """
+        CREATE TABLE IF NOT EXISTS revenue_daily (
+            bid INT NOT NULL,
+            day DATE NOT NULL,
+            revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+            trans_count INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (bid, day)
+        ) ENGINE=InnoDB
+        """,
+        """
+        INSERT INTO revenue_daily (bid, day, revenue, trans_count)
+        SELECT bid, DATE(created_at), COALESCE(SUM(amount), 0), COUNT(*)
+        FROM transactions
+        WHERE bid IS NOT NULL
+        GROUP BY bid, DATE(created_at)
+        ON DUPLICATE KEY UPDATE revenue = VALUES(revenue), trans_count = VALUES(trans_count)
+        """,
+    ]),
+    (4, "create loyalty_accrual_state", [
+        """
+        CREATE TABLE IF NOT EXISTS loyalty_accrual_state (
+            name VARCHAR(32) PRIMARY KEY,
+            last_aid INT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB
+        """,
+    ]),
+    # image columns keep the blob store key, the bytes move to BLOB_STORE_DIR
+    (5, "move images to the blob store", [
+        move_images_to_blob_store("appointments", "aid", "before_image"),
+        move_images_to_blob_store("appointments", "aid", "after_image"),
+        move_images_to_blob_store("employee", "eid", "profile_picture"),
+        move_images_to_blob_store("employee_work_pictures", "id", "picture"),
+        move_images_to_blob_store("products", "pid", "image"),
+    ]),
+    # resized copies of stored images, filled by helper.image_variants
+    (6, "create image_variants", [
+        """
+        CREATE TABLE IF NOT EXISTS image_variants (
+            blob_key CHAR(64) NOT NULL,
+            variant VARCHAR(16) NOT NULL,
+            variant_key CHAR(64) NOT NULL,
+            width INT NOT NULL,
+            height INT NOT NULL,
+            PRIMARY KEY (blob_key, variant)
+        ) ENGINE=InnoDB
+        """,
+    ]),
+    # reminders and promotion emails, sent by src/Notifications/outbox.py
+    (7, "create notification_outbox", [
+        """
+        CREATE TABLE IF NOT EXISTS notification_outbox (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            kind VARCHAR(32) NOT NULL,
+            job_key VARCHAR(100) NULL,
+            payload TEXT NOT NULL,
+            run_at DATETIME NOT NULL,
+            status VARCHAR(16) NOT NULL DEFAULT 'pending',
+            attempts INT NOT NULL DEFAULT 0,
+            claimed_by VARCHAR(100) NULL,
+            claimed_until DATETIME NULL,
+            last_error TEXT NULL,
+            sent_at DATETIME NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE KEY uq_outbox_job_key (job_key),
+            KEY idx_outbox_due (status, run_at),
+            KEY idx_outbox_claimed (claimed_by)
+        ) ENGINE=InnoDB
+        """,
+    ]),
+    # the user who queued an outbox row, the only one who may read its status
+    (8, "add notification_outbox.requested_by", [
+        add_column_if_missing("notification_outbox", "requested_by", "INT NULL"),
+    ]),
+    # checkout quotes, so a checkout can reach any process, see src/Clients/quotes.py
+    (9, "create checkout_quotes", [
+        """
+        CREATE TABLE IF NOT EXISTS checkout_quotes (
+            quote_id VARCHAR(32) PRIMARY KEY,
+            cid INT NOT NULL,
+            bid INT NULL,
+            aid INT NULL,
+            is_product_purchase BOOLEAN NOT NULL,
+            points INT NOT NULL DEFAULT 0,
+            version CHAR(40) NOT NULL,
+            total DECIMAL(10, 2) NOT NULL,
+            expires_at DATETIME NOT NULL,
+            KEY idx_checkout_quotes_expires (expires_at)
+        ) ENGINE=InnoDB
+        """,
+    ]),
+    # the rollup upserts need the key, and months before the rollups only
+    # counted checkouts; rebuild them from every transactions row, as
+    # revenue_daily was in migration 3
+    (10, "key and backfill monthly_revenue", [
+        """
+        CREATE TABLE IF NOT EXISTS monthly_revenue (
+            bid INT NOT NULL,
+            year INT NOT NULL,
+            month INT NOT NULL,
+            revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+            PRIMARY KEY (bid, year, month)
+        ) ENGINE=InnoDB
+        """,
+        merge_monthly_revenue,
+        """
+        INSERT INTO monthly_revenue (bid, year, month, revenue)
+        SELECT bid, YEAR(created_at), MONTH(created_at), COALESCE(SUM(amount), 0)
+        FROM transactions
+        WHERE bid IS NOT NULL
+        GROUP BY bid, YEAR(created_at), MONTH(created_at)
+        ON DUPLICATE KEY UPDATE revenue = VALUES(revenue)
+        """,
+    ]),
+    # review pages walk a business's reviews newest first
+    (11, "index reviews by business and date", [
+        add_index_if_missing("reviews", "idx_reviews_bid_created", "bid, created_at, rvw_id"),
+    ]),
+]
+
+
+def pending_migrations(applied, migrations=MIGRATIONS):
+    """return migrations whose version is not in applied, oldest first"""
+    return sorted((m for m in migrations if m[0] not in applied), key=lambda m: m[0])
+
+
+def migrate(conn=None, migrations=MIGRATIONS):
+    """apply every pending migration and return the versions applied
+
+    meant to run once per deploy, before the app serves requests
+    """
+    owned = conn is None
+    if owned:
+        conn = get_pool().connect()
+    cursor = conn.cursor(buffered=True)
+    locked = False
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (MIGRATION_LOCK_NAME, MIGRATION_LOCK_TIMEOUT))
+        locked = cursor.fetchone()[0] == 1
+        if not locked:
+            raise Error(f"Could not acquire migration lock {MIGRATION_LOCK_NAME}")
+
+        cursor.execute(create_schema_migrations)
+        cursor.execute(query_applied_versions)
+        applied = {row[0] for row in cursor.fetchall()}
+
+        done = []
+        for version, description, steps in pending_migrations(applied, migrations):
+            print(f"Applying migration {version}: {description}")
+            for step in steps:
+                if callable(step):
+                    step(cursor)
+                else:
+                    cursor.execute(step)
+            cursor.execute(insert_applied_version, (version, description))
+            conn.commit()
+            done.append(version)
+        return done
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        if locked:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK_NAME,))
+            cursor.fetchall()
+        cursor.close()
+        if owned:
+            conn.close()
+
+
+if __name__ == "__main__":
+    applied = migrate()
+    print(f"Applied migrations: {applied}" if applied else "Database schema is up to date")
@@ -36,4 +36,16 @@ join salon_app.business b on s.bid=b.bid
 join salon_app.addresses ba on b.aid=ba.aid
 where a.start_time > CURRENT_TIMESTAMP() and a.aid = %s
 order by start_time;
-"""
\ No newline at end of file
+"""
+
+query_identity = """
+select u.uid, r.name as role, c.cid, b.bid, e.eid
+from users u
+left join users_roles ur on u.uid=ur.uid
+left join roles r on ur.rid=r.rid
+left join customers c on c.uid=u.uid
+left join business b on b.uid=u.uid
+left join employee e on e.uid=u.uid
+where u.uid=%s
+limit 1;
+"""
@@ -0,0 +1,66 @@
+from flask import g, has_app_context
+from mysql.connector import Error
+from .db_pool import get_pool
+
+
+def init_app(app):
+    """release the request connection when the app context tears down"""
+    app.teardown_appcontext(release_request_connection)
+
+
+def get_request_connection():
+    """return the connection shared by the current request, borrowing it on first use
+
+    the connection is returned to the pool at teardown, callers must not close it
+    """
+    conn = g.get("_request_conn")
+    if conn is None:
+        conn = get_pool().connect()
+        g._request_conn = conn
+    return conn
+
+
+def release_request_connection(exc=None):
+    conn = g.pop("_request_conn", None)
+    if conn is not None:
+        conn.close()
+
+
+def lookup_one(query, params, dictionary=True):
+    """run a read-only query and return the first row
+
+    inside an app context the request connection is reused, otherwise a
+    connection is borrowed for the single query
+    """
+    try:
+        if has_app_context():
+            conn, owned = get_request_connection(), False
+        else:
+            conn, owned = get_pool().connect(), True
+    except Error as e:
+        print(f"Error connecting to MySQL: {e}")
+        raise ValueError("Database connection failed")
+
+    cursor = None
+    try:
+        cursor = conn.cursor(dictionary=dictionary, buffered=True)
+        cursor.execute(query, params)
+        return cursor.fetchone()
+    finally:
+        if cursor:
+            cursor.close()
+        if owned:
+            conn.close()
+        elif conn.in_transaction:
+            # end the read so later lookups see rows committed by the handler
+            conn.rollback()
+
+
+def request_memo(key, loader):
+    """return loader() cached under key for the rest of the request"""
+    if not has_app_context():
+        return loader()
+    memo = g.setdefault("_request_memo", {})
+    if key not in memo:
+        memo[key] = loader()
+    return memo[key]
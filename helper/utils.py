@@ -4,193 +4,90 @@ import mysql.connector
 from mysql.connector import Error
 from flask_login import current_user
 from .queries import *
+from .db_pool import get_pool
+from .request_context import lookup_one, request_memo
 
 load_dotenv()
 
 def get_db_connection():
-    """create database connection"""
+    """borrow a database connection from the process-wide pool
+
+    close() returns the connection to the pool"""
     try:
-        connection = mysql.connector.connect(
-            host=os.getenv('DB_HOST'),
-            user=os.getenv('DB_USER'),
-            port=int(os.getenv("DB_PORT")),
-            password=os.getenv('DB_PASSWORD'),
-            database=os.getenv('DB_NAME')
-        )
-        return connection
+        return get_pool().connect()
     except Error as e:
         print(f"Error connecting to MySQL: {e}")
         return None
     
-def get_curr_cid():
-    """Return the customer ID for the currently logged-in user, or raise an error if none exists."""
+def current_identity():
+    """return {uid, role, cid, bid, eid} of the logged-in user
+
+    looked up with a single query and memoized for the rest of the request"""
     uid = getattr(current_user, "id", None)
     if uid is None:
         raise ValueError("Current user is not logged in")
+    identity = request_memo(("identity", str(uid)), lambda: lookup_one(query_identity, [uid]))
+    if identity is None:
+        raise ValueError("User not found")
+    return identity
 
-    conn = get_db_connection()
-    if conn is None:
-        raise ValueError("Database connection failed")
-
-    try:
-        cursor = conn.cursor(dictionary=True, buffered=True)
-        cursor.execute("SELECT cid FROM customers WHERE uid = %s", [uid])
-        result = cursor.fetchone()
-        cursor.close()
-        conn.close()
+def _is_current_user(uid):
+    curr = getattr(current_user, "id", None)
+    return uid is not None and curr is not None and str(uid) == str(curr)
 
-        if not result or result["cid"] is None:
-            raise ValueError("Customer ID not found for current user")
-        return result["cid"]
-    except Exception as e:
-        conn.close()
-        raise e
+def get_curr_cid():
+    """Return the customer ID for the currently logged-in user, or raise an error if none exists."""
+    cid = current_identity()["cid"]
+    if cid is None:
+        raise ValueError("Customer ID not found for current user")
+    return cid
     
 def get_curr_bid():
     """Return the business ID for the currently logged-in user, or raise an error if none exists."""
-    uid = getattr(current_user, "id", None)
-    if uid is None:
-        raise ValueError("Current user is not logged in")
-
-    conn = get_db_connection()
-    if conn is None:
-        raise ValueError("Database connection failed")
-
-    try:
-        cursor = conn.cursor(dictionary=True, buffered=True)
-        cursor.execute("SELECT bid FROM business WHERE uid = %s", [uid])
-        result = cursor.fetchone()
-        cursor.close()
-        conn.close()
-
-        if not result or result["bid"] is None:
-            raise ValueError("Businsess ID not found for current user")
-        return result["bid"]
-    except Exception as e:
-        conn.close()
-        raise e
+    bid = current_identity()["bid"]
+    if bid is None:
+        raise ValueError("Businsess ID not found for current user")
+    return bid
     
 def get_curr_eid():
     """Return the employee ID for the currently logged-in user, or raise an error if none exists."""
-    uid = getattr(current_user, "id", None)
-    if uid is None:
-        raise ValueError("Current user is not logged in")
-
-    conn = get_db_connection()
-    if conn is None:
-        raise ValueError("Database connection failed")
-
-    try:
-        cursor = conn.cursor(dictionary=True, buffered=True)
-        cursor.execute("SELECT eid FROM employee WHERE uid = %s", [uid])
-        result = cursor.fetchone()
-        cursor.close()
-        conn.close()
-
-        if not result or result["eid"] is None:
-            raise ValueError("Employee ID not found for current user")
-        return result["eid"]
-    except Exception as e:
-        conn.close()
-        raise e
+    eid = current_identity()["eid"]
+    if eid is None:
+        raise ValueError("Employee ID not found for current user")
+    return eid
     
 def get_bid_from_uid(uid):
     if uid is None:
         raise ValueError("Current user is not logged in")
+    if _is_current_user(uid):
+        return get_curr_bid()
 
-    conn = get_db_connection()
-    if conn is None:
-        raise ValueError("Database connection failed")
-
-    try:
-        cursor = conn.cursor(dictionary=True, buffered=True)
-        cursor.execute("SELECT bid FROM business WHERE uid = %s", [uid])
-        result = cursor.fetchone()
-        cursor.close()
-        conn.close()
-
-        if not result or result["bid"] is None:
-            raise ValueError("Businsess ID not found for current user")
-        return result["bid"]
-    except Exception as e:
-        conn.close()
-        raise e
+    result = request_memo(("bid", str(uid)), lambda: lookup_one("SELECT bid FROM business WHERE uid = %s", [uid]))
+    if not result or result["bid"] is None:
+        raise ValueError("Businsess ID not found for current user")
+    return result["bid"]
 
 def checkrole(uid):
     """return role of user"""
-    conn = get_db_connection()
-    if conn is None:
-        raise ValueError("Database connection failed")
-
-    try:
-        cursor = conn.cursor(dictionary=True, buffered=True)
-        cursor.execute(query_user_role,[uid])
-        role=cursor.fetchone()
-        cursor.close()
-        conn.close()
-        return role['name']
-    except Exception as e:
-        if conn:
-            conn.close()
-        raise e
-
-def check_role():
-    """return role of user"""
-    uid = getattr(current_user, "id", None)
-    conn = get_db_connection()
-    if conn is None:
-        raise ValueError("Database connection failed")
-
-    try:
-        cursor = conn.cursor(dictionary=True, buffered=True)
-        cursor.execute(query_user_role,[uid])
-        role=cursor.fetchone()
-        cursor.close()
-        conn.close()
-        return role['name']
-    except Exception as e:
-        if conn:
-            conn.close()
-        raise e
+    if _is_current_user(uid):
+        return current_identity()["role"]
+    role = request_memo(("role", str(uid)), lambda: lookup_one(query_user_role, [uid]))
+    return role['name']
+
+def check_role(uid=None):
+    """return role of the current user, or of uid if given"""
+    if uid is not None:
+        return checkrole(uid)
+    return current_identity()["role"]
     
 def get_email(uid):
     """return email of user"""
-    conn = get_db_connection()
-    if conn is None:
-        raise ValueError("Database connection failed")
-    
-    try:
-        cursor = conn.cursor(dictionary=True, buffered=True)
-        cursor.execute(query_email,[uid])
-        email = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        return email['email']
-    except Exception as e:
-        if conn:
-            conn.close()
-        raise e
+    email = request_memo(("email", str(uid)), lambda: lookup_one(query_email, [uid]))
+    return email['email']
     
 def get_name(uid):
     """return ['first name', 'last name'] of user"""
-    conn = get_db_connection()
-    if conn is None:
-        raise ValueError("Database connection failed")
-    cursor = None
-    
-    try:
-        cursor = conn.cursor(buffered=True)
-        cursor.execute(query_name,[uid])
-        name = cursor.fetchone()
-        return name 
-    except Exception as e:
-        conn.close()
-        raise e
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return request_memo(("name", str(uid)), lambda: lookup_one(query_name, [uid], dictionary=False))
     
 def get_appointment_details(aid):
     """return cid, customer first name, customer last name, customer email,
@@ -203,18 +100,4 @@ def get_appointment_details(aid):
     
     aid, appointment start time, appointment expected end time"""
 
-    conn = get_db_connection()
-    if conn is None:
-        raise ValueError("Database connection failed")
-    
-    try:
-        cursor = conn.cursor(dictionary=True, buffered=True)
-        cursor.execute(query_appointment, [aid])
-        results = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        return results
-    except Exception as e:
-        if conn:
-            conn.close()
-        raise e
\ No newline at end of file
+    return lookup_one(query_appointment, [aid])
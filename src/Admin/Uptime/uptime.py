@@ -1,6 +1,10 @@
 from flask import Blueprint, request, jsonify
 from flask_login import current_user, login_required
 from helper.utils import *
+from helper.db_pool import pool_stats
+from src.Auth.User import user_cache
+from src.Admin.snapshot import snapshot
+from src.Notifications.mailer import mailer_stats
 from .queries import *
 from mysql.connector import Error
 from datetime import datetime
@@ -28,6 +32,47 @@ def health_check():
             'timestamp': datetime.now().isoformat(),
             'error': str(e)
         }), 500
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+@uptime.route('/db-pool', methods=['GET'])
+def get_db_pool_stats():
+    """Return connection pool usage: in use, idle, overflow, waits and wait time histogram"""
+    return jsonify({
+        "status":"success",
+        "timestamp":datetime.now().isoformat(),
+        "pool":pool_stats()
+    }), 200
+
+@uptime.route('/user-cache', methods=['GET'])
+def get_user_cache_stats():
+    """Return session user cache size, hits, misses and evictions"""
+    return jsonify({
+        "status":"success",
+        "timestamp":datetime.now().isoformat(),
+        "cache":user_cache.stats()
+    }), 200
+
+@uptime.route('/metrics-snapshot', methods=['GET'])
+def get_metrics_snapshot_stats():
+    """Return admin metrics snapshot age, refresh duration and failed metrics"""
+    return jsonify({
+        "status":"success",
+        "timestamp":datetime.now().isoformat(),
+        "snapshot":snapshot.stats()
+    }), 200
+
+@uptime.route('/mailer', methods=['GET'])
+def get_mailer_stats():
+    """Return email queue depth, sent, failed and retried counts and send latency"""
+    return jsonify({
+        "status":"success",
+        "timestamp":datetime.now().isoformat(),
+        "mailer":mailer_stats()
+    }), 200
     
 @uptime.route('/current', methods=['GET'])
 def get_current_uptime():
@@ -2,21 +2,6 @@ import os
 from dotenv import load_dotenv
 import mysql.connector
 from mysql.connector import Error
+from helper.utils import get_db_connection
 
 load_dotenv()
-
-def get_db_connection():
-    """create database connection"""
-    try:
-        connection = mysql.connector.connect(
-            host=os.getenv('DB_HOST'),
-            user=os.getenv('DB_USER'),
-            port=int(os.getenv("DB_PORT")),
-            password=os.getenv('DB_PASSWORD'),
-            database=os.getenv('DB_NAME')
-        )
-        return connection
-    except Error as e:
-        print(f"Error connecting to MySQL: {e}")
-        return None
-    
\ No newline at end of file
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from .admin_func import *
 from .queries import *
+from .snapshot import METRICS, compute_metrics, snapshot
 from helper.utils import *
 from flask_login import current_user, login_required
 from mysql.connector import Error
@@ -150,37 +151,68 @@ def customer_satisfaction():
         if conn:
             conn.close()
 
-@metrics.route('/total-active-users',methods=['GET'])
+def snapshot_response(name):
+    """serve a metric from the precomputed snapshot"""
+    fields, error = snapshot.get(name)
+    if error:
+        return jsonify({
+            "status": "failure",
+            "message": error
+        }), 500
+    return jsonify({"status":"success", **fields, "refreshed_at":snapshot.refreshed_at})
+
+@metrics.route('/dashboard', methods=['GET', 'POST'])
 @login_required
-def get_total_active_users():
+def get_dashboard():
+    """return many metrics in one response
+
+    metrics are named by ?metrics=a,b or a JSON body {"metrics": [...]}, all
+    metrics are returned when none are named. With fresh=true they are
+    computed live on the metrics thread pool instead of read from the snapshot
+    """
     if not check_role() == 'admin':
         return jsonify({
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_tot_active_users)
 
-        tot_active = cursor.fetchone()
-        tot_active_val = tot_active['total_active_users']
+    data = request.get_json(silent=True) or {}
+    names = data.get('metrics') or request.args.get('metrics', '')
+    if isinstance(names, str):
+        names = names.split(',')
+    names = [n.strip() for n in names if n and n.strip()] or list(METRICS)
+    unknown = [n for n in names if n not in METRICS]
+    if unknown:
+        return jsonify({
+            "status":"failure",
+            "message":"unknown metrics",
+            "unknown":unknown
+        }), 400
+
+    fresh = str(data.get('fresh', request.args.get('fresh', ''))).lower() in ('1', 'true', 'yes')
+    if fresh:
+        values, errors = compute_metrics(names)
+        refreshed_at = datetime.now().isoformat()
+    else:
+        values, errors = snapshot.get_many(names)
+        refreshed_at = snapshot.refreshed_at
+
+    return jsonify({
+        "status":"success",
+        "refreshed_at":refreshed_at,
+        "metrics":values,
+        "errors":errors
+    }), 200
 
-        return jsonify({"status":"success", "tot_active":tot_active_val})
-    except Exception as e:
+@metrics.route('/total-active-users',methods=['GET'])
+@login_required
+def get_total_active_users():
+    if not check_role() == 'admin':
         return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+            "status":"failure",
+            "message":"unauthorized",
+        }), 403
+    return snapshot_response('total-active-users')
 
 @metrics.route('/salons-explored',methods=['GET'])
 @login_required
@@ -190,28 +222,7 @@ def get_salons_explored():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_avg_salons_expl)
-        explored = cursor.fetchone()
-        avg_salons_expl = explored['avg_salons_explored']
-
-        return jsonify({"status":"success", "avg_salons_explored":avg_salons_expl})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return snapshot_response('salons-explored')
 
 @metrics.route('/salon-views',methods=['GET'])
 @login_required
@@ -221,28 +232,7 @@ def get_salon_views():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_avg_salon_views)
-        salon_views = cursor.fetchone()
-        avg_salon_views = salon_views['avg_salon_views']
-
-        return jsonify({"status":"success", "avg_salon_views":avg_salon_views})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return snapshot_response('salon-views')
 
 @metrics.route('/product-views',methods=['GET'])
 @login_required
@@ -252,28 +242,7 @@ def get_product_views():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_prod_views)
-        prod_views = cursor.fetchone()
-        avg_product_views = prod_views['avg_product_views']
-
-        return jsonify({"status":"success", "avg_product_views":avg_product_views})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return snapshot_response('product-views')
 
 @metrics.route('/new-user-trend',methods=['GET'])
 @login_required
@@ -283,28 +252,7 @@ def get_new_user_trend():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_new_user_trend)
-        new_user_rows = cursor.fetchall()
-        new_user_labels = [row["month"] for row in new_user_rows]
-        new_user_data = [row["new_users_count"] for row in new_user_rows]
-        return jsonify({"status":"success", "new_user_labels":new_user_labels, "new_user_data":new_user_data})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return snapshot_response('new-user-trend')
 
 @metrics.route('/active-user-roles',methods=['GET'])
 @login_required
@@ -314,28 +262,7 @@ def get_active_user_roles():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_active_user_roles)
-        active_user_rows = cursor.fetchall()
-        active_user_labels = [row["role"] for row in active_user_rows]
-        active_user_data = [row["active_users"] for row in active_user_rows]
-        return jsonify({"status":"success", "active_user_labels":active_user_labels, "active_user_data":active_user_data})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return snapshot_response('active-user-roles')
 
 @metrics.route('/active-user-trend',methods=['GET'])
 @login_required
@@ -345,28 +272,7 @@ def get_active_user_trend():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_active_user_trend)
-        active_users_rows = cursor.fetchall()
-        active_user_labels = [row["month"] for row in active_users_rows]
-        active_user_data = [row["active_count"] for row in active_users_rows]
-        return jsonify({"status":"success", "active_user_labels":active_user_labels, "active_user_data":active_user_data})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return snapshot_response('active-user-trend')
 
 @metrics.route('/total-programs',methods=['GET'])
 @login_required
@@ -376,28 +282,7 @@ def get_total_programs():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_tot_loyalty_progs)
-        
-        active_loyalty_programs = cursor.fetchone()
-        total_programs = active_loyalty_programs['active_loyalty_programs']
-        return jsonify({"status":"success", "total_programs":total_programs})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return snapshot_response('total-programs')
 
 @metrics.route('/client-participation',methods=['GET'])
 @login_required
@@ -407,27 +292,7 @@ def get_client_participation():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_client_prog_percent)
-        client_part = cursor.fetchone()
-        client_part_val = f"{round(client_part['percent_participating'], 2)}%"
-        return jsonify({"status":"success", "client_participation":client_part_val})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return snapshot_response('client-participation')
 
 @metrics.route('/average-saved',methods=['GET'])
 @login_required
@@ -437,27 +302,7 @@ def get_average_saved():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_average_saved)
-        avg_saved = cursor.fetchone()
-        avg_saved_val = f"${round(avg_saved['avg_amount_saved_per_customer'], 2)}" if avg_saved['avg_amount_saved_per_customer'] is not None else f"$0"
-        return jsonify({"status":"success", "avg_saved":avg_saved_val})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return snapshot_response('average-saved')
 
 @metrics.route('/total-saved',methods=['GET'])
 @login_required
@@ -467,27 +312,7 @@ def get_total_saved():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_tot_saved)
-        tot_savings = cursor.fetchone()
-        tot_savings_val = f"${round(tot_savings['total_savings'], 2)}" if tot_savings['total_savings'] is not None else f"$0"
-        return jsonify({"status":"success", "total_savings":tot_savings_val})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return snapshot_response('total-saved')
 
 @metrics.route('/prog-salon',methods=['GET'])
 @login_required
@@ -497,28 +322,7 @@ def get_programs_by_salon():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_progs_by_salon)
-        prog_rows = cursor.fetchall()
-        prog_salon_labels = [row["num_programs"] for row in prog_rows]
-        prog_salon_data = [row["num_salons"] for row in prog_rows]
-        return jsonify({"status":"success", "prog_salon_labels":prog_salon_labels, "prog_salon_data":prog_salon_data})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return snapshot_response('prog-salon')
 
 @metrics.route('/prog-types',methods=['GET'])
 @login_required
@@ -528,29 +332,7 @@ def get_program_types():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_prog_types)
-        prog_row = cursor.fetchone()
-        prog_labels = ["Points", "Price", "Appointments", "Products"]
-        prog_data = [prog_row["points"], prog_row["price"], prog_row["appointments"], prog_row["products"]]
-
-        return jsonify({"status":"success", "labels":prog_labels, "data":prog_data})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return snapshot_response('prog-types')
 
 @metrics.route('/savings-trend',methods=['GET'])
 @login_required
@@ -560,28 +342,7 @@ def get_savings_trend():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_savings_trend)
-        savings_rows = cursor.fetchall()
-        savings_labels = [row["month"] for row in savings_rows]
-        savings_data = [row["total_redeemed"] for row in savings_rows]
-        return jsonify({"status":"success", "savings_labels":savings_labels, "savings_data":savings_data})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return snapshot_response('savings-trend')
 
 @metrics.route('/total-revenue',methods=['GET'])
 @login_required
@@ -591,27 +352,7 @@ def get_total_revenue():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_tot_rev)
-        tot_rev = cursor.fetchone()
-        tot_rev_val = f"${round(tot_rev['total_revenue'], 2)}" if tot_rev['total_revenue'] is not None else f"$0"
-        return jsonify({"status":"success", "total_revenue":tot_rev_val})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return snapshot_response('total-revenue')
 
 @metrics.route('/revenue-month',methods=['GET'])
 @login_required
@@ -621,27 +362,7 @@ def get_revenue_month():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_month_rev_change)
-        rev = cursor.fetchone()
-        rev_month = round(rev['percent_change'], 2) if rev['percent_change'] is not None else f"$0"
-        return jsonify({"status":"success", "revenue_month_change":rev_month})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return snapshot_response('revenue-month')
 
 @metrics.route('/revenue-year',methods=['GET'])
 @login_required
@@ -651,27 +372,7 @@ def get_revenue_year():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_year_rev_change)
-        rev = cursor.fetchone()
-        rev_year = round(rev['percent_change'], 2)
-        return jsonify({"status":"success", "revenue_year_change":rev_year})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return snapshot_response('revenue-year')
 
 @metrics.route('/average-revenue',methods=['GET'])
 @login_required
@@ -681,58 +382,17 @@ def get_average_revenue():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_avg_salon_rev)
-        avg_rev = cursor.fetchone()
-        avg_rev_val = f"${round(avg_rev['avg_monthly_salon_revenue'], 2)}"
-        return jsonify({"status":"success", "average_revenue":avg_rev_val})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return snapshot_response('average-revenue')
 
 @metrics.route('/revenue-trend',methods=['GET'])
 @login_required
 def get_revenue_trend():
-    if not check_role() == 'admin':
-        return jsonify({
-            "status":"failure",
-            "message":"unauthorized",
-        }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_rev_trend)
-        revenue_rows = cursor.fetchall()
-        revenue_labels = [row["month"] for row in revenue_rows]
-        revenue_data = [row["revenue"] for row in revenue_rows]
-        return jsonify({"status":"success", "revenue_labels":revenue_labels, "revenue_data":revenue_data})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    if not check_role() == 'admin':
+        return jsonify({
+            "status":"failure",
+            "message":"unauthorized",
+        }), 403
+    return snapshot_response('revenue-trend')
 
 @metrics.route('/revenue-source',methods=['GET'])
 @login_required
@@ -742,28 +402,7 @@ def get_revenue_source():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_rev_by_src)
-        revenue_rows = cursor.fetchall()
-        revenue_labels = [row["source"] for row in revenue_rows]
-        revenue_data = [row["revenue"] for row in revenue_rows]
-        return jsonify({"status":"success", "revenue_labels":revenue_labels, "revenue_data":revenue_data})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return snapshot_response('revenue-source')
 
 @metrics.route('/top-services',methods=['GET'])
 @login_required
@@ -773,28 +412,7 @@ def get_top_services():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_top_services)
-        service_rows = cursor.fetchall()
-        top_service_labels = [row["name"] for row in service_rows]
-        top_service_data = [row["revenue"] for row in service_rows]
-        return jsonify({"status":"success", "top_service_labels":top_service_labels, "top_service_data":top_service_data})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return snapshot_response('top-services')
 
 @metrics.route('/reschedule',methods=['GET'])
 @login_required
@@ -804,28 +422,7 @@ def get_reschedule_rate():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_resched_rate)
-        resched_rate = cursor.fetchone()
-        resched_rate_val = f"{round(resched_rate['reschedule_rate'], 2)}%"
-
-        return jsonify({"status":"success", "resched_rate":resched_rate_val})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return snapshot_response('reschedule')
 
 @metrics.route('/cancel',methods=['GET'])
 @login_required
@@ -835,29 +432,7 @@ def get_cancel_rate():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_cancel_rate)
-
-        cancel_rate = cursor.fetchone()
-        cancel_rate_val = f"{round(cancel_rate['cancellation_rate'], 2)}%"        
-
-        return jsonify({"status":"success", "cancel_rate":cancel_rate_val})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return snapshot_response('cancel')
 
 @metrics.route('/no-show',methods=['GET'])
 @login_required
@@ -867,29 +442,7 @@ def get_no_show_rate():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_no_show_rate)
-        
-        no_show_rate = cursor.fetchone()
-        no_show_rate_val = f"{round(no_show_rate['no_show_rate'], 2)}%"
-
-        return jsonify({"status":"success", "no_show_rate":no_show_rate_val})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return snapshot_response('no-show')
 
 @metrics.route('/appt-service',methods=['GET'])
 @login_required
@@ -899,30 +452,7 @@ def get_appt_by_service():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_appt_by_service)
-        service_rows = cursor.fetchall()
-
-        appt_cat_labels = [row["name"] for row in service_rows]
-        appt_cat_data = [row["appt_count"] for row in service_rows]
-
-        return jsonify({"status":"success", "appt_cat_labels":appt_cat_labels, "appt_cat_data":appt_cat_data})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return snapshot_response('appt-service')
 
 @metrics.route('/appt-day',methods=['GET'])
 @login_required
@@ -932,30 +462,7 @@ def get_appt_by_day():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_appt_by_day)
-        day_rows = cursor.fetchall()
-
-        appt_day_labels = [row["day"] for row in day_rows]
-        appt_day_data = [row["appt_count"] for row in day_rows]
-
-        return jsonify({"status":"success", "appt_day_labels":appt_day_labels, "appt_day_data":appt_day_data})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return snapshot_response('appt-day')
 
 @metrics.route('/appt-time',methods=['GET'])
 @login_required
@@ -965,30 +472,7 @@ def get_appt_by_time():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_appt_by_time)
-        time_rows = cursor.fetchall()
-
-        appt_time_labels = [row["time_block"] for row in time_rows]
-        appt_time_data = [row["appt_count"] for row in time_rows]
-
-        return jsonify({"status":"success", "appt_time_labels":appt_time_labels, "appt_time_data":appt_time_data})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return snapshot_response('appt-time')
 
 @metrics.route('/appt-trend',methods=['GET'])
 @login_required
@@ -998,30 +482,7 @@ def get_appt_trend():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_appt_trend)
-        year_rows = cursor.fetchall()
-
-        appt_trend_labels = [row["month"] for row in year_rows]
-        appt_trend_data = [row["completed_appointments"] for row in year_rows]
-
-        return jsonify({"status":"success", "appt_trend_labels":appt_trend_labels, "appt_trend_data":appt_trend_data})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return snapshot_response('appt-trend')
 
 @metrics.route('/income',methods=['GET'])
 @login_required
@@ -1031,27 +492,7 @@ def get_average_income():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_avg_income)
-        avg_income = cursor.fetchone()
-        avg_income_val = f"${round(avg_income['avg_income'], 2)}"
-        return jsonify({"status":"success", "avg_income":avg_income_val})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return snapshot_response('income')
 
 @metrics.route('/salon-age',methods=['GET'])
 @login_required
@@ -1061,27 +502,7 @@ def get_average_salon_age():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_avg_salon_age)
-        salon_age = cursor.fetchone()
-        salon_age_val = f"{round(salon_age['avg_salon_age'], 2)} years"
-        return jsonify({"status":"success", "avg_salon_age":salon_age_val})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return snapshot_response('salon-age')
 
 @metrics.route('/experience',methods=['GET'])
 @login_required
@@ -1091,27 +512,7 @@ def get_average_worker_experiences():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_avg_worker_exp)
-        worker_experience = cursor.fetchone()
-        worker_experience_val = f"{round(worker_experience['avg_worker_experience'], 2)} years"
-        return jsonify({"status":"success", "avg_worker_experience":worker_experience_val})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return snapshot_response('experience')
 
 @metrics.route('/gender',methods=['GET'])
 @login_required
@@ -1121,28 +522,7 @@ def get_gender_distribution():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_gender_dist)
-        gender_rows = cursor.fetchall()
-        gender_labels = [row["gender"] for row in gender_rows]
-        gender_data = [row["count"] for row in gender_rows]
-        return jsonify({"status":"success", "gender_labels":gender_labels, "gender_data":gender_data})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return snapshot_response('gender')
 
 @metrics.route('/age',methods=['GET'])
 @login_required
@@ -1152,28 +532,7 @@ def get_age_distribution():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_age_dist)
-        age_rows = cursor.fetchall()
-        age_labels = [row["age_range"] for row in age_rows]
-        age_data = [row["count"] for row in age_rows]
-        return jsonify({"status":"success", "age_labels":age_labels, "age_data":age_data})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return snapshot_response('age')
 
 @metrics.route('/industry',methods=['GET'])
 @login_required
@@ -1183,25 +542,4 @@ def get_industry_distribution():
             "status":"failure",
             "message":"unauthorized",
         }), 403
-    
-    conn = None
-    cursor = None
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_industry_dist)
-        industry_rows = cursor.fetchall()
-        industry_labels = [row["name"] for row in industry_rows]
-        industry_data = [row["client_count"] for row in industry_rows]
-        return jsonify({"status":"success", "industry_labels":industry_labels, "industry_data":industry_data})
-    except Exception as e:
-        return jsonify({
-            "status": "failure",
-            "message": str(e)
-        }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
\ No newline at end of file
+    return snapshot_response('industry')
@@ -135,11 +135,11 @@ SELECT
 ROUND(((this_month.rev - last_month.rev) / last_month.rev) * 100, 2) AS percent_change
 FROM (
 	SELECT SUM(revenue) AS rev FROM monthly_revenue
-	WHERE month = MONTH(CURDATE())
+	WHERE year = YEAR(CURDATE()) AND month = MONTH(CURDATE())
 ) this_month,
 (
 	SELECT SUM(revenue) AS rev FROM monthly_revenue
-	WHERE month = MONTH(CURDATE()) - 1
+	WHERE year = YEAR(CURDATE() - INTERVAL 1 MONTH) AND month = MONTH(CURDATE() - INTERVAL 1 MONTH)
 ) last_month;
 """
 
@@ -0,0 +1,303 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from helper.utils import get_db_connection
+from .queries import *
+
+# seconds between scheduled recomputations of the admin metrics
+SNAPSHOT_INTERVAL = int(os.getenv("ADMIN_METRICS_REFRESH_SECONDS", "300"))
+# a snapshot older than this is recomputed inline by the next reader, which
+# covers processes where the scheduler is not running
+SNAPSHOT_MAX_AGE = int(os.getenv("ADMIN_METRICS_MAX_AGE_SECONDS", str(SNAPSHOT_INTERVAL * 2)))
+
+SNAPSHOT_JOB_ID = "AdminMetricsSnapshot"
+
+# metrics are computed by this many threads, each on its own connection
+METRICS_WORKERS = int(os.getenv("ADMIN_METRICS_WORKERS", "4"))
+
+_executor = ThreadPoolExecutor(max_workers=METRICS_WORKERS, thread_name_prefix="admin-metrics")
+
+
+def _one(build):
+    def compute(cursor):
+        return build(cursor.fetchone())
+    return compute
+
+
+def _series(label_key, data_key, label_name, data_name):
+    def compute(cursor):
+        rows = cursor.fetchall()
+        return {
+            label_name: [row[label_key] for row in rows],
+            data_name: [row[data_key] for row in rows],
+        }
+    return compute
+
+
+def _dollars(value):
+    return f"${round(value, 2)}" if value is not None else f"$0"
+
+
+def _percent(value):
+    return f"{round(value, 2)}%"
+
+
+def _years(value):
+    return f"{round(value, 2)} years"
+
+
+def _program_types(cursor):
+    row = cursor.fetchone()
+    return {
+        "labels": ["Points", "Price", "Appointments", "Products"],
+        "data": [row["points"], row["price"], row["appointments"], row["products"]],
+    }
+
+
+def _revenue_month(row):
+    change = row['percent_change']
+    return {"revenue_month_change": round(change, 2) if change is not None else f"$0"}
+
+
+# metric name -> (query, compute(cursor) -> response fields). Names match the
+# /admin/<name> routes serving them
+METRICS = {
+    "total-active-users": (query_tot_active_users,
+        _one(lambda r: {"tot_active": r['total_active_users']})),
+    "salons-explored": (query_avg_salons_expl,
+        _one(lambda r: {"avg_salons_explored": r['avg_salons_explored']})),
+    "salon-views": (query_avg_salon_views,
+        _one(lambda r: {"avg_salon_views": r['avg_salon_views']})),
+    "product-views": (query_prod_views,
+        _one(lambda r: {"avg_product_views": r['avg_product_views']})),
+    "new-user-trend": (query_new_user_trend,
+        _series("month", "new_users_count", "new_user_labels", "new_user_data")),
+    "active-user-roles": (query_active_user_roles,
+        _series("role", "active_users", "active_user_labels", "active_user_data")),
+    "active-user-trend": (query_active_user_trend,
+        _series("month", "active_count", "active_user_labels", "active_user_data")),
+    "total-programs": (query_tot_loyalty_progs,
+        _one(lambda r: {"total_programs": r['active_loyalty_programs']})),
+    "client-participation": (query_client_prog_percent,
+        _one(lambda r: {"client_participation": _percent(r['percent_participating'])})),
+    "average-saved": (query_average_saved,
+        _one(lambda r: {"avg_saved": _dollars(r['avg_amount_saved_per_customer'])})),
+    "total-saved": (query_tot_saved,
+        _one(lambda r: {"total_savings": _dollars(r['total_savings'])})),
+    "prog-salon": (query_progs_by_salon,
+        _series("num_programs", "num_salons", "prog_salon_labels", "prog_salon_data")),
+    "prog-types": (query_prog_types, _program_types),
+    "savings-trend": (query_savings_trend,
+        _series("month", "total_redeemed", "savings_labels", "savings_data")),
+    "total-revenue": (query_tot_rev,
+        _one(lambda r: {"total_revenue": _dollars(r['total_revenue'])})),
+    "revenue-month": (query_month_rev_change, _one(_revenue_month)),
+    "revenue-year": (query_year_rev_change,
+        _one(lambda r: {"revenue_year_change": round(r['percent_change'], 2)})),
+    "average-revenue": (query_avg_salon_rev,
+        _one(lambda r: {"average_revenue": _dollars(r['avg_monthly_salon_revenue'])})),
+    "revenue-trend": (query_rev_trend,
+        _series("month", "revenue", "revenue_labels", "revenue_data")),
+    "revenue-source": (query_rev_by_src,
+        _series("source", "revenue", "revenue_labels", "revenue_data")),
+    "top-services": (query_top_services,
+        _series("name", "revenue", "top_service_labels", "top_service_data")),
+    "reschedule": (query_resched_rate,
+        _one(lambda r: {"resched_rate": _percent(r['reschedule_rate'])})),
+    "cancel": (query_cancel_rate,
+        _one(lambda r: {"cancel_rate": _percent(r['cancellation_rate'])})),
+    "no-show": (query_no_show_rate,
+        _one(lambda r: {"no_show_rate": _percent(r['no_show_rate'])})),
+    "appt-service": (query_appt_by_service,
+        _series("name", "appt_count", "appt_cat_labels", "appt_cat_data")),
+    "appt-day": (query_appt_by_day,
+        _series("day", "appt_count", "appt_day_labels", "appt_day_data")),
+    "appt-time": (query_appt_by_time,
+        _series("time_block", "appt_count", "appt_time_labels", "appt_time_data")),
+    "appt-trend": (query_appt_trend,
+        _series("month", "completed_appointments", "appt_trend_labels", "appt_trend_data")),
+    "income": (query_avg_income,
+        _one(lambda r: {"avg_income": _dollars(r['avg_income'])})),
+    "salon-age": (query_avg_salon_age,
+        _one(lambda r: {"avg_salon_age": _years(r['avg_salon_age'])})),
+    "experience": (query_avg_worker_exp,
+        _one(lambda r: {"avg_worker_experience": _years(r['avg_worker_experience'])})),
+    "gender": (query_gender_dist,
+        _series("gender", "count", "gender_labels", "gender_data")),
+    "age": (query_age_dist,
+        _series("age_range", "count", "age_labels", "age_data")),
+    "industry": (query_industry_dist,
+        _series("name", "client_count", "industry_labels", "industry_data")),
+}
+
+
+def compute_metric(cursor, name, metrics=METRICS):
+    """run one metric's query on cursor and return its response fields"""
+    query, compute = metrics[name]
+    cursor.execute(query)
+    return compute(cursor)
+
+
+def _compute_chunk(names, metrics):
+    """compute names one after another on a single connection"""
+    values = {}
+    errors = {}
+    conn = None
+    cursor = None
+    try:
+        conn = get_db_connection()
+        if conn is None:
+            raise ValueError("Database connection failed")
+        cursor = conn.cursor(dictionary=True, buffered=True)
+        for name in names:
+            try:
+                values[name] = compute_metric(cursor, name, metrics)
+            except Exception as e:
+                print(f"Metric {name} failed: {e}")
+                errors[name] = str(e)
+    except Exception as e:
+        print(f"Metrics connection failed: {e}")
+        for name in names:
+            if name not in values:
+                errors[name] = str(e)
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+    return values, errors
+
+
+def compute_metrics(names, metrics=METRICS, workers=METRICS_WORKERS):
+    """compute names concurrently and return ({name: fields}, {name: error})
+
+    the metrics are dealt round-robin into at most workers chunks, each
+    chunk runs on one pooled connection so a request holds at most workers
+    connections however many metrics it asks for
+    """
+    names = list(names)
+    chunks = [names[i::workers] for i in range(max(1, workers))]
+    chunks = [chunk for chunk in chunks if chunk]
+    if len(chunks) <= 1:
+        return _compute_chunk(names, metrics)
+
+    values = {}
+    errors = {}
+    for chunk_values, chunk_errors in _executor.map(lambda c: _compute_chunk(c, metrics), chunks):
+        values.update(chunk_values)
+        errors.update(chunk_errors)
+    return values, errors
+
+
+class MetricsSnapshot:
+    """Precomputed admin metrics, swapped in whole on every refresh
+
+    readers never touch the database while a snapshot is fresh; a metric whose
+    query failed keeps its error message until the next refresh
+    """
+
+    def __init__(self, metrics=METRICS, max_age=SNAPSHOT_MAX_AGE, workers=METRICS_WORKERS):
+        self.metrics = metrics
+        self.max_age = max_age
+        self.workers = workers
+        self._values = {}
+        self._errors = {}
+        self._refreshed_at = None
+        self._refreshed_mono = None
+        self._duration = None
+        self._refresh_lock = threading.Lock()
+        self.refreshes = 0
+        self.failures = 0
+
+    def refresh(self):
+        """recompute every metric and publish the result"""
+        with self._refresh_lock:
+            return self._recompute()
+
+    def _recompute(self):
+        started = time.monotonic()
+        values, errors = compute_metrics(self.metrics, self.metrics, self.workers)
+        if not values and errors:
+            # nothing could be computed, keep serving the previous snapshot
+            print("Metrics snapshot refresh failed")
+            self.failures += 1
+            return False
+
+        self._values, self._errors = values, errors
+        self._refreshed_at = datetime.now()
+        self._refreshed_mono = time.monotonic()
+        self._duration = self._refreshed_mono - started
+        self.refreshes += 1
+        return True
+
+    def is_stale(self):
+        return (self._refreshed_mono is None
+                or time.monotonic() - self._refreshed_mono > self.max_age)
+
+    def ensure_fresh(self):
+        """refresh inline if the snapshot is missing or too old
+
+        concurrent readers wait for the one refresh in progress instead of
+        each running the queries
+        """
+        if not self.is_stale():
+            return
+        with self._refresh_lock:
+            if self.is_stale():
+                self._recompute()
+
+    def get(self, name):
+        """return (fields, error) of a metric"""
+        values, errors = self.get_many([name])
+        if name in values:
+            return values[name], None
+        return None, errors[name]
+
+    def get_many(self, names):
+        """return ({name: fields}, {name: error}) of names, all read from
+        the same snapshot"""
+        self.ensure_fresh()
+        all_values, all_errors = self._values, self._errors
+        values = {}
+        errors = {}
+        for name in names:
+            if name in all_values:
+                values[name] = all_values[name]
+            else:
+                errors[name] = all_errors.get(name, "metric not available")
+        return values, errors
+
+    @property
+    def refreshed_at(self):
+        return self._refreshed_at.isoformat() if self._refreshed_at else None
+
+    def stats(self):
+        return {
+            "metrics": len(self.metrics),
+            "available": len(self._values),
+            "errors": dict(self._errors),
+            "refreshed_at": self.refreshed_at,
+            "age_seconds": round(time.monotonic() - self._refreshed_mono, 3) if self._refreshed_mono else None,
+            "refresh_duration": round(self._duration, 3) if self._duration is not None else None,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+        }
+
+
+snapshot = MetricsSnapshot()
+
+
+def start_snapshot_job(scheduler, interval_seconds=SNAPSHOT_INTERVAL):
+    """recompute the snapshot now and every interval_seconds on scheduler"""
+    scheduler.add_job(
+        func=snapshot.refresh,
+        trigger='interval',
+        seconds=interval_seconds,
+        id=SNAPSHOT_JOB_ID,
+        next_run_time=datetime.now(),
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True
+    )
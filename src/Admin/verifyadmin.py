@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
 from .queries import *
 from .admin_func import *
+from src.Auth.User import invalidate_user
 from helper.utils import checkrole
 
 verifyadmin = Blueprint("verifyadmin",__name__,url_prefix='/admin/admin')
@@ -14,6 +15,8 @@ def verify_admin(uid):
             "status": "failure",
             "message": "unauthorized access"
         }), 401
+    conn = None
+    cursor = None
     try:
         if checkrole(uid) != "admin":
             print("user is not admin")
@@ -25,6 +28,7 @@ def verify_admin(uid):
         cursor = conn.cursor()
         cursor.execute(update_verify_admin,(uid,))
         conn.commit()
+        invalidate_user(uid)
         return jsonify({
             "status": "success",
             "message": "approved admin",
@@ -37,6 +41,11 @@ def verify_admin(uid):
             "message":"Database Error",
             "Error": e
         }), 400
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
 
 @verifyadmin.route('/<int:uid>/reject', methods=['DELETE'])
 @login_required
@@ -46,6 +55,8 @@ def reject_admin(uid):
             "status": "failure",
             "message": "unauthorized access"
         }), 401
+    conn = None
+    cursor = None
     try:
         if checkrole(uid) != "admin":
             print("user is not admin")
@@ -59,6 +70,7 @@ def reject_admin(uid):
         cursor.execute(delete_admin_role, [uid])
         cursor.execute(delete_admin_user, [uid])
         conn.commit()
+        invalidate_user(uid)
         return jsonify({
             "status": "success",
             "message": "rejected admin",
@@ -71,6 +83,11 @@ def reject_admin(uid):
             "message":"Database Error",
             "Error": e
         }), 400
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
 
 @verifyadmin.route('/pending', methods=['GET'])
 @login_required
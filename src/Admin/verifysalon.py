@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
 from .queries import *
 from .admin_func import *
+from src.Auth.User import invalidate_user
 
 verifysalon = Blueprint("verifysalon",__name__,url_prefix='/admin')
 
@@ -13,11 +14,14 @@ def verify_salon(uid):
             "status": "failure",
             "message": "unauthorized access"
         }), 401
+    conn = None
+    cursor = None
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute(update_verify_salon,(uid,))
         conn.commit()
+        invalidate_user(uid)
         return jsonify({
             "status": "success",
             "message": "approved salon",
@@ -30,6 +34,11 @@ def verify_salon(uid):
             "message":"Database Error",
             "Error": e
         }), 400
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
 
 @verifysalon.route('/<int:uid>/reject', methods=['POST'])
 @login_required
@@ -39,11 +48,14 @@ def reject_salon(uid):
             "status": "failure",
             "message": "unauthorized access"
         }), 401
+    conn = None
+    cursor = None
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute(delete_reject_salon,(uid,))
         conn.commit()
+        invalidate_user(uid)
         return jsonify({
             "status": "success",
             "message": "rejected salon",
@@ -56,6 +68,11 @@ def reject_salon(uid):
             "message":"Database Error",
             "Error": e
         }), 400
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
 
 @verifysalon.route('/pending', methods=['GET'])
 @login_required
@@ -2,25 +2,10 @@ import os
 from dotenv import load_dotenv
 import mysql.connector
 from mysql.connector import Error
+from helper.utils import get_db_connection
 
 load_dotenv()
 
-def get_db_connection():
-    """create database connection"""
-    try:
-        connection = mysql.connector.connect(
-            host=os.getenv('DB_HOST'),
-            user=os.getenv('DB_USER'),
-            port=int(os.getenv("DB_PORT")),
-            password=os.getenv('DB_PASSWORD'),
-            database=os.getenv('DB_NAME')
-        )
-        return connection
-    except Error as e:
-        print(f"Error connecting to MySQL: {e}")
-        return None
-    
-
 def get_cid_for_uid(conn, uid):
     cur = conn.cursor(dictionary=True, buffered=True)
     cur.execute("SELECT cid FROM customers WHERE uid = %s", (uid,))
@@ -31,4 +16,8 @@ def get_cid_for_uid(conn, uid):
 def get_cid_for_aid(cur, aid):
     cur.execute("SELECT cid FROM appointments WHERE aid = %s", (aid,))
     row = cur.fetchone()
-    return row[0] if row else None
\ No newline at end of file
+    return row[0] if row else None
+def get_email_for_cid(cur, cid):
+    cur.execute("SELECT a.email FROM customers c JOIN authenticate a ON a.uid = c.uid WHERE c.cid = %s", (cid,))
+    row = cur.fetchone()
+    return row[0] if row else None
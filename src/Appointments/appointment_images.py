@@ -2,7 +2,8 @@ from flask import Blueprint, request, jsonify
 from flask_login import login_required
 from helper.utils import get_db_connection
 import mysql.connector
-import base64
+from helper.blobstore import UploadError, image_url, store_upload
+from helper.image_variants import schedule_variants
 
 appointment_images = Blueprint("appointment_images", __name__, url_prefix="/api")
 
@@ -30,18 +31,10 @@ def get_appointment_images(aid):
         
         response = {}
         if result['before_image']:
-            # Handle if image is stored as bytes or string
-            if isinstance(result['before_image'], bytes):
-                response['before_image'] = f"data:image/jpeg;base64,{result['before_image'].decode('utf-8')}"
-            else:
-                response['before_image'] = f"data:image/jpeg;base64,{result['before_image']}"
+            response['before_image'] = image_url(result['before_image'])
         
         if result['after_image']:
-            # Handle if image is stored as bytes or string
-            if isinstance(result['after_image'], bytes):
-                response['after_image'] = f"data:image/jpeg;base64,{result['after_image'].decode('utf-8')}"
-            else:
-                response['after_image'] = f"data:image/jpeg;base64,{result['after_image']}"
+            response['after_image'] = image_url(result['after_image'])
         
         return jsonify(response), 200
         
@@ -66,13 +59,8 @@ def upload_appointment_image(aid):
         return jsonify({"message": "No file selected"}), 400
     
     try:
-        image_data = file.read()
-        image_base64 = base64.b64encode(image_data).decode('utf-8')
-        
-        # Detect MIME type from file extension or content type
-        mime_type = file.content_type or 'image/jpeg'
-        if not mime_type.startswith('image/'):
-            mime_type = 'image/jpeg'
+        # the row keeps only the key, the bytes are streamed to the blob store
+        image_key = store_upload(file)
         
         conn = get_db_connection()
         if conn is None:
@@ -82,17 +70,20 @@ def upload_appointment_image(aid):
         
         column_name = f"{image_type}_image"
         query = f"UPDATE appointments SET {column_name} = %s WHERE aid = %s"
-        cursor.execute(query, (image_base64, aid))
+        cursor.execute(query, (image_key, aid))
         conn.commit()
+        schedule_variants(image_key)
         
         cursor.close()
         conn.close()
         
         response = {}
-        response[f'{image_type}_image'] = f"data:{mime_type};base64,{image_base64}"
+        response[f'{image_type}_image'] = image_url(image_key)
         
         return jsonify(response), 200
         
+    except UploadError as e:
+        return jsonify({"message": str(e)}), e.status
     except mysql.connector.Error as err:
         if conn:
             conn.rollback()
@@ -0,0 +1,313 @@
+import os
+from datetime import datetime, timedelta, time
+from helper.cache import TTLCache
+
+# approved workers of a business with their services, optionally only those
+# offering a service
+query_business_workers = """
+    SELECT
+        e.eid AS employee_id,
+        u.first_name AS employee_first_name,
+        u.last_name AS employee_last_name,
+        GROUP_CONCAT(DISTINCT s2.name SEPARATOR ', ') AS services
+    FROM employee e
+    JOIN users u ON e.uid = u.uid
+    LEFT JOIN employee_services es2 ON e.eid = es2.eid
+    LEFT JOIN services s2 ON es2.sid = s2.sid
+    WHERE e.bid = %s AND e.approved = TRUE
+"""
+
+filter_offers_service = """
+    AND EXISTS (
+        SELECT 1 FROM employee_services es
+        WHERE es.eid = e.eid AND es.sid = %s
+    )
+"""
+
+group_business_workers = """
+    GROUP BY e.eid, u.first_name, u.last_name
+"""
+
+# inputs for the day bitmaps of a set of workers, loaded set-wise
+query_workers_schedule = """
+    SELECT eid, LOWER(day) AS day, start_time, finish_time
+    FROM schedule
+    WHERE eid IN ({eids})
+"""
+
+query_workers_business_hours = """
+    SELECT e.eid, LOWER(h.day) AS day, h.open_time, h.close_time, h.is_closed
+    FROM hours_of_operation h
+    JOIN employee e ON h.bid = e.bid
+    WHERE e.eid IN ({eids})
+"""
+
+query_workers_appointments = """
+    SELECT eid, start_time, expected_end_time
+    FROM appointments
+    WHERE eid IN ({eids}) AND start_time < %s AND expected_end_time > %s
+    AND (status IS NULL OR status <> 'cancelled')
+    ORDER BY start_time
+"""
+
+# free/busy bitmaps are kept at this resolution, one bit per cell of the day
+RESOLUTION_MINUTES = 5
+CELLS_PER_DAY = 24 * 60 // RESOLUTION_MINUTES
+
+
+class DayAvailability:
+    """bitmaps of one worker's day
+
+    working: cells inside the worker's schedule and the business's hours
+    free: working cells not covered by an appointment
+    """
+
+    __slots__ = ("working", "free")
+
+    def __init__(self, working, free):
+        self.working = working
+        self.free = free
+
+
+# (eid, date) -> DayAvailability. Entries are invalidated when appointments
+# or availability change; the ttl bounds how long writes made by another
+# process can go unnoticed
+day_cache = TTLCache(
+    maxsize=int(os.getenv("AVAILABILITY_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("AVAILABILITY_CACHE_TTL", "60")),
+)
+
+
+def invalidate_worker_day(eid, day):
+    """drop the cached bitmap of eid on day (a date or datetime)"""
+    if eid is None or day is None:
+        return
+    if isinstance(day, datetime):
+        day = day.date()
+    day_cache.invalidate((int(eid), day))
+
+
+def invalidate_worker(eid):
+    """drop every cached bitmap of eid, e.g. after a schedule change"""
+    if eid is not None:
+        day_cache.invalidate_where(lambda key: key[0] == int(eid))
+
+
+def invalidate_all():
+    """drop every cached bitmap, e.g. after business hours change"""
+    day_cache.clear()
+
+
+def to_time(value, default=None):
+    """normalize a TIME (timedelta), DATETIME or time column value to a time"""
+    if isinstance(value, timedelta):
+        return (datetime.min + value).time()
+    if isinstance(value, datetime):
+        return value.time()
+    if isinstance(value, time):
+        return value
+    return default
+
+
+def merge_intervals(intervals):
+    """return the sorted union of (start, end) intervals"""
+    merged = []
+    for start, end in sorted(i for i in intervals if i[0] < i[1]):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def intersect_intervals(a, b):
+    """return the intersection of two sorted, non-overlapping interval lists"""
+    result = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        start = max(a[i][0], b[j][0])
+        end = min(a[i][1], b[j][1])
+        if start < end:
+            result.append((start, end))
+        if a[i][1] < b[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def working_intervals(day, schedule_rows, hours_rows):
+    """return the intervals on date day when the worker is scheduled and the
+    business is open
+
+    a weekday without hours_of_operation rows is not restricted by them; a
+    weekday whose rows are all closed has no working time
+    """
+    weekday = day.strftime("%A").lower()
+    scheduled = merge_intervals(
+        (datetime.combine(day, to_time(r['start_time'], time(9, 0))),
+         datetime.combine(day, to_time(r['finish_time'], time(17, 0))))
+        for r in schedule_rows if r['day'] == weekday
+    )
+
+    day_hours = [h for h in hours_rows if h['day'] == weekday]
+    if not day_hours:
+        return scheduled
+    open_hours = merge_intervals(
+        (datetime.combine(day, to_time(h['open_time'])),
+         datetime.combine(day, to_time(h['close_time'])))
+        for h in day_hours
+        if not h['is_closed'] and to_time(h['open_time']) and to_time(h['close_time'])
+    )
+    return intersect_intervals(scheduled, open_hours)
+
+
+def _cell(day_start, moment, round_up):
+    minutes = (moment - day_start).total_seconds() / 60
+    cell = -(-minutes // RESOLUTION_MINUTES) if round_up else minutes // RESOLUTION_MINUTES
+    return min(max(int(cell), 0), CELLS_PER_DAY)
+
+
+def _mask(first, last):
+    """bits first..last-1 set"""
+    return ((1 << (last - first)) - 1) << first if last > first else 0
+
+
+def cells_for(duration):
+    """cells needed to hold duration minutes"""
+    return max(1, -(-duration // RESOLUTION_MINUTES))
+
+
+def build_day(day, schedule_rows, hours_rows, busy):
+    """return the DayAvailability of day
+
+    only cells lying fully inside working time count as working, any cell an
+    appointment touches counts as busy
+    """
+    day_start = datetime.combine(day, time.min)
+    working = 0
+    for start, end in working_intervals(day, schedule_rows, hours_rows):
+        working |= _mask(_cell(day_start, start, True), _cell(day_start, end, False))
+    taken = 0
+    for start, end in busy:
+        taken |= _mask(_cell(day_start, start, False), _cell(day_start, end, True))
+    return DayAvailability(working, working & ~taken)
+
+
+def is_free(avail, at, duration=RESOLUTION_MINUTES):
+    """return True if the worker is free for duration minutes from datetime at"""
+    first = _cell(datetime.combine(at.date(), time.min), at, False)
+    last = first + cells_for(duration)
+    need = _mask(first, last)
+    return last <= CELLS_PER_DAY and avail.free & need == need
+
+
+def day_slots(day, avail, duration):
+    """return start datetimes of free slots of duration on day
+
+    slots are laid on a grid of duration from the start of each run of
+    working cells, a slot is free when all of its cells are free
+    """
+    n = cells_for(duration)
+    day_start = datetime.combine(day, time.min)
+    slots = []
+    pos = 0
+    while pos < CELLS_PER_DAY:
+        if not avail.working >> pos & 1:
+            pos += 1
+            continue
+        run_end = pos
+        while run_end < CELLS_PER_DAY and avail.working >> run_end & 1:
+            run_end += 1
+        while pos + n <= run_end:
+            need = _mask(pos, pos + n)
+            if avail.free & need == need:
+                slots.append(day_start + timedelta(minutes=pos * RESOLUTION_MINUTES))
+            pos += n
+        pos = run_end
+    return slots
+
+
+def date_range(start_date, end_date):
+    return [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+
+
+def load_days(cursor, eids, days):
+    """return {(eid, date): DayAvailability} for every worker and day
+
+    bitmaps come from day_cache; misses are built from one schedule, one
+    hours and one appointments query covering all missing workers and days
+    """
+    result = {}
+    missing = set()
+    for eid in eids:
+        for day in days:
+            avail = day_cache.get((int(eid), day))
+            if avail is None:
+                missing.add((int(eid), day))
+            else:
+                result[(int(eid), day)] = avail
+    if not missing:
+        return result
+
+    missing_eids = sorted({eid for eid, _ in missing})
+    missing_days = sorted({day for _, day in missing})
+    placeholders = ", ".join(["%s"] * len(missing_eids))
+
+    cursor.execute(query_workers_schedule.format(eids=placeholders), missing_eids)
+    schedule_rows = cursor.fetchall()
+    cursor.execute(query_workers_business_hours.format(eids=placeholders), missing_eids)
+    hours_rows = cursor.fetchall()
+    range_start = datetime.combine(missing_days[0], time.min)
+    range_end = datetime.combine(missing_days[-1] + timedelta(days=1), time.min)
+    cursor.execute(query_workers_appointments.format(eids=placeholders),
+                   missing_eids + [range_end, range_start])
+    appointment_rows = cursor.fetchall()
+
+    for eid in missing_eids:
+        worker_schedule = [r for r in schedule_rows if r['eid'] == eid]
+        worker_hours = [h for h in hours_rows if h['eid'] == eid]
+        busy = merge_intervals(
+            (a['start_time'], a['expected_end_time'])
+            for a in appointment_rows if a['eid'] == eid
+        )
+        for day in missing_days:
+            if (eid, day) not in missing:
+                continue
+            avail = build_day(day, worker_schedule, worker_hours, busy)
+            day_cache.set((eid, day), avail)
+            result[(eid, day)] = avail
+    return result
+
+
+def available_workers(cursor, bid, sid=None, at=None):
+    """return approved workers of bid, optionally only those who offer sid
+    and are scheduled and free at datetime at
+
+    the worker list is one query; availability at `at` is a bit test on the
+    day bitmaps of all workers
+    """
+    query = query_business_workers
+    params = [bid]
+
+    if sid:
+        query += filter_offers_service
+        params.append(sid)
+
+    query += group_business_workers
+    cursor.execute(query, params)
+    workers = cursor.fetchall()
+
+    if at is None or not workers:
+        return workers
+
+    days = load_days(cursor, [w['employee_id'] for w in workers], [at.date()])
+    return [w for w in workers if is_free(days[(int(w['employee_id']), at.date())], at)]
+
+
+def worker_slots(cursor, eid, start_date, end_date, duration):
+    """return {date: [slot datetimes]} of eid for the whole range"""
+    dates = date_range(start_date, end_date)
+    days = load_days(cursor, [eid], dates)
+    return {day: day_slots(day, days[(int(eid), day)], duration) for day in dates}
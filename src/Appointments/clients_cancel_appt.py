@@ -1,10 +1,11 @@
 from flask import request, jsonify, Blueprint
 from flask_cors import CORS
 import mysql.connector
-from src.extensions import scheduler
-from src.Appointments.app_func import get_cid_for_aid
+from src.Notifications.outbox import cancel_notification
+from src.Appointments.availability import invalidate_worker_day
 from dotenv import load_dotenv
 import os
+from helper.utils import get_db_connection
 
 load_dotenv()
 
@@ -14,17 +15,6 @@ cancel_appts = Blueprint('cancel_appts', __name__)
 
 
 
-db = mysql.connector.connect(
-    host=os.getenv("DB_HOST"),
-    user=os.getenv("DB_USER"),
-    port=int(os.getenv("DB_PORT")),
-    password=os.getenv("DB_PASSWORD"),
-    database=os.getenv("DB_NAME")
-)
-
-cursor = db.cursor()
-
-
 #clients can cancel appointments
 @cancel_appts.route("/api/user/cancel-appt", methods=["POST"])
 def cancel_appt():
@@ -33,20 +23,32 @@ def cancel_appt():
     if not appointment_id:
         return jsonify({"error": "Appointment ID (aid) is required"}), 400
 
+    db = None
+    cursor = None
     try:
-        cid=get_cid_for_aid(cursor, appointment_id)
+        db = get_db_connection()
+        cursor = db.cursor(buffered=True)
+        cursor.execute("SELECT cid, eid, start_time FROM appointments WHERE aid = %s", (appointment_id,))
+        appt = cursor.fetchone()
+        cid = appt[0] if appt else None
         query = "DELETE FROM appointments WHERE aid = %s"
         cursor.execute(query, (appointment_id,))
+        deleted = cursor.rowcount
+        cancel_notification(cursor, f"Appointment:{appointment_id}:{cid}")
         db.commit()
 
-        if cursor.rowcount == 0:
+        if deleted == 0:
             return jsonify({"message": "No appointment found with that ID."}), 404
-        
-        if scheduler.get_job(f"Appointment:{appointment_id}:{cid}"):
-            scheduler.remove_job(f"Appointment:{appointment_id}:{cid}")
+
+        invalidate_worker_day(appt[1], appt[2])
 
         return jsonify({"message": "Appointment cancelled successfully."}), 200
 
     except mysql.connector.Error as err:
         print(f"MySQL Error: {err}")
-        return jsonify({"error": "Database error occurred."}), 500
\ No newline at end of file
+        return jsonify({"error": "Database error occurred."}), 500
+    finally:
+        if cursor:
+            cursor.close()
+        if db:
+            db.close()
@@ -1,23 +1,32 @@
 from flask import Blueprint, request, jsonify
 from helper.utils import get_db_connection
-from datetime import datetime, timedelta, time
+from datetime import datetime
 import mysql.connector
+from .availability import worker_slots
 
 get_worker_slots = Blueprint("get_worker_slots", __name__, url_prefix="/api")
 
+MAX_RANGE_DAYS = 62
+
 @get_worker_slots.route("/employee/<int:eid>/available-slots", methods=["GET"])
 def get_available_slots(eid):
     """
-    Get available time slots for a worker on a specific date
+    Get available time slots for a worker on a date or a range of dates
     Query params:
-    - date: YYYY-MM-DD (required)
+    - date: YYYY-MM-DD (single day, returns a list of HH:MM)
+    - start_date, end_date: YYYY-MM-DD (inclusive range, returns {date: [HH:MM]})
     - duration: service duration in minutes (required)
     """
     date_str = request.args.get('date')
+    start_date_str = request.args.get('start_date')
+    end_date_str = request.args.get('end_date')
     duration_str = request.args.get('duration')
     
-    if not date_str:
-        return jsonify({"status": "failure", "message": "date parameter required"}), 400
+    single_day = not (start_date_str or end_date_str)
+    if single_day and not date_str:
+        return jsonify({"status": "failure", "message": "date or start_date and end_date parameters required"}), 400
+    if not single_day and not (start_date_str and end_date_str):
+        return jsonify({"status": "failure", "message": "start_date and end_date are both required"}), 400
     
     if not duration_str:
         return jsonify({"status": "failure", "message": "duration parameter required"}), 400
@@ -28,100 +37,40 @@ def get_available_slots(eid):
         service_duration = int(duration_str)
     except ValueError:
         return jsonify({"status": "failure", "message": "duration must be a number"}), 400
+    if service_duration <= 0:
+        return jsonify({"status": "failure", "message": "duration must be positive"}), 400
     
     try:
-        request_date = datetime.strptime(date_str, "%Y-%m-%d")
-        day_of_week = request_date.strftime("%A").lower()  # Short day name like "Mon", "Tue"
+        if single_day:
+            start_date = end_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+        else:
+            start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date()
+            end_date = datetime.strptime(end_date_str, "%Y-%m-%d").date()
     except ValueError:
         return jsonify({"status": "failure", "message": "invalid date format, use YYYY-MM-DD"}), 400
     
+    if end_date < start_date:
+        return jsonify({"status": "failure", "message": "end_date must not be before start_date"}), 400
+    if (end_date - start_date).days >= MAX_RANGE_DAYS:
+        return jsonify({"status": "failure", "message": f"date range limited to {MAX_RANGE_DAYS} days"}), 400
+    
     conn = get_db_connection()
     if conn is None:
         return jsonify({"status": "failure", "message": "db connection error"}), 500
     
     try:
         cursor = conn.cursor(dictionary=True, buffered=True)
-        
-        # Get worker's schedule for the requested day of the week
-        avail_query = """
-            SELECT start_time, finish_time
-            FROM schedule
-            WHERE eid = %s AND day = %s
-        """
-        cursor.execute(avail_query, (eid, day_of_week))
-        availability = cursor.fetchone()
-        
-        if not availability:
-            cursor.close()
-            conn.close()
-            return jsonify([]), 200
-        
-        start_time = availability['start_time']
-        finish_time = availability['finish_time']
-        
-        if isinstance(start_time, timedelta):
-            start_time = (datetime.min + start_time).time()
-        elif isinstance(start_time, datetime):
-            start_time = start_time.time()
-        elif isinstance(start_time, time):
-            pass
-        else:
-            start_time = time(9, 0)
-            
-        if isinstance(finish_time, timedelta):
-            finish_time = (datetime.min + finish_time).time()
-        elif isinstance(finish_time, datetime):
-            finish_time = finish_time.time()
-        elif isinstance(finish_time, time):
-            pass
-        else:
-            finish_time = time(17, 0)
-        
-        appt_query = """
-            SELECT TIME(start_time) as start, TIME(expected_end_time) as end
-            FROM appointments
-            WHERE eid = %s AND DATE(start_time) = %s
-            ORDER BY start_time
-        """
-        cursor.execute(appt_query, (eid, date_str))
-        appointments = cursor.fetchall()
-        
+        slots_by_day = worker_slots(cursor, eid, start_date, end_date, service_duration)
         cursor.close()
         conn.close()
         
-        slots = []
-        current = datetime.combine(request_date, start_time)
-        end = datetime.combine(request_date, finish_time)
-        
-        while current < end:
-            slot_start_time = current.time()
-            slot_end_time = (current + timedelta(minutes=service_duration)).time()
-            
-            if (current + timedelta(minutes=service_duration)) > end:
-                break
-            
-            slot_str = slot_start_time.strftime("%H:%M")
-            
-            is_available = True
-            for appt in appointments:
-                appt_start = appt['start']
-                appt_end = appt['end']
-                
-                if isinstance(appt_start, timedelta):
-                    appt_start = (datetime.min + appt_start).time()
-                if isinstance(appt_end, timedelta):
-                    appt_end = (datetime.min + appt_end).time()
-                
-                if slot_start_time < appt_end and slot_end_time > appt_start:
-                    is_available = False
-                    break
-            
-            if is_available:
-                slots.append(slot_str)
-            
-            current += timedelta(minutes=service_duration)
-        
-        return jsonify(slots), 200
+        formatted = {
+            day.isoformat(): [slot.strftime("%H:%M") for slot in slots]
+            for day, slots in slots_by_day.items()
+        }
+        if single_day:
+            return jsonify(formatted[start_date.isoformat()]), 200
+        return jsonify(formatted), 200
         
     except mysql.connector.Error as err:
         if conn:
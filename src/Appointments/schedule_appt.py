@@ -2,23 +2,25 @@
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
 from flask_mail import Mail, Message
-from src.extensions import scheduler, mail
+from src.extensions import mail
 from src.Notifications.notification_func import *
+from src.Notifications.outbox import enqueue_email, enqueue_notification, send_email, wake_dispatcher
 from helper.utils import *
 from datetime import datetime, timedelta
 from .app_func import  *
+from .availability import invalidate_worker_day
+from src.Revenue.rollups import record_transaction
 
 schedule_appt = Blueprint("schedule_appt", __name__, url_prefix="/api")
 
-def send_reminder(msg : Message, email):
-    from app import app
-    from flask import current_app
-    try:
-        app_context = current_app._get_current_object()
-    except RuntimeError:
-        app_context = app
-    with app_context.app_context():
-        email_message(current_app._get_current_object(),msg,[email])
+def enqueue_reminder(cursor, aid, cid, email, start_time):
+    """queue the reminder sent a day before an appointment, replacing any
+    reminder queued for it before"""
+    run_time = start_time - timedelta(days=1)
+    if datetime.now() >= run_time:
+        run_time = datetime.now() + timedelta(seconds=10)
+    enqueue_notification(cursor, "appointment_reminder", {"aid": aid, "email": email},
+                         run_at=run_time, job_key=f"Appointment:{aid}:{cid}")
 
 # GET services from business
 @schedule_appt.route("/business/<int:bid>/services", methods=["GET"])
@@ -117,6 +119,7 @@ def create_appointment():
         cur.execute(insert_q, (cid, eid, sid, start_str, expected_str))
         conn.commit()
         new_aid = cur.lastrowid
+        invalidate_worker_day(eid, start_dt)
 
         if notes.strip():
             author_uid = current_user.id if hasattr(current_user, "id") else None
@@ -129,29 +132,25 @@ def create_appointment():
             conn.commit()
         
         # Create transaction record for the appointment
-        transaction_query = """
-            INSERT INTO transactions (cid, bid, aid, amount)
-            VALUES (%s, %s, %s, %s)
-        """
-        cur.execute(transaction_query, (cid, business_id, new_aid, service_price))
+        record_transaction(cur, cid, business_id, service_price, aid=new_aid)
         conn.commit()
+
+        # the booking is committed; a reminder that cannot be queued must
+        # not undo it. cid may come from the request body, so the address
+        # is looked up rather than taken from the session
+        try:
+            if check_appointment_subscription(cid):
+                email = get_email_for_cid(cur, cid)
+                if email:
+                    enqueue_reminder(cur, new_aid, cid, email, start_dt)
+                    conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"[WARN] Could not queue reminder for appointment {new_aid}: {e}")
         
         cur.close()
         conn.close()
 
-        if check_appointment_subscription(cid):
-            msg = create_appt_message(new_aid)
-            email = current_user.email
-            run_time = start_dt - timedelta(days=1) 
-            if datetime.now() >= run_time:
-                run_time = datetime.now() + timedelta(seconds=10)
-            scheduler.add_job(
-                func=lambda:send_reminder(msg, email),
-                trigger='date',
-                run_date=run_time,
-                id=f'Appointment:{new_aid}:{cid}'
-            )
-
         return jsonify({"status": "success", "message": "appointment created", "appointment_id": new_aid}), 201
 
     except mysql.connector.Error as err:
@@ -215,30 +214,41 @@ def employee_reschedule():
         row=cursor.fetchone()
         duration=row['duration']
 
-        end_time = start_time + timedelta(duration)
+        end_time = start_time + timedelta(minutes=duration)
 
         start_str=start_time.strftime("%Y-%m-%d %H:%M:%S")
         end_str=end_time.strftime("%Y-%m-%d %H:%M:%S")
 
         cursor.execute("update appointments set start_time=%s, expected_end_time=%s where aid=%s",[start_str, end_str, aid])
 
-        c_name = get_name(appt_details['c_uid'])
-        c_email = get_email(appt_details['c_uid'])
-        e_name = get_name(current_user.id)
-        e_email = get_email(current_user.id)
+        # names and addresses come with the appointment details
+        c_name = (appt_details['customer_first'], appt_details['customer_last'])
+        c_email = appt_details['email']
+        e_name = (appt_details['employee_first'], appt_details['employee_last'])
+        new_time = '{:d}:{:02d}'.format(start_time.hour, start_time.minute)
 
+        # the emails are sent by the outbox once this commits
+        notification_ids = []
         if check_appointment_subscription(appt_details['cid']):
-            message = f"Your appointment with {e_name[0]} {e_name[1]} has been rescheduled to {'{:d}:{:02d}'.format(start_time.hour, start_time.minute)}"
-            msg = Message(subject=f"Hello {c_name[0]} {c_name[1]}", body=message)
-            send_reminder(msg, c_email)
-        
-        message = f"Your appointment with {c_name[0]} {c_name[1]} has been rescheduled to {'{:d}:{:02d}'.format(start_time.hour, start_time.minute)}"
-        msg = Message(subject="Appointment Rescheduled", body=message)
-        send_reminder(msg, e_email)
+            # the reminder moves with the appointment
+            enqueue_reminder(cursor, aid, appt_details['cid'], c_email, start_time)
+            notification_ids.append(enqueue_email(
+                cursor, f"Hello {c_name[0]} {c_name[1]}", [c_email],
+                body=f"Your appointment with {e_name[0]} {e_name[1]} has been rescheduled to {new_time}",
+                requested_by=uid))
+        notification_ids.append(enqueue_email(
+            cursor, "Appointment Rescheduled", [current_user.email],
+            body=f"Your appointment with {c_name[0]} {c_name[1]} has been rescheduled to {new_time}",
+            requested_by=uid))
+        conn.commit()
+        wake_dispatcher()
+        invalidate_worker_day(eid, appt_details['start_time'])
+        invalidate_worker_day(eid, start_time)
 
         return jsonify({
             "status":"success",
-            "message":"Appointment has been rescheduled"
+            "message":"Appointment has been rescheduled",
+            "notification_ids":notification_ids
         }), 200
     except mysql.connector.Error as e:
         conn.rollback()
@@ -284,26 +294,23 @@ def send_appointment_notification(aid):
                 "message": "appointment not assigned to current employee"
             }), 403
         
-        c_name = get_name(appt_details['c_uid'])
-        c_email = get_email(appt_details['c_uid'])
-        e_name = get_name(current_user.id)
+        c_name = (appt_details['customer_first'], appt_details['customer_last'])
+        c_email = appt_details['email']
+        e_name = (appt_details['employee_first'], appt_details['employee_last'])
         
         start_time = appt_details['start_time']
         time_str = '{:d}:{:02d}'.format(start_time.hour, start_time.minute)
         date_str = start_time.strftime("%B %d, %Y")
         
         message = f"Hello {c_name[0]} {c_name[1]},\n\nThis is a notification from {e_name[0]} {e_name[1]} regarding your appointment on {date_str} at {time_str}.\n\nI may be running a few minutes late. Thank you for your patience!\n\nBest regards,\n{e_name[0]} {e_name[1]}"
-        msg = Message(
-            subject=f"Update: Appointment on {date_str}",
-            body=message,
-            recipients=[c_email]
-        )
-        
-        mail.send(msg)
+        # queued, not sent inline; delivery is tracked on the outbox row
+        notification_id = send_email(f"Update: Appointment on {date_str}", [c_email], body=message,
+                                     requested_by=uid)
         
         return jsonify({
             "status": "success",
-            "message": "notification sent successfully"
+            "message": "notification queued",
+            "notification_id": notification_id
         }), 200
         
     except Exception as e:
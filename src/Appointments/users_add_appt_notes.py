@@ -3,6 +3,7 @@ from flask_cors import CORS
 import mysql.connector
 from dotenv import load_dotenv
 import os
+from helper.utils import get_db_connection
 
 load_dotenv()
 
@@ -12,17 +13,6 @@ add_notes = Blueprint('add_note', __name__)
 
 
 
-db = mysql.connector.connect(
-    host=os.getenv("DB_HOST"),
-    user=os.getenv("DB_USER"),
-    port=int(os.getenv("DB_PORT")),
-    password=os.getenv("DB_PASSWORD"),
-    database=os.getenv("DB_NAME")
-)
-
-cursor = db.cursor()
-
-
 #notes can be added to appointments
 @add_notes.route("/api/user/add-notes", methods=["POST"])
 def appt_notes():
@@ -32,7 +22,11 @@ def appt_notes():
     if not appointment_id or not notes:
         return jsonify({"error": "Both 'aid' and 'notes' are required"}), 400
 
+    db = None
+    cursor = None
     try:
+        db = get_db_connection()
+        cursor = db.cursor()
         query = """
             UPDATE appointments
             SET notes = %s
@@ -48,4 +42,9 @@ def appt_notes():
 
     except mysql.connector.Error as err:
         print(f"MySQL Error: {err}")
-        return jsonify({"error": "Database error occurred."}), 500
\ No newline at end of file
+        return jsonify({"error": "Database error occurred."}), 500
+    finally:
+        if cursor:
+            cursor.close()
+        if db:
+            db.close()
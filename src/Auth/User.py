@@ -1,11 +1,21 @@
 # src/Auth/User.py
+import os
 from flask_login import LoginManager, UserMixin
 from .auth_func import get_db_connection
 from .queries import query_user_info
 from mysql.connector import Error
+from helper.cache import TTLCache
 
 login_manager = LoginManager()
 
+# user_info rows by uid, so session resolution does not hit MySQL on every request.
+# invalidate_user only clears this process's cache, so the ttl bounds how long
+# other workers keep serving a user who was rejected, deleted or changed
+user_cache = TTLCache(
+    maxsize=int(os.getenv("USER_CACHE_SIZE", "2048")),
+    ttl=float(os.getenv("USER_CACHE_TTL", "30")),
+)
+
 class User(UserMixin):
     def __init__(self, id: str, email: str, firstName: str, lastName: str, role: str):
         self.id = str(id)
@@ -18,8 +28,35 @@ class User(UserMixin):
         return self.id
 
 
+def invalidate_user(uid) -> None:
+    """drop cached session info after the user's name, role or approval changes"""
+    if uid is not None:
+        user_cache.invalidate(str(uid))
+
+
 @login_manager.user_loader
 def load_user(uid: str):
+    user_info = user_cache.get(str(uid))
+    if user_info is None:
+        user_info = query_user(uid)
+        if user_info:
+            user_cache.set(str(uid), user_info)
+
+    if not user_info:
+        return None
+
+    return User(
+        id=user_info["uid"],
+        email=user_info["email"],
+        firstName=user_info["first_name"],
+        lastName=user_info["last_name"],
+        role=user_info.get("role") or user_info.get("name", "customer")
+    )
+
+
+def query_user(uid: str):
+    conn = None
+    cursor = None
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
@@ -39,16 +76,7 @@ def load_user(uid: str):
         except Exception:
             pass
 
-    if not user_info:
-        return None
-
-    return User(
-        id=user_info["uid"],
-        email=user_info["email"],
-        firstName=user_info["first_name"],
-        lastName=user_info["last_name"],
-        role=user_info.get("role") or user_info.get("name", "customer")
-    )
+    return user_info
 
 
 @login_manager.unauthorized_handler
@@ -2,6 +2,7 @@ import os
 from dotenv import load_dotenv
 import mysql.connector
 from mysql.connector import Error
+from helper.utils import get_db_connection
 from .queries import query_user_info, update_password
 import hashlib
 import secrets
@@ -10,21 +11,6 @@ from flask import jsonify
 
 load_dotenv()
 
-def get_db_connection():
-    """create database connection"""
-    try:
-        connection = mysql.connector.connect(
-            host=os.getenv('DB_HOST'),
-            user=os.getenv('DB_USER'),
-            port=int(os.getenv("DB_PORT")),
-            password=os.getenv('DB_PASSWORD'),
-            database=os.getenv('DB_NAME')
-        )
-        return connection
-    except Error as e:
-        print(f"Error connecting to MySQL: {e}")
-        return None
-    
 def valid_email(email):
     """Verify email has valid format"""
     pattern = r'^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$'
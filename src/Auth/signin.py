@@ -136,7 +136,8 @@ def reset_password_email():
     return jsonify({
         "status":"success",
         "message":"password reset link sent",
-        "recipient":email
+        "recipient":email,
+        "notification_id":email_sent
     }), 200
 
 @signin.route('/password-reset', methods=['POST'])
@@ -7,26 +7,17 @@ import os
 from flask_login import current_user, login_required
 from datetime import datetime
 
-from src.LoyaltyProgram.loyalty_service import award_points_for_visit
+from helper.utils import get_db_connection
+from helper.blobstore import image_url
+from helper.image_variants import AVATAR_SIZE, variant_for
+from helper.fields import select_fields
 
 load_dotenv()
 
 client_browse = Blueprint('clients_browse', __name__)
 
 def get_db():
-
-    try:
-        db = mysql.connector.connect(
-            host=os.getenv("DB_HOST"),
-            user=os.getenv("DB_USER"),
-            port=int(os.getenv("DB_PORT")),
-            password=os.getenv("DB_PASSWORD"),
-            database=os.getenv("DB_NAME")
-            )
-        return db
-    except mysql.connector.Error as err:
-        print(f"Error: Database could not connect. : {err}")
-        return None
+    return get_db_connection()
 
 #clients can browse salons
 @client_browse.route("/api/client/browse-salons", methods=["GET"])
@@ -120,23 +111,42 @@ def browse_workers():
             db.close()
 
 
+# response field -> SQL selecting it; ?fields= picks which are queried
+WORKER_FIELDS = {
+    "employee_id": "e.eid AS employee_id",
+    "first_name": "u.first_name",
+    "last_name": "u.last_name",
+    "expertise": """(SELECT GROUP_CONCAT(DISTINCT s.name ORDER BY s.name SEPARATOR ', ')
+                     FROM employee_services es JOIN services s ON es.sid = s.sid
+                     WHERE es.eid = e.eid) AS expertise""",
+    "bio": "e.bio",
+    "profile_picture": "e.profile_picture, v.variant_key AS profile_picture_variant",
+    "approved": "e.approved",
+}
+
+
 @client_browse.route("/api/client/business-workers/<int:business_id>", methods=["GET"])
 @login_required
 def get_business_workers(business_id: int):
-    query = """
-        SELECT e.eid,
-               u.first_name,
-               u.last_name,
-               GROUP_CONCAT(DISTINCT s.name ORDER BY s.name SEPARATOR ', ') AS expertise,
-               e.bio,
-               e.profile_picture,
-               e.approved
+    try:
+        fields = select_fields(request.args, WORKER_FIELDS, images=["profile_picture"])
+    except ValueError as e:
+        return jsonify({
+            "status": "failure",
+            "message": str(e)
+        }), 400
+
+    params = [business_id]
+    variant_join = ""
+    if "profile_picture" in fields:
+        variant_join = "LEFT JOIN image_variants v ON v.blob_key = e.profile_picture AND v.variant = %s"
+        params.insert(0, variant_for(request.args.get("image_size", AVATAR_SIZE, type=int)))
+    query = f"""
+        SELECT {", ".join(WORKER_FIELDS[field] for field in fields)}
         FROM employee e
         JOIN users u ON e.uid = u.uid
-        LEFT JOIN employee_services es ON e.eid = es.eid
-        LEFT JOIN services s ON es.sid = s.sid
+        {variant_join}
         WHERE e.bid = %s
-        GROUP BY e.eid, u.first_name, u.last_name, e.bio, e.profile_picture, e.approved
         ORDER BY u.first_name, u.last_name
     """
 
@@ -151,31 +161,14 @@ def get_business_workers(business_id: int):
             }), 500
 
         cursor = db.cursor(dictionary=True)
-        cursor.execute(query, (business_id,))
-        rows = cursor.fetchall()
-
-        workers = []
-        for row in rows:
-            picture = row.get("profile_picture")
-            if picture:
-                if isinstance(picture, bytes):
-                    picture = picture.decode("utf-8")
-                if not str(picture).startswith("data:image"):
-                    row["profile_picture"] = f"data:image/jpeg;base64,{picture}"
-                else:
-                    row["profile_picture"] = picture
-            else:
-                row["profile_picture"] = None
+        cursor.execute(query, params)
+        workers = cursor.fetchall()
 
-            workers.append({
-                "employee_id": row["eid"],
-                "first_name": row["first_name"],
-                "last_name": row["last_name"],
-                "expertise": row.get("expertise"),
-                "bio": row.get("bio"),
-                "profile_picture": row.get("profile_picture"),
-                "approved": bool(row.get("approved")),
-            })
+        for worker in workers:
+            if "profile_picture" in worker:
+                worker["profile_picture"] = image_url(worker.pop("profile_picture_variant") or worker["profile_picture"])
+            if "approved" in worker:
+                worker["approved"] = bool(worker["approved"])
 
         return jsonify(workers), 200
     except Error as e:
@@ -247,23 +240,6 @@ def client_view_appoints():
         cursor.execute(query, (cid,))
         rows = cursor.fetchall()
 
-        for row in rows:
-            business_id = row.get('business_id')
-            if business_id is None:
-                continue
-            try:
-                award_points_for_visit(
-                    db,
-                    aid=row.get('appointment_id'),
-                    cid=cid,
-                    bid=business_id,
-                    amount=row.get('service_price'),
-                )
-            except mysql.connector.Error as err:
-                print(f"[WARN] Failed to award loyalty points for appointment {row.get('appointment_id')}: {err}")
-            except Exception as err:
-                print(f"[WARN] Unexpected error awarding loyalty points: {err}")
-
         formatted_appointments = []
         for row in rows:
             start_time = row.get('start_time')
@@ -4,6 +4,12 @@ import mysql.connector
 from dotenv import load_dotenv
 import os
 from flask_login import current_user, login_required
+from helper.utils import get_db_connection
+from helper.blobstore import image_url
+from helper.image_variants import CARD_SIZE, variant_for
+from helper.fields import select_fields
+from src.Revenue.rollups import record_transactions
+from src.Clients.stock import decrement_stock, short_stock
 
 
 load_dotenv()
@@ -15,19 +21,7 @@ manage_cart = Blueprint('manage_cart', __name__)
 
 
 def get_db():
-
-    try:
-        db = mysql.connector.connect(
-            host=os.getenv("DB_HOST"),
-            user=os.getenv("DB_USER"),
-            port=int(os.getenv("DB_PORT")),
-            password=os.getenv("DB_PASSWORD"),
-            database=os.getenv("DB_NAME")
-            )
-        return db
-    except mysql.connector.Error as err:
-        print(f"Error: Database could not connect. : {err}")
-        return None
+    return get_db_connection()
 
 #get current logged-in client's customer id
 def get_cid():
@@ -104,7 +98,7 @@ def view_cart():
                 "total": float(total),
                 "business_name": business_name,
                 "bid": bid,
-                "image": image.decode('utf-8') if image else None
+                "image": image_url(image)
             })
         return jsonify({"cart_items": cart_items}), 200
     except mysql.connector.Error as err:
@@ -242,29 +236,23 @@ def checkout():
         if not cart_items:
             return jsonify({"message": "Cart is empty."}), 400
         
-        for item in cart_items:
-            update_stock_query = """
-            UPDATE products 
-            SET stock = stock - %s 
-            WHERE pid = %s
-            """
-            cursor.execute(update_stock_query, (item['amount'], item['pid']))
-            
-            transaction_amount = float(item['price']) * item['amount']
-            insert_transaction_query = """
-            INSERT INTO transactions (cid, bid, pid, amount)
-            VALUES (%s, %s, %s, %s)
-            """
-            cursor.execute(insert_transaction_query, (
-                customer_id,
-                item['bid'],
-                item['pid'],
-                transaction_amount
-            ))
+        record_transactions(cursor, [
+            (customer_id, item['bid'], float(item['price']) * item['amount'], None, item['pid'], None)
+            for item in cart_items
+        ])
         
         delete_query = "DELETE FROM cart WHERE cid = %s"
         cursor.execute(delete_query, (customer_id,))
         
+        # last write before commit, so product rows stay locked briefly
+        lines = [(item['pid'], item['amount']) for item in cart_items]
+        if not decrement_stock(cursor, lines):
+            db.rollback()
+            return jsonify({
+                "message": "Not enough stock to complete purchase.",
+                "items": short_stock(cursor, lines)
+            }), 400
+        
         db.commit()
         
         return jsonify({
@@ -283,8 +271,37 @@ def checkout():
         if db:
             db.close()
 
+# response field -> SQL selecting it; ?fields= picks which are queried
+PRODUCT_FIELDS = {
+    "pid": "p.pid",
+    "product_name": "p.name AS product_name",
+    "description": "p.description",
+    "price": "p.price",
+    "stock": "p.stock",
+    "image": "p.image, v.variant_key AS image_variant",
+}
+
+
 @manage_cart.route("/api/client/business-products/<int:business_id>", methods=["GET"])
 def get_business_products(business_id):
+    try:
+        fields = select_fields(request.args, PRODUCT_FIELDS, images=["image"])
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    params = [business_id]
+    variant_join = ""
+    if "image" in fields:
+        variant_join = "LEFT JOIN image_variants v ON v.blob_key = p.image AND v.variant = %s"
+        params.insert(0, variant_for(request.args.get("image_size", CARD_SIZE, type=int)))
+    products_query = f"""
+    SELECT {", ".join(PRODUCT_FIELDS[field] for field in fields)}
+    FROM products p
+    {variant_join}
+    WHERE p.bid = %s
+    ORDER BY p.name
+    """
+
     db = None
     cursor = None
     
@@ -294,21 +311,14 @@ def get_business_products(business_id):
             return jsonify({"message": "Could not connect to database."}), 500
         
         cursor = db.cursor(dictionary=True, buffered=True)
-        
-        products_query = """
-        SELECT pid, name as product_name, description, price, stock, image
-        FROM products
-        WHERE bid = %s
-        ORDER BY name
-        """
-        cursor.execute(products_query, (business_id,))
+        cursor.execute(products_query, params)
         products = cursor.fetchall()
         
         for product in products:
-            if product['price'] is not None:
+            if product.get('price') is not None:
                 product['price'] = float(product['price'])
-            if product['image'] is not None:
-                product['image'] = product['image'].decode('utf-8')
+            if 'image' in product:
+                product['image'] = image_url(product.pop('image_variant') or product['image'])
         
         return jsonify(products), 200
         
@@ -3,6 +3,7 @@ from flask_cors import CORS
 import mysql.connector
 from dotenv import load_dotenv
 import os
+from helper.utils import get_db_connection
 
 load_dotenv()
 
@@ -12,19 +13,7 @@ review_workers = Blueprint('review_workers', __name__)
 
 
 def get_db():
-
-    try:
-        db = mysql.connector.connect(
-            host=os.getenv("DB_HOST"),
-            user=os.getenv("DB_USER"),
-            port=int(os.getenv("DB_PORT")),
-            password=os.getenv("DB_PASSWORD"),
-            database=os.getenv("DB_NAME")
-            )
-        return db
-    except mysql.connector.Error as err:
-        print(f"Error: Database could not connect. : {err}")
-        return None
+    return get_db_connection()
 
 
 
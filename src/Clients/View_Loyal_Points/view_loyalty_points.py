@@ -4,6 +4,7 @@ from dotenv import load_dotenv
 import os
 from flask_login import current_user, login_required
 from typing import Optional
+from helper.utils import get_db_connection
 
 
 load_dotenv()
@@ -15,19 +16,7 @@ view_lpoints = Blueprint('view_lpoints', __name__)
 
 
 def get_db():
-
-    try:
-        db = mysql.connector.connect(
-            host=os.getenv("DB_HOST"),
-            user=os.getenv("DB_USER"),
-            port=int(os.getenv("DB_PORT")),
-            password=os.getenv("DB_PASSWORD"),
-            database=os.getenv("DB_NAME")
-            )
-        return db
-    except mysql.connector.Error as err:
-        print(f"Error: Database could not connect. : {err}")
-        return None
+    return get_db_connection()
 
 #get current logged-in client's customer id
 def get_cid():
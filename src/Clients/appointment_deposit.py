@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from flask_login import current_user, login_required
 from mysql.connector import Error
 from helper.utils import *
+from src.Revenue.rollups import record_transaction
 
 deposit = Blueprint("deposit", __name__, url_prefix="/deposit")
 
@@ -56,13 +57,7 @@ def appointment_deposit():
         price = float(result.get('price') or 0)
         bid = result.get('bid')
         deposit_amount = round(price * deposit_rate, 2)
-        insert_transaction_deposit = """
-            insert into transactions (cid, bid, aid, amount, payment_method_id)
-            values (%s, %s, %s, %s, %s);
-        """
-        param = [cid, bid, aid, deposit_amount, payment_id]
-        cursor.execute(insert_transaction_deposit, param)
-        trans_id = cursor.lastrowid
+        trans_id = record_transaction(cursor, cid, bid, deposit_amount, aid=aid, payment_method_id=payment_id)
         conn.commit()
         return jsonify({
             "status":"success",
@@ -9,7 +9,7 @@ from flask_login import current_user, login_required
 import mysql.connector
 from dotenv import load_dotenv
 
-from helper.utils import check_role
+from helper.utils import check_role, get_db_connection
 
 load_dotenv()
 
@@ -17,19 +17,9 @@ get_appointment = Blueprint("get_appointment", __name__)
 
 
 def get_db() -> mysql.connector.MySQLConnection | None:
-    """Create a new database connection using environment credentials."""
+    """Borrow a database connection from the shared pool."""
 
-    try:
-        return mysql.connector.connect(
-            host=os.getenv("DB_HOST"),
-            user=os.getenv("DB_USER"),
-            port=int(os.getenv("DB_PORT")),
-            password=os.getenv("DB_PASSWORD"),
-            database=os.getenv("DB_NAME"),
-        )
-    except mysql.connector.Error as err:
-        print(f"Error: Database could not connect. : {err}")
-        return None
+    return get_db_connection()
 
 
 @get_appointment.route("/api/clients/appointment/<int:aid>", methods=["GET"])
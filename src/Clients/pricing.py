@@ -0,0 +1,372 @@
+import os
+from itertools import count
+from bisect import bisect_right
+from datetime import date, datetime
+from decimal import Decimal, ROUND_HALF_UP
+from helper.cache import TTLCache
+from src.Appointments.availability import to_time
+
+TAX_RATE = Decimal("0.06125")
+CENTS = Decimal("0.01")
+ZERO = Decimal("0")
+
+# a business without a loyalty_points row has no promotions or rewards
+query_points_value = "SELECT pts_value FROM loyalty_points WHERE bid = %s LIMIT 1"
+
+# promotions that have not ended yet; start dates and recurrence are checked
+# in process on every pricing
+query_business_promotions = """
+    SELECT p.promo_id, p.lprog_id, p.title, p.description, p.start_date, p.end_date,
+           p.is_recurring, p.recurr_days, p.start_time, p.end_time,
+           r.is_appt, r.is_product, r.is_price, r.is_points, r.is_discount, r.rwd_value
+    FROM promotions p
+    JOIN loyalty_programs lp ON lp.lprog_id = p.lprog_id
+    JOIN rewards r ON r.lprog_id = p.lprog_id
+    WHERE lp.bid = %s AND p.end_date >= CURDATE()
+    ORDER BY p.promo_id, r.rwd_id
+"""
+
+query_business_programs = """
+    SELECT lp.lprog_id, lp.description, lp.threshold,
+           lp.appts_thresh, lp.pdct_thresh, lp.price_thresh, lp.points_thresh,
+           r.rwd_id, r.is_appt, r.is_product, r.is_price, r.is_points, r.is_discount, r.rwd_value
+    FROM loyalty_programs lp
+    JOIN rewards r ON r.lprog_id = lp.lprog_id
+    WHERE lp.bid = %s
+    ORDER BY lp.lprog_id, r.rwd_id
+"""
+
+query_customer_progress = """
+    SELECT pts_balance, appt_complete, prod_purchased, amount_spent
+    FROM customer_loyalty_points
+    WHERE cid = %s AND bid = %s
+"""
+
+# recurr_days holds MySQL DAYOFWEEK numbers (1 = Sunday); day names are
+# accepted too since owners have entered them
+DAY_NUMBERS = {
+    "sunday": 1, "monday": 2, "tuesday": 3, "wednesday": 4,
+    "thursday": 5, "friday": 6, "saturday": 7,
+}
+
+# progress counter each program type is measured against
+TRIGGERS = (
+    ("appts_thresh", "appts"),
+    ("pdct_thresh", "products"),
+    ("price_thresh", "price"),
+    ("points_thresh", "points"),
+)
+
+
+def to_decimal(value):
+    if value is None:
+        return ZERO
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
+
+def _percentage_multiplier(raw):
+    """Interpret a stored percentage that may be persisted as either 0-1 or 0-100."""
+    if raw is None or raw <= ZERO:
+        return ZERO
+    if raw <= Decimal("1"):
+        return raw
+    return raw / Decimal("100")
+
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        return datetime.strptime(value[:10], "%Y-%m-%d").date()
+    return None
+
+
+def parse_days(recurr_days):
+    """return the DAYOFWEEK numbers in a recurr_days value"""
+    days = set()
+    for token in str(recurr_days or "").split(","):
+        token = token.strip().lower()
+        if token.isdigit():
+            days.add(int(token))
+        elif token in DAY_NUMBERS:
+            days.add(DAY_NUMBERS[token])
+    return frozenset(days)
+
+
+def day_of_week(day):
+    """MySQL DAYOFWEEK of a date: 1 = Sunday ... 7 = Saturday"""
+    return day.isoweekday() % 7 + 1
+
+
+class Reward:
+    __slots__ = ("is_appt", "is_product", "is_price", "is_points", "is_discount", "value")
+
+    def __init__(self, row):
+        self.is_appt = bool(row["is_appt"])
+        self.is_product = bool(row["is_product"])
+        self.is_price = bool(row["is_price"])
+        self.is_points = bool(row["is_points"])
+        self.is_discount = bool(row["is_discount"])
+        self.value = to_decimal(row["rwd_value"])
+
+
+class Promotion:
+    __slots__ = ("promo_id", "lprog_id", "title", "description", "start_date", "end_date",
+                 "is_recurring", "days", "start_time", "end_time", "reward")
+
+    def __init__(self, row):
+        self.promo_id = row["promo_id"]
+        self.lprog_id = row["lprog_id"]
+        self.title = row["title"]
+        self.description = row["description"]
+        self.start_date = _to_date(row["start_date"])
+        self.end_date = _to_date(row["end_date"])
+        self.is_recurring = bool(row["is_recurring"])
+        self.days = parse_days(row["recurr_days"])
+        self.start_time = to_time(row["start_time"])
+        self.end_time = to_time(row["end_time"])
+        self.reward = Reward(row)
+
+    def is_active(self, now):
+        today = now.date()
+        if self.end_date is None or self.end_date < today:
+            return False
+        if not self.is_recurring:
+            return True
+        if day_of_week(today) not in self.days:
+            return False
+        if self.start_time is None or self.end_time is None:
+            return False
+        return self.start_time <= now.time() <= self.end_time
+
+
+class ThresholdProgram:
+    """one reward of a loyalty program with the counters that unlock it
+
+    triggers: (counter, units per completion) for every program type set
+    """
+
+    __slots__ = ("lprog_id", "rwd_id", "description", "triggers", "reward")
+
+    def __init__(self, row):
+        self.lprog_id = row["lprog_id"]
+        self.rwd_id = row["rwd_id"]
+        self.description = row["description"]
+        self.reward = Reward(row)
+        threshold = to_decimal(row["threshold"])
+        triggers = []
+        for column, trigger in TRIGGERS:
+            if not row[column]:
+                continue
+            if threshold > ZERO:
+                triggers.append((trigger, threshold))
+            elif trigger in ("appts", "products"):
+                # an unset count threshold rewards every visit or item
+                triggers.append((trigger, Decimal("1")))
+        self.triggers = tuple(triggers)
+
+
+_rule_versions = count(1)
+
+
+class BusinessRules:
+    """promotions and threshold rewards of one business, compiled for pricing
+
+    promotions are kept sorted by start date so the ones already started are
+    a prefix found by bisection. version differs between every two rule sets
+    compiled by this process
+    """
+
+    def __init__(self, pts_value=None, promotions=(), programs=()):
+        self.version = next(_rule_versions)
+        self.pts_value = pts_value
+        self.promotions = sorted(promotions, key=lambda p: (p.start_date or date.min, p.promo_id))
+        self._starts = [p.start_date or date.min for p in self.promotions]
+        self.programs = tuple(programs)
+
+    def active_promotions(self, now):
+        started = self.promotions[:bisect_right(self._starts, now.date())]
+        active = [p for p in started if p.is_active(now)]
+        active.sort(key=lambda p: p.promo_id)
+        return active
+
+
+EMPTY_RULES = BusinessRules()
+
+# bid -> BusinessRules. Invalidated by the promotion and loyalty program
+# writers; the ttl bounds how long writes made by another process go unseen
+rules_cache = TTLCache(
+    maxsize=int(os.getenv("PRICING_RULES_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("PRICING_RULES_CACHE_TTL", "300")),
+)
+
+
+def load_rules(cursor, bid):
+    """read and compile the pricing rules of bid"""
+    cursor.execute(query_points_value, (bid,))
+    row = cursor.fetchone()
+    if not row:
+        return EMPTY_RULES
+    pts_value = to_decimal(row["pts_value"] if isinstance(row, dict) else row[0])
+
+    cursor.execute(query_business_promotions, (bid,))
+    promotions = [Promotion(r) for r in cursor.fetchall()]
+    cursor.execute(query_business_programs, (bid,))
+    programs = [ThresholdProgram(r) for r in cursor.fetchall()]
+    return BusinessRules(pts_value, promotions, programs)
+
+
+def get_rules(cursor, bid):
+    """return the compiled pricing rules of bid, cursor must return dicts"""
+    if bid is None:
+        return EMPTY_RULES
+    rules = rules_cache.get(int(bid))
+    if rules is None:
+        rules = load_rules(cursor, bid)
+        rules_cache.set(int(bid), rules)
+    return rules
+
+
+def invalidate_rules(bid):
+    """drop the cached rules of bid after its promotions or programs change"""
+    if bid is not None:
+        rules_cache.invalidate(int(bid))
+
+
+def load_progress(cursor, cid, bid):
+    """return the loyalty counters of cid at bid, zero when it has none"""
+    cursor.execute(query_customer_progress, (cid, bid))
+    row = cursor.fetchone() or {}
+    return {
+        "points": to_decimal(row.get("pts_balance")),
+        "appts": to_decimal(row.get("appt_complete")),
+        "products": to_decimal(row.get("prod_purchased")),
+        "price": to_decimal(row.get("amount_spent")),
+    }
+
+
+class Pricing:
+    """the priced order: discounts, tax, total and loyalty side effects
+
+    consumed: progress counter -> amount used up by the rewards applied
+    """
+
+    def __init__(self):
+        self.subtotal = ZERO
+        self.tax = ZERO
+        self.promo_discount = ZERO
+        self.loyalty_discount = ZERO
+        self.manual_discount = ZERO
+        self.total_discount = ZERO
+        self.total = ZERO
+        self.points_bonus = ZERO
+        self.promotions = []
+        self.programs = []
+        self.promo_lprog = None
+        self.reward_lprog = None
+        self.consumed = {}
+
+    @property
+    def combined_loyalty_discount(self):
+        return (self.loyalty_discount + self.manual_discount).quantize(CENTS)
+
+
+def _applicable(reward, pts_value, is_product_purchase, subtotal, unit_price):
+    """return [(reward_type, discount, shown reward)] of every part of reward
+    that applies to this order"""
+    applied = []
+    if reward.is_appt and not is_product_purchase:
+        applied.append(("appointment", (reward.value * unit_price).quantize(CENTS), reward.value))
+    if reward.is_product and is_product_purchase:
+        applied.append(("product", (reward.value * unit_price).quantize(CENTS), reward.value))
+    if reward.is_price:
+        applied.append(("price", reward.value.quantize(CENTS), reward.value))
+    if reward.is_points:
+        applied.append(("points", (reward.value * (pts_value or ZERO)).quantize(CENTS), reward.value))
+    if reward.is_discount:
+        percent = _percentage_multiplier(reward.value)
+        applied.append(("discount", (percent * subtotal).quantize(CENTS), (percent * Decimal("100")).quantize(CENTS)))
+    return applied
+
+
+def price_order(rules, progress, *, subtotal, unit_price, is_product_purchase,
+                items=0, manual_discount=ZERO, redeeming=False, now=None):
+    """price an order against rules without touching the database
+
+    subtotal: amount owed before discounts and tax
+    unit_price: price a per-visit or per-product reward is taken off
+    items: products bought, counted towards product thresholds
+    progress: the customer's counters before this order, see load_progress
+    redeeming: points are redeemed with this order, so rewards triggered by
+    the points balance do not also award bonus points
+    """
+    now = now or datetime.now()
+    subtotal = to_decimal(subtotal)
+    unit_price = to_decimal(unit_price)
+    result = Pricing()
+    result.subtotal = subtotal
+    result.manual_discount = to_decimal(manual_discount)
+
+    for promo in rules.active_promotions(now):
+        applied = _applicable(promo.reward, rules.pts_value, is_product_purchase, subtotal, unit_price)
+        for reward_type, discount, shown in applied:
+            result.promo_discount += discount
+            result.promo_lprog = promo.lprog_id
+            result.promotions.append({
+                "promo_id": promo.promo_id,
+                "title": promo.title,
+                "description": promo.description,
+                "reward_type": reward_type,
+                "threshold": 0,
+                "reward": float(shown),
+                "rwd_value": float(discount),
+            })
+
+    increments = {
+        "appts": ZERO if is_product_purchase else Decimal("1"),
+        "products": to_decimal(items) if is_product_purchase else ZERO,
+        "price": subtotal,
+        "points": ZERO,
+    }
+    for program in rules.programs:
+        reward = program.reward
+        for trigger, required in program.triggers:
+            completions = int((progress[trigger] + increments[trigger]) // required)
+            if completions <= 0:
+                continue
+            if reward.is_points:
+                if redeeming and trigger == "points":
+                    # the redemption already spends the points balance
+                    continue
+                bonus = (reward.value * completions).quantize(Decimal("1"), rounding=ROUND_HALF_UP)
+                result.points_bonus += bonus
+                reward_type, discount, shown = "points", ZERO, bonus
+            else:
+                # a threshold reward gives its first applicable part only
+                applied = _applicable(reward, rules.pts_value, is_product_purchase, subtotal, unit_price)
+                if not applied:
+                    continue
+                reward_type, discount, shown = applied[0]
+                discount, shown = discount * completions, shown * completions
+                result.loyalty_discount += discount
+            result.reward_lprog = program.lprog_id
+            result.consumed[trigger] = result.consumed.get(trigger, ZERO) + required * completions
+            result.programs.append({
+                "rwd_id": program.rwd_id,
+                "description": program.description,
+                "threshold": float(required),
+                "reward_type": reward_type,
+                "reward": float(shown),
+                "rwd_value": float(discount),
+            })
+
+    result.tax = (subtotal * TAX_RATE).quantize(CENTS)
+    result.total_discount = (result.promo_discount + result.combined_loyalty_discount).quantize(CENTS)
+    result.total = (subtotal + result.tax - result.total_discount).quantize(CENTS)
+    if result.total < ZERO:
+        result.total = Decimal("0.00")
+    return result
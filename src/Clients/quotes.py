@@ -0,0 +1,229 @@
+import hashlib
+import os
+import secrets
+from datetime import datetime, timedelta
+from decimal import Decimal
+from helper.cache import TTLCache
+from src.Clients.pricing import get_rules, load_progress, price_order, to_decimal
+from src.LoyaltyProgram.loyalty_service import points_discount
+
+# seconds a preview's quote can be checked out against
+QUOTE_TTL = float(os.getenv("QUOTE_TTL_SECONDS", "120"))
+
+# quote_id -> Quote, priced by this process. Every quote also has a
+# checkout_quotes row, so a checkout served by another process re-prices the
+# order and accepts it while its version and total match the row
+quote_cache = TTLCache(
+    maxsize=int(os.getenv("QUOTE_CACHE_SIZE", "10000")),
+    ttl=QUOTE_TTL,
+)
+
+query_cart_lines = """
+    SELECT c.pid, c.amount, p.price
+    FROM cart c
+    JOIN products p ON p.pid = c.pid
+    WHERE c.cid = %s AND c.bid = %s
+    ORDER BY p.price ASC, c.pid
+"""
+
+query_appointment = """
+    SELECT a.aid, a.bid, s.price
+    FROM appointments a
+    JOIN services s ON s.sid = a.sid
+    WHERE a.cid = %s AND a.aid = %s
+"""
+
+query_latest_appointment = """
+    SELECT a.aid, a.bid, s.price
+    FROM appointments a
+    JOIN services s ON s.sid = a.sid
+    WHERE a.cid = %s AND a.bid = %s
+    ORDER BY a.created_at DESC LIMIT 1
+"""
+
+insert_quote = """
+    INSERT INTO checkout_quotes (quote_id, cid, bid, aid, is_product_purchase, points, version, total, expires_at)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+query_quote = """
+    SELECT quote_id, cid, bid, aid, is_product_purchase, points, version, total
+    FROM checkout_quotes
+    WHERE quote_id = %s AND cid = %s AND expires_at > %s
+"""
+
+delete_quote = "DELETE FROM checkout_quotes WHERE quote_id = %s"
+
+# expired rows removed per saved quote, so the table stays small
+delete_expired_quotes = "DELETE FROM checkout_quotes WHERE expires_at < %s LIMIT 100"
+
+query_paid_amount = """
+    SELECT COALESCE(SUM(amount), 0) AS paid_amount
+    FROM transactions
+    WHERE aid = %s AND payment_method_id IS NOT NULL
+"""
+
+
+class QuoteError(ValueError):
+    """an order that cannot be quoted or checked out; status is the HTTP
+    status to answer with"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class Order:
+    """what is being paid for: the cart of one business or one appointment
+
+    lines: cart rows (pid, amount, price), cheapest first, empty for an
+    appointment
+    subtotal: amount owed before discounts and tax
+    unit_price: price a per-visit or per-product reward is taken off
+    """
+
+    __slots__ = ("bid", "aid", "is_product_purchase", "lines", "subtotal", "unit_price", "items")
+
+    def __init__(self, bid, aid, is_product_purchase, lines, subtotal, unit_price, items):
+        self.bid = bid
+        self.aid = aid
+        self.is_product_purchase = is_product_purchase
+        self.lines = lines
+        self.subtotal = subtotal
+        self.unit_price = unit_price
+        self.items = items
+
+
+def load_order(cursor, cid, bid, is_product_purchase, aid=None):
+    """read the order cid is about to pay for, cursor must return dicts"""
+    if is_product_purchase:
+        if not bid:
+            raise QuoteError("Missing business id")
+        cursor.execute(query_cart_lines, (cid, bid))
+        lines = cursor.fetchall()
+        if not lines:
+            raise QuoteError("Cart is empty")
+        subtotal = sum(to_decimal(line["amount"]) * to_decimal(line["price"]) for line in lines)
+        items = sum(max(int(line["amount"] or 0), 0) for line in lines)
+        return Order(bid, None, True, lines, subtotal, to_decimal(lines[0]["price"]), items)
+
+    if aid:
+        cursor.execute(query_appointment, (cid, aid))
+    else:
+        if not bid:
+            raise QuoteError("Missing business id")
+        cursor.execute(query_latest_appointment, (cid, bid))
+    appt = cursor.fetchone()
+    if not appt:
+        raise QuoteError("No appointment found")
+
+    cursor.execute(query_paid_amount, (appt["aid"],))
+    paid_row = cursor.fetchone() or {}
+    owed = to_decimal(appt["price"]) - to_decimal(paid_row.get("paid_amount"))
+    return Order(bid or appt["bid"], appt["aid"], False, [], owed, owed, 0)
+
+
+def order_version(order, progress, rules):
+    """fingerprint of everything a quote's price depends on"""
+    key = repr((
+        order.bid, order.aid, order.is_product_purchase,
+        [(line["pid"], line["amount"], str(line["price"])) for line in order.lines],
+        str(order.subtotal),
+        sorted((name, str(value)) for name, value in progress.items()),
+        rules.version,
+    ))
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+class Quote:
+    """a priced order, checked out against by quote_id until it expires
+
+    pts_value: points earned per dollar paid at the business
+    balance: the customer's points balance when priced
+    """
+
+    def __init__(self, cid, order, points, pricing, version, pts_value, balance):
+        self.quote_id = secrets.token_urlsafe(16)
+        self.cid = cid
+        self.order = order
+        self.points = points
+        self.pricing = pricing
+        self.version = version
+        self.pts_value = pts_value
+        self.balance = balance
+        self.expires_at = datetime.now() + timedelta(seconds=QUOTE_TTL)
+
+
+def build_quote(cursor, cid, order, points=0):
+    """price order for cid, redeeming points loyalty points"""
+    rules = get_rules(cursor, order.bid)
+    progress = load_progress(cursor, cid, order.bid)
+    if points and Decimal(points) > progress["points"]:
+        raise QuoteError("insufficient loyalty points")
+
+    pricing = price_order(
+        rules,
+        progress,
+        subtotal=order.subtotal,
+        unit_price=order.unit_price,
+        is_product_purchase=order.is_product_purchase,
+        items=order.items,
+        manual_discount=points_discount(points) if points else Decimal("0"),
+        redeeming=points > 0,
+    )
+    version = order_version(order, progress, rules)
+    return Quote(cid, order, points, pricing, version, rules.pts_value, progress["points"])
+
+
+def save_quote(cursor, quote):
+    """keep quote for checkout by any process; the caller commits"""
+    order = quote.order
+    cursor.execute(delete_expired_quotes, (datetime.now(),))
+    cursor.execute(insert_quote, (
+        quote.quote_id, quote.cid, order.bid, order.aid, order.is_product_purchase,
+        quote.points, quote.version, quote.pricing.total, quote.expires_at,
+    ))
+    quote_cache.set(quote.quote_id, quote)
+    return quote
+
+
+def get_quote(cursor, quote_id, cid):
+    """return the live quote quote_id of cid
+
+    a quote priced by another process is priced again from its row and
+    accepted only if it comes to the same version and total
+    """
+    quote = quote_cache.get(quote_id)
+    if quote is not None:
+        if quote.cid != cid:
+            raise QuoteError("Quote expired, please review your order again", 409)
+        return quote
+
+    cursor.execute(query_quote, (quote_id, cid, datetime.now()))
+    row = cursor.fetchone()
+    if row is None:
+        raise QuoteError("Quote expired, please review your order again", 409)
+    order = load_order(cursor, cid, row["bid"], bool(row["is_product_purchase"]), row["aid"])
+    quote = build_quote(cursor, cid, order, int(row["points"]))
+    if quote.version != row["version"] or quote.pricing.total != to_decimal(row["total"]):
+        raise QuoteError("Your order changed since it was priced, please review it again", 409)
+    quote.quote_id = row["quote_id"]
+    return quote
+
+
+def verify_quote(cursor, quote):
+    """re-read the quoted order and return it, raising QuoteError if the
+    cart, amount owed, loyalty progress or rules changed since it was priced"""
+    quoted = quote.order
+    order = load_order(cursor, quote.cid, quoted.bid, quoted.is_product_purchase, quoted.aid)
+    rules = get_rules(cursor, order.bid)
+    progress = load_progress(cursor, quote.cid, order.bid)
+    if order_version(order, progress, rules) != quote.version:
+        raise QuoteError("Your order changed since it was priced, please review it again", 409)
+    return order
+
+
+def discard_quote(cursor, quote_id):
+    """use up quote_id, in the checkout's transaction"""
+    cursor.execute(delete_quote, (quote_id,))
+    quote_cache.invalidate(quote_id)
@@ -0,0 +1,78 @@
+from collections import OrderedDict
+
+# takes qty off every product in one statement, skipping any product whose
+# stock would go negative; the caller compares the rows changed with the
+# products asked for. a NULL stock is unlimited and stays NULL, so MySQL
+# does not count those rows as changed
+update_stock_decrement = """
+    UPDATE products p
+    JOIN ({rows}) d ON d.pid = p.pid
+    SET p.stock = p.stock - d.qty
+    WHERE p.stock IS NULL OR p.stock >= d.qty
+"""
+
+query_stock = "SELECT pid, name, stock FROM products WHERE pid IN ({pids})"
+
+query_unlimited_stock = "SELECT COUNT(*) AS unlimited FROM products WHERE pid IN ({pids}) AND stock IS NULL"
+
+
+def _quantities(lines):
+    """sum (pid, amount) lines into {pid: qty}, in pid order
+
+    products with nothing to take are left out, an UPDATE that changes
+    nothing would not count as a changed row
+    """
+    totals = {}
+    for pid, amount in lines:
+        totals[pid] = totals.get(pid, 0) + int(amount or 0)
+    return OrderedDict(sorted((pid, qty) for pid, qty in totals.items() if qty > 0))
+
+
+def decrement_stock(cursor, lines):
+    """take the amounts of (pid, amount) lines off stock in one statement
+
+    products without a stock count are unlimited and left unchanged. returns
+    False, with some products possibly decremented, when any product lacks
+    stock; the caller must roll back then
+    """
+    quantities = _quantities(lines)
+    if not quantities:
+        return True
+    rows = " UNION ALL ".join(["SELECT %s AS pid, %s AS qty"] * len(quantities))
+    params = [value for item in quantities.items() for value in item]
+    cursor.execute(update_stock_decrement.format(rows=rows), params)
+    changed = cursor.rowcount
+    if changed == len(quantities):
+        return True
+
+    # only carts with unlimited products, or short ones, count those apart
+    cursor.execute(query_unlimited_stock.format(pids=", ".join(["%s"] * len(quantities))), list(quantities))
+    row = cursor.fetchone()
+    unlimited = row["unlimited"] if isinstance(row, dict) else row[0]
+    return changed + unlimited == len(quantities)
+
+
+def short_stock(cursor, lines):
+    """return [{pid, name, requested, available}] of lines asking for more
+    than is in stock"""
+    quantities = _quantities(lines)
+    if not quantities:
+        return []
+    cursor.execute(query_stock.format(pids=", ".join(["%s"] * len(quantities))), list(quantities))
+    products = {}
+    for row in cursor.fetchall():
+        if not isinstance(row, dict):
+            row = dict(zip(("pid", "name", "stock"), row))
+        products[row["pid"]] = row
+
+    short = []
+    for pid, requested in quantities.items():
+        # a removed product has none available, one without a stock count
+        # is unlimited
+        row = products.get(pid, {})
+        if row and row.get("stock") is None:
+            continue
+        available = row.get("stock") or 0
+        if available < requested:
+            short.append({"pid": pid, "name": row.get("name"), "requested": requested, "available": available})
+    return short
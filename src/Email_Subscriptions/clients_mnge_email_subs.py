@@ -1,8 +1,8 @@
 from flask import request, jsonify, Blueprint
 from flask_cors import CORS
-from src.extensions import scheduler
+from src.Notifications.outbox import cancel_reminders
 import mysql.connector
-from helper.utils import get_curr_cid
+from helper.utils import get_curr_cid, get_db_connection
 from flask_login import login_required
 from dotenv import load_dotenv
 import os
@@ -15,17 +15,6 @@ manage_email_sub = Blueprint('manage_email_sub', __name__)
 
 
 
-def get_db_connection():
-    """Create a new database connection"""
-    return mysql.connector.connect(
-        host=os.getenv("DB_HOST"),
-        user=os.getenv("DB_USER"),
-        port=int(os.getenv("DB_PORT")),
-        password=os.getenv("DB_PASSWORD"),
-        database=os.getenv("DB_NAME")
-    )
-
-
 #clients can manage promotion email subscriptions
 @manage_email_sub.route("/api/clients/manage-email-subs", methods=["POST"])
 @login_required
@@ -90,6 +79,8 @@ def manage_appt_reminder_subscription():
         where cid = %s;
         """
         cursor.execute(query, (cid,))
+        if not appt:
+            cancel_reminders(cursor, cid)
         db.commit()
 
         # if cursor.rowcount == 0:
@@ -105,16 +96,6 @@ def manage_appt_reminder_subscription():
         if db:
             db.close()
 
-    if not appt:
-        jobs = scheduler.get_jobs()
-        for j in jobs:
-            job_id = j.id
-            split_id = job_id.split(":")
-            c = split_id[2]
-            if str(cid) == c:
-                scheduler.remove_job(job_id)
-
-    
     return jsonify({"message": "Appointment reminder email subscription preferences updated successfully."}), 200
         
 
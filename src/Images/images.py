@@ -0,0 +1,32 @@
+from flask import Blueprint, Response, jsonify, request
+from werkzeug.wsgi import wrap_file
+from helper.blobstore import get_blob_store, is_blob_key, sniff_image_type
+
+images = Blueprint("images", __name__, url_prefix="/api")
+
+# blobs never change under a key, so clients may keep them for a year
+IMAGE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+@images.route("/images/<key>", methods=["GET"])
+def get_image(key):
+    """serve a stored image, honouring If-None-Match and Range"""
+    if not is_blob_key(key):
+        return jsonify({"status": "failure", "message": "image not found"}), 404
+    store = get_blob_store()
+    try:
+        size = store.size(key)
+        blob = store.open(key)
+    except FileNotFoundError:
+        return jsonify({"status": "failure", "message": "image not found"}), 404
+
+    mime_type = sniff_image_type(blob.read(16)) or "application/octet-stream"
+    blob.seek(0)
+    response = Response(wrap_file(request.environ, blob), mimetype=mime_type, direct_passthrough=True)
+    response.content_length = size
+    response.set_etag(key)
+    response.cache_control.public = True
+    response.cache_control.max_age = IMAGE_MAX_AGE
+    response.cache_control.immutable = True
+    # answers 304 for a matching If-None-Match and 206 for a Range
+    return response.make_conditional(request, accept_ranges=True, complete_length=size)
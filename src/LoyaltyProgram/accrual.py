@@ -0,0 +1,168 @@
+"""Background loyalty accrual for completed appointments.
+
+Appointments are processed in ``aid`` order above a high-water mark kept in
+``loyalty_accrual_state``. The mark only moves past appointments that can no
+longer earn points later, so an appointment booked long in advance is picked
+up once its start time passes even though newer appointments were processed
+before it.
+"""
+
+from __future__ import annotations
+
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from helper.utils import get_db_connection
+from .loyalty_service import award_points_for_visit, award_points_for_visits
+
+ACCRUAL_INTERVAL = int(os.getenv("LOYALTY_ACCRUAL_SECONDS", "60"))
+ACCRUAL_BATCH_SIZE = int(os.getenv("LOYALTY_ACCRUAL_BATCH_SIZE", "500"))
+
+ACCRUAL_JOB_ID = "LoyaltyAccrual"
+ACCRUAL_STATE_NAME = "visits"
+# MySQL named lock held by the one process running a pass
+ACCRUAL_LOCK_NAME = "salon_app.loyalty_accrual"
+
+query_accrual_mark = "SELECT last_aid FROM loyalty_accrual_state WHERE name = %s"
+
+upsert_accrual_mark = """
+    INSERT INTO loyalty_accrual_state (name, last_aid) VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE last_aid = VALUES(last_aid)
+"""
+
+# past, not cancelled appointments above the mark without a points event
+query_accruable_visits = """
+    SELECT a.aid, a.cid, s.bid, s.price
+    FROM appointments a
+    JOIN services s ON a.sid = s.sid
+    WHERE a.aid > %s
+    AND a.start_time < NOW()
+    AND (a.status IS NULL OR a.status NOT IN ('cancelled', 'no_show'))
+    AND NOT EXISTS (SELECT 1 FROM loyalty_point_events e WHERE e.aid = a.aid)
+    ORDER BY a.aid
+    LIMIT %s
+"""
+
+# the oldest appointment above the mark that may still earn points later
+query_first_pending_visit = """
+    SELECT MIN(aid) FROM appointments
+    WHERE aid > %s
+    AND start_time >= NOW()
+    AND (status IS NULL OR status NOT IN ('cancelled', 'no_show'))
+"""
+
+query_last_aid = "SELECT COALESCE(MAX(aid), 0) FROM appointments"
+
+
+def _next_mark(cursor, mark: int, processed: List[int], failed: List[int], batch_full: bool) -> int:
+    """return the highest aid every appointment up to which is settled"""
+    if batch_full:
+        # more visits are waiting, stop at the last one handled
+        new_mark = processed[-1] if processed else mark
+    else:
+        cursor.execute(query_last_aid)
+        new_mark = int(cursor.fetchone()[0])
+
+    cursor.execute(query_first_pending_visit, (mark,))
+    pending = cursor.fetchone()[0]
+    if pending is not None:
+        new_mark = min(new_mark, int(pending) - 1)
+    if failed:
+        new_mark = min(new_mark, min(failed) - 1)
+    return max(new_mark, mark)
+
+
+def accrue_visits(batch_size: int = ACCRUAL_BATCH_SIZE) -> Optional[Dict[str, object]]:
+    """award points for appointments completed since the last pass
+
+    returns a summary of the pass, or None when another process holds the
+    accrual lock
+    """
+    conn = get_db_connection()
+    if conn is None:
+        raise ValueError("Database connection failed")
+
+    cursor = conn.cursor(buffered=True)
+    locked = False
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, 0)", (ACCRUAL_LOCK_NAME,))
+        locked = cursor.fetchone()[0] == 1
+        if not locked:
+            return None
+
+        cursor.execute(query_accrual_mark, (ACCRUAL_STATE_NAME,))
+        row = cursor.fetchone()
+        mark = int(row[0]) if row else 0
+
+        cursor.execute(query_accruable_visits, (mark, batch_size))
+        visits = cursor.fetchall()
+        conn.commit()
+
+        processed: List[int] = []
+        failed: List[int] = []
+        awarded = 0
+        try:
+            results = award_points_for_visits(
+                conn, [(aid, cid, bid, price, None) for aid, cid, bid, price in visits]
+            )
+            processed = [r["aid"] for r in results]
+            awarded = sum(1 for r in results if r["awarded"])
+        except Exception as err:
+            # find the visits that fail by awarding them one at a time
+            print(f"[WARN] Batch loyalty award failed, retrying one by one: {err}")
+            for aid, cid, bid, price in visits:
+                try:
+                    result = award_points_for_visit(conn, aid=aid, cid=cid, bid=bid, amount=price)
+                    if result.get("awarded"):
+                        awarded += 1
+                    processed.append(aid)
+                except Exception as err:
+                    print(f"[WARN] Failed to award loyalty points for appointment {aid}: {err}")
+                    failed.append(aid)
+
+        new_mark = _next_mark(cursor, mark, processed, failed, len(visits) >= batch_size)
+        if new_mark != mark:
+            cursor.execute(upsert_accrual_mark, (ACCRUAL_STATE_NAME, new_mark))
+        conn.commit()
+        return {
+            "processed": len(processed),
+            "awarded": awarded,
+            "failed": len(failed),
+            "mark": new_mark,
+            "finished_at": datetime.now().isoformat(),
+        }
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        if locked:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (ACCRUAL_LOCK_NAME,))
+            cursor.fetchall()
+        cursor.close()
+        conn.close()
+
+
+def run_accrual() -> None:
+    """scheduler entry point: drain pending visits one batch at a time"""
+    try:
+        while True:
+            summary = accrue_visits()
+            if not summary or summary["failed"] or summary["processed"] < ACCRUAL_BATCH_SIZE:
+                return
+    except Exception as err:
+        print(f"[ERROR] Loyalty accrual failed: {err}")
+
+
+def start_accrual_job(scheduler, interval_seconds: int = ACCRUAL_INTERVAL) -> None:
+    """run loyalty accrual now and every interval_seconds on scheduler"""
+    scheduler.add_job(
+        func=run_accrual,
+        trigger="interval",
+        seconds=interval_seconds,
+        id=ACCRUAL_JOB_ID,
+        next_run_time=datetime.now(),
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True,
+    )
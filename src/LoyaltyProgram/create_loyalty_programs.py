@@ -4,27 +4,16 @@ import mysql.connector
 from dotenv import load_dotenv
 import os
 
-from helper.utils import check_role, get_curr_bid
+from helper.utils import check_role, get_curr_bid, get_db_connection
 from .prog_func import *
+from src.Clients.pricing import invalidate_rules
 
 load_dotenv()
 
 loyalty_prog = Blueprint('loyalty_prog', __name__)
 
 def get_db():
-
-    try:
-        db = mysql.connector.connect(
-            host=os.getenv("DB_HOST"),
-            user=os.getenv("DB_USER"),
-            port=int(os.getenv("DB_PORT")),
-            password=os.getenv("DB_PASSWORD"),
-            database=os.getenv("DB_NAME")
-            )
-        return db
-    except mysql.connector.Error as err:
-        print(f"Error: Database could not connect. : {err}")
-        return None
+    return get_db_connection()
 
 #Salon Owner can create loyalty programs
 @loyalty_prog.route("/api/owner/create-loyalty-programs", methods=["POST"])
@@ -78,6 +67,7 @@ def create_lprogs():
         """
         cursor.execute(query_rwd, (business_id, lprog_id, True, reward_value))
         db.commit()
+        invalidate_rules(business_id)
         return jsonify({"message": "Loyalty program created successfully.", "lprog_id": lprog_id }), 201
     except mysql.connector.Error as err:
         print(f"Error: Loyalty program creation unsuccessful. : {err}")
@@ -292,6 +282,7 @@ def update_loyalty_program(lprog_id: int):
             )
 
         db.commit()
+        invalidate_rules(bid)
         return jsonify({"message": "Loyalty program updated."}), 200
     except mysql.connector.Error as err:
         if db:
@@ -327,6 +318,7 @@ def delete_loyalty_program(lprog_id: int):
         cursor.execute("DELETE FROM rewards WHERE lprog_id = %s AND bid = %s", (lprog_id, bid))
         cursor.execute("DELETE FROM loyalty_programs WHERE lprog_id = %s AND bid = %s", (lprog_id, bid))
         db.commit()
+        invalidate_rules(bid)
         return jsonify({"message": "Loyalty program removed."}), 200
     except mysql.connector.Error as err:
         if db:
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Dict, Optional
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
 import mysql.connector
 
@@ -23,76 +23,13 @@ def _as_decimal(value: Optional[object]) -> Decimal:
         return Decimal("0")
 
 
-def _ensure_tables(conn: mysql.connector.MySQLConnection) -> None:
-    cursor = conn.cursor()
-    try:
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS customer_loyalty_points (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                cid INT NOT NULL,
-                bid INT NOT NULL,
-                pts_balance DECIMAL(12, 2) NOT NULL DEFAULT 0,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                UNIQUE KEY uniq_customer_business (cid, bid)
-            ) ENGINE=InnoDB
-            """
-        )
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS loyalty_point_events (
-                event_id INT AUTO_INCREMENT PRIMARY KEY,
-                aid INT NULL,
-                cid INT NOT NULL,
-                bid INT NOT NULL,
-                points INT NOT NULL,
-                source VARCHAR(32) NOT NULL DEFAULT 'visit',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE KEY uniq_aid (aid)
-            ) ENGINE=InnoDB
-            """
-        )
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS loyalty_redemptions (
-                redemption_id INT AUTO_INCREMENT PRIMARY KEY,
-                cid INT NOT NULL,
-                bid INT NOT NULL,
-                points INT NOT NULL,
-                discount DECIMAL(12, 2) NOT NULL DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            ) ENGINE=InnoDB
-            """
-        )
-        conn.commit()
-    finally:
-        cursor.close()
-
-
-def _fetch_program_details(conn: mysql.connector.MySQLConnection, bid: int) -> Optional[Dict[str, object]]:
-    """Fetch the active loyalty configuration for a business."""
-
-    cursor = conn.cursor(dictionary=True)
-    try:
-        cursor.execute(
-            """
-            SELECT lp.threshold, lp.appts_thresh, lp.pdct_thresh, lp.points_thresh, lp.price_thresh,
-                   r.is_appt, r.is_product, r.is_price, r.is_points, r.is_discount, r.rwd_value
-            FROM loyalty_programs lp
-            LEFT JOIN rewards r ON r.lprog_id = lp.lprog_id AND r.bid = lp.bid
-            WHERE lp.bid = %s
-            ORDER BY lp.lprog_id DESC
-            LIMIT 1
-            """,
-            (bid,),
-        )
-        row = cursor.fetchone()
-    finally:
-        cursor.close()
+_PROGRAM_COLUMNS = """
+    lp.bid, lp.threshold, lp.appts_thresh, lp.pdct_thresh, lp.points_thresh, lp.price_thresh,
+    r.is_appt, r.is_product, r.is_price, r.is_points, r.is_discount, r.rwd_value
+"""
 
-    if not row:
-        return None
 
+def _program_from_row(row: Dict[str, object]) -> Dict[str, object]:
     program_type = None
     if row.get("appts_thresh"):
         program_type = "appts_thresh"
@@ -123,6 +60,58 @@ def _fetch_program_details(conn: mysql.connector.MySQLConnection, bid: int) -> O
     }
 
 
+def _fetch_program_details(conn: mysql.connector.MySQLConnection, bid: int) -> Optional[Dict[str, object]]:
+    """Fetch the active loyalty configuration for a business."""
+
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(
+            f"""
+            SELECT {_PROGRAM_COLUMNS}
+            FROM loyalty_programs lp
+            LEFT JOIN rewards r ON r.lprog_id = lp.lprog_id AND r.bid = lp.bid
+            WHERE lp.bid = %s
+            ORDER BY lp.lprog_id DESC
+            LIMIT 1
+            """,
+            (bid,),
+        )
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+
+    return _program_from_row(row) if row else None
+
+
+def _fetch_program_details_many(conn: mysql.connector.MySQLConnection, bids: Iterable[int]) -> Dict[int, Dict[str, object]]:
+    """Fetch the active loyalty configuration of several businesses in one query."""
+
+    bids = sorted(set(bids))
+    if not bids:
+        return {}
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(
+            f"""
+            SELECT {_PROGRAM_COLUMNS}
+            FROM loyalty_programs lp
+            LEFT JOIN rewards r ON r.lprog_id = lp.lprog_id AND r.bid = lp.bid
+            WHERE lp.bid IN ({", ".join(["%s"] * len(bids))})
+            ORDER BY lp.bid, lp.lprog_id DESC
+            """,
+            bids,
+        )
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+
+    programs: Dict[int, Dict[str, object]] = {}
+    for row in rows:
+        # rows of a business come newest program first
+        programs.setdefault(row["bid"], _program_from_row(row))
+    return programs
+
+
 def calculate_points(amount: Optional[object], override: Optional[int] = None) -> int:
     if override is not None:
         return max(int(override), 0)
@@ -151,24 +140,25 @@ def get_balance(conn: mysql.connector.MySQLConnection, cid: int, bid: int) -> De
         cursor.close()
 
 
-def award_points_for_visit(
-    conn: mysql.connector.MySQLConnection,
+def _apply_visit(
+    program_details: Dict[str, object],
+    progress: Dict[str, object],
     *,
     aid: Optional[int],
-    cid: int,
-    bid: int,
-    amount: Optional[object] = None,
-    quantity: Optional[int] = None,
+    amount: Optional[object],
+    quantity: Optional[int],
     explicit_points: Optional[int] = None,
-    source: str = "visit",
-) -> Dict[str, object]:
-    _ensure_tables(conn)
-    program_details = _fetch_program_details(conn, bid) or {}
+) -> Tuple[Decimal, Decimal, Decimal, Decimal]:
+    """Apply one visit to a customer's progress counters.
+
+    Returns ``(points, appt_complete, prod_purchased, amount_spent)`` where the
+    counters are the new values after any threshold completions.
+    """
+
     program_type = program_details.get("program_type")
     reward_type = program_details.get("reward_type")
     reward_value = _as_decimal(program_details.get("reward_value")) if program_details.get("reward_value") is not None else Decimal("0")
     threshold = _as_decimal(program_details.get("threshold")) if program_details.get("threshold") is not None else Decimal("0")
-    print("[award] program_details:", program_details)
 
     if explicit_points is not None:
         base_points = max(int(explicit_points), 0)
@@ -202,6 +192,46 @@ def award_points_for_visit(
             prod_increment = Decimal("0")
     amount_increment = _as_decimal(amount) if amount is not None else Decimal("0")
 
+    new_appts = _as_decimal(progress.get("appt_complete")) + appt_increment
+    new_products = _as_decimal(progress.get("prod_purchased")) + prod_increment
+    new_amount = _as_decimal(progress.get("amount_spent")) + amount_increment
+
+    bonus_points = Decimal("0")
+    completions = 0
+
+    if program_type == "appts_thresh" and threshold > Decimal("0"):
+        completions = int(new_appts // threshold)
+        if completions > 0:
+            new_appts = new_appts - (threshold * completions)
+    elif program_type == "pdct_thresh" and threshold > Decimal("0"):
+        completions = int(new_products // threshold)
+        if completions > 0:
+            new_products = new_products - (threshold * completions)
+    elif program_type == "price_thresh" and threshold > Decimal("0"):
+        completions = int(new_amount // threshold)
+        if completions > 0:
+            new_amount = new_amount - (threshold * completions)
+
+    if completions > 0 and reward_type == "is_points" and reward_value > Decimal("0"):
+        bonus_points = (reward_value * completions).quantize(Decimal("1"), rounding=ROUND_HALF_UP)
+
+    return Decimal(str(base_points)) + bonus_points, new_appts, new_products, new_amount
+
+
+def award_points_for_visit(
+    conn: mysql.connector.MySQLConnection,
+    *,
+    aid: Optional[int],
+    cid: int,
+    bid: int,
+    amount: Optional[object] = None,
+    quantity: Optional[int] = None,
+    explicit_points: Optional[int] = None,
+    source: str = "visit",
+) -> Dict[str, object]:
+    program_details = _fetch_program_details(conn, bid) or {}
+    print("[award] program_details:", program_details)
+
     cursor = conn.cursor(dictionary=True)
     try:
         cursor.execute(
@@ -224,39 +254,10 @@ def award_points_for_visit(
             )
             row = {"pts_balance": Decimal("0"), "appt_complete": Decimal("0"), "prod_purchased": Decimal("0"), "amount_spent": Decimal("0")}
 
-        current_appts = _as_decimal(row.get("appt_complete"))
-        current_products = _as_decimal(row.get("prod_purchased"))
-        current_amount = _as_decimal(row.get("amount_spent"))
-
-        new_appts = current_appts + appt_increment
-        new_products = current_products + prod_increment
-        new_amount = current_amount + amount_increment
-
-        bonus_points = Decimal("0")
-        completions = 0
-
-        if program_type == "appts_thresh" and threshold > Decimal("0"):
-            completions = int(new_appts // threshold)
-            if completions > 0:
-                new_appts = new_appts - (threshold * completions)
-        elif program_type == "pdct_thresh" and threshold > Decimal("0"):
-            completions = int(new_products // threshold)
-            if completions > 0:
-                new_products = new_products - (threshold * completions)
-        elif program_type == "price_thresh" and threshold > Decimal("0"):
-            completions = int(new_amount // threshold)
-            if completions > 0:
-                new_amount = new_amount - (threshold * completions)
-
-        if completions > 0 and reward_type == "is_points" and reward_value > Decimal("0"):
-            bonus_points = (reward_value * completions).quantize(Decimal("1"), rounding=ROUND_HALF_UP)
-
-        total_points = Decimal(str(base_points)) + bonus_points
-        print("[award] base:", base_points, "bonus:", bonus_points)
-        if total_points <= Decimal("0"):
-            cursor.close()
-            balance = get_balance(conn, cid, bid)
-            return {"awarded": False, "points": 0, "balance": float(balance)}
+        total_points, new_appts, new_products, new_amount = _apply_visit(
+            program_details, row, aid=aid, amount=amount, quantity=quantity, explicit_points=explicit_points
+        )
+        print("[award] points:", total_points)
 
         cursor.execute(
             """
@@ -289,7 +290,9 @@ def award_points_for_visit(
         conn.commit()
         balance = get_balance(conn, cid, bid)
         cursor.close()
-        return {"awarded": True, "points": int(total_points), "balance": float(balance)}
+        # a visit earning nothing still advances the threshold counters and is
+        # recorded so it is not counted twice
+        return {"awarded": total_points > Decimal("0"), "points": int(total_points), "balance": float(balance)}
     except mysql.connector.IntegrityError:
         conn.rollback()
         cursor.close()
@@ -301,6 +304,153 @@ def award_points_for_visit(
         raise
 
 
+# rows written per multi-row statement by the batch award
+AWARD_BATCH_CHUNK = 500
+
+
+def _chunks(items: Sequence, size: int = AWARD_BATCH_CHUNK):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def award_points_for_visits(
+    conn: mysql.connector.MySQLConnection,
+    visits: Iterable[Tuple[Optional[int], int, int, Optional[object], Optional[int]]],
+    *,
+    source: str = "visit",
+) -> List[Dict[str, object]]:
+    """Award points for many visits in one transaction.
+
+    ``visits`` holds ``(aid, cid, bid, amount, quantity)`` tuples applied in
+    order, with the same rules as :func:`award_points_for_visit`. Programs are
+    loaded once per business, the affected balances are locked together, and
+    balances and events are written with multi-row statements. Visits whose
+    ``aid`` already has an event are skipped.
+
+    Returns one ``{aid, cid, bid, awarded, points, balance}`` dict per visit.
+    """
+
+    visits = [tuple(v) for v in visits]
+    if not visits:
+        return []
+
+    cursor = conn.cursor(dictionary=True)
+    try:
+        aids = sorted({v[0] for v in visits if v[0] is not None})
+        done_aids = set()
+        for chunk in _chunks(aids):
+            cursor.execute(
+                f"SELECT aid FROM loyalty_point_events WHERE aid IN ({', '.join(['%s'] * len(chunk))})",
+                chunk,
+            )
+            done_aids.update(row["aid"] for row in cursor.fetchall())
+
+        programs = _fetch_program_details_many(conn, (v[2] for v in visits))
+
+        # lock every affected balance, creating missing rows first; sorted so
+        # concurrent batches lock in the same order
+        pairs = sorted({(v[1], v[2]) for v in visits})
+        progress: Dict[Tuple[int, int], Dict[str, object]] = {}
+        for chunk in _chunks(pairs):
+            cursor.execute(
+                f"""
+                INSERT IGNORE INTO customer_loyalty_points (cid, bid, pts_balance, prod_purchased, appt_complete, amount_spent)
+                VALUES {", ".join(["(%s, %s, 0, 0, 0, 0)"] * len(chunk))}
+                """,
+                [value for pair in chunk for value in pair],
+            )
+            cursor.execute(
+                f"""
+                SELECT cid, bid, pts_balance, appt_complete, prod_purchased, amount_spent
+                FROM customer_loyalty_points
+                WHERE (cid, bid) IN ({", ".join(["(%s, %s)"] * len(chunk))})
+                FOR UPDATE
+                """,
+                [value for pair in chunk for value in pair],
+            )
+            for row in cursor.fetchall():
+                progress[(row["cid"], row["bid"])] = {
+                    "pts_balance": _as_decimal(row["pts_balance"]),
+                    "appt_complete": _as_decimal(row["appt_complete"]),
+                    "prod_purchased": _as_decimal(row["prod_purchased"]),
+                    "amount_spent": _as_decimal(row["amount_spent"]),
+                }
+
+        results: List[Dict[str, object]] = []
+        events: List[Tuple[Optional[int], int, int, int, str]] = []
+        changed = set()
+        for aid, cid, bid, amount, quantity in visits:
+            state = progress[(cid, bid)]
+            result = {"aid": aid, "cid": cid, "bid": bid, "awarded": False, "points": 0}
+            results.append(result)
+            if aid is not None:
+                if aid in done_aids:
+                    continue
+                done_aids.add(aid)
+
+            total_points, new_appts, new_products, new_amount = _apply_visit(
+                programs.get(bid, {}), state, aid=aid, amount=amount, quantity=quantity
+            )
+            state["pts_balance"] += total_points
+            state["appt_complete"] = new_appts
+            state["prod_purchased"] = new_products
+            state["amount_spent"] = new_amount
+            changed.add((cid, bid))
+            events.append((aid, cid, bid, int(total_points), source))
+            result["awarded"] = total_points > Decimal("0")
+            result["points"] = int(total_points)
+
+        for chunk in _chunks(sorted(changed)):
+            cursor.execute(
+                f"""
+                INSERT INTO customer_loyalty_points (cid, bid, pts_balance, appt_complete, prod_purchased, amount_spent)
+                VALUES {", ".join(["(%s, %s, %s, %s, %s, %s)"] * len(chunk))}
+                ON DUPLICATE KEY UPDATE
+                    pts_balance = VALUES(pts_balance),
+                    appt_complete = VALUES(appt_complete),
+                    prod_purchased = VALUES(prod_purchased),
+                    amount_spent = VALUES(amount_spent)
+                """,
+                [
+                    value
+                    for cid, bid in chunk
+                    for value in (
+                        cid,
+                        bid,
+                        float(progress[(cid, bid)]["pts_balance"]),
+                        float(progress[(cid, bid)]["appt_complete"]),
+                        float(progress[(cid, bid)]["prod_purchased"]),
+                        float(progress[(cid, bid)]["amount_spent"]),
+                    )
+                ],
+            )
+
+        for chunk in _chunks(events):
+            cursor.execute(
+                f"""
+                INSERT INTO loyalty_point_events (aid, cid, bid, points, source)
+                VALUES {", ".join(["(%s, %s, %s, %s, %s)"] * len(chunk))}
+                """,
+                [value for event in chunk for value in event],
+            )
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    for result in results:
+        result["balance"] = float(progress[(result["cid"], result["bid"])]["pts_balance"])
+    return results
+
+
+def points_discount(points: int) -> Decimal:
+    """Dollar discount granted for redeeming points."""
+    return (Decimal(points) * DISCOUNT_PER_POINT).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
 def redeem_points(
     conn: mysql.connector.MySQLConnection,
     *,
@@ -312,7 +462,6 @@ def redeem_points(
     if points <= 0:
         raise ValueError("points to redeem must be positive")
 
-    _ensure_tables(conn)
     cursor = conn.cursor()
     try:
         if auto_commit:
@@ -338,9 +487,7 @@ def redeem_points(
             "UPDATE customer_loyalty_points SET pts_balance = %s WHERE cid = %s AND bid = %s",
             (float(new_balance), cid, bid),
         )
-        discount_value = (Decimal(points) * DISCOUNT_PER_POINT).quantize(
-            Decimal("0.01"), rounding=ROUND_HALF_UP
-        )
+        discount_value = points_discount(points)
         cursor.execute(
             """
             INSERT INTO loyalty_redemptions (cid, bid, points, discount)
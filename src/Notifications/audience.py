@@ -0,0 +1,31 @@
+import os
+from dotenv import load_dotenv
+from helper.utils import get_db_connection
+from .queries import query_promotion_audience
+
+load_dotenv()
+
+# rows fetched from the audience query at a time
+AUDIENCE_BATCH_SIZE = int(os.getenv("AUDIENCE_BATCH_SIZE", "1000"))
+
+
+def iter_promotion_audience(bid, batch_size=AUDIENCE_BATCH_SIZE):
+    """yield batches of the customers of a business subscribed to promotions
+
+    one query streams the whole audience, each customer once however many
+    appointments they have, so memory stays bounded by batch_size
+    """
+    conn = get_db_connection()
+    if conn is None:
+        raise ValueError("Database connection failed")
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(query_promotion_audience, [bid])
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cursor.close()
+        conn.close()
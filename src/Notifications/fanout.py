@@ -0,0 +1,85 @@
+import os
+from dotenv import load_dotenv
+from helper.utils import get_db_connection
+from .audience import iter_promotion_audience
+from .notification_func import create_promo_message
+
+load_dotenv()
+
+# recipients per promotion email; each chunk is sent, retried and tracked on its own
+PROMO_CHUNK_SIZE = int(os.getenv("PROMO_CHUNK_SIZE", "50"))
+
+# the promotion's own row and its chunk rows in notification_outbox
+query_promotion_send = """
+    SELECT status, last_error, sent_at FROM notification_outbox
+    WHERE kind = 'promotion' AND job_key LIKE %s
+"""
+
+query_promotion_chunks = """
+    SELECT status, COUNT(*) AS chunks, COALESCE(SUM(JSON_LENGTH(payload, '$.recipients')), 0) AS recipients
+    FROM notification_outbox
+    WHERE kind = 'promotion_chunk' AND job_key LIKE %s
+    GROUP BY status
+"""
+
+
+def promotion_key(promo_id, bid):
+    return f"Promotion:{promo_id}:{bid}"
+
+
+def chunk_key(promo_id, index):
+    return f"PromotionChunk:{promo_id}:{index}"
+
+
+def promotion_chunks(bid, chunk_size=PROMO_CHUNK_SIZE):
+    """yield the audience of a business's promotion as lists of at most
+    chunk_size emails, in a stable order"""
+    chunk = []
+    for rows in iter_promotion_audience(bid):
+        for row in rows:
+            chunk.append(row['email'])
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def chunk_message(payload):
+    """the promotion email of one chunk, its recipients in Bcc so none sees
+    another's address"""
+    msg = create_promo_message(payload['title'], payload['description'], payload['business'])
+    msg.sender = os.getenv('MAIL_USERNAME')
+    msg.bcc = payload['recipients']
+    msg.extra_headers = {"To": "undisclosed-recipients:;"}
+    return msg
+
+
+def promotion_progress(promo_id):
+    """return how far the emails of a promotion have got, chunk and
+    recipient counts by status"""
+    conn = get_db_connection()
+    if conn is None:
+        raise ValueError("Database connection failed")
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(query_promotion_send, (f"Promotion:{promo_id}:%",))
+        send = cursor.fetchone()
+        cursor.execute(query_promotion_chunks, (f"PromotionChunk:{promo_id}:%",))
+        chunks = {status: 0 for status in ("pending", "sending", "sent", "failed")}
+        recipients = dict(chunks)
+        for row in cursor.fetchall():
+            chunks[row['status']] = row['chunks']
+            recipients[row['status']] = int(row['recipients'])
+        return {
+            "promo_id": promo_id,
+            # pending until the audience has been split into chunks
+            "status": send['status'] if send else None,
+            "error": send['last_error'] if send else None,
+            "chunks": chunks,
+            "recipients": recipients,
+            "done": bool(send) and send['status'] == 'sent' and not chunks['pending'] and not chunks['sending'],
+        }
+    finally:
+        cursor.close()
+        conn.close()
@@ -0,0 +1,260 @@
+"""Email delivery worker.
+
+Messages are queued to MAIL_WORKERS background threads, each keeping its
+own mail connection open between messages, instead of every send opening
+its own SMTP session. A session carries at most MAIL_BATCH_SIZE messages
+and is closed once the queue has been idle for MAIL_IDLE_SECONDS. Sends
+from all threads together are paced to MAIL_RATE_PER_SECOND, and temporary
+failures (4xx replies, dropped connections) are retried on a fresh
+connection with doubling delays.
+
+``submit`` returns a Future that holds the outcome of the send.
+"""
+
+import os
+import queue
+import re
+import smtplib
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+
+from src.extensions import mail
+
+# smtp sends through MAIL_SERVER; file writes every message to MAIL_SINK_DIR
+MAIL_BACKEND = os.getenv("MAIL_BACKEND", "smtp")
+MAIL_SINK_DIR = os.getenv("MAIL_SINK_DIR", os.path.join(os.getcwd(), "mail_sink"))
+
+MAIL_WORKERS = int(os.getenv("MAIL_WORKERS", "2"))
+MAIL_BATCH_SIZE = int(os.getenv("MAIL_BATCH_SIZE", "50"))
+MAIL_IDLE_SECONDS = float(os.getenv("MAIL_IDLE_SECONDS", "30"))
+# 0 disables pacing
+MAIL_RATE_PER_SECOND = float(os.getenv("MAIL_RATE_PER_SECOND", "5"))
+MAIL_SEND_RETRIES = int(os.getenv("MAIL_SEND_RETRIES", "3"))
+MAIL_RETRY_SECONDS = float(os.getenv("MAIL_RETRY_SECONDS", "2"))
+
+# upper bounds (seconds) of the queued-to-sent latency histogram buckets
+LATENCY_BUCKETS = (0.1, 0.5, 1.0, 5.0, 30.0, 60.0)
+
+
+def get_app():
+    """return the current Flask app, or the app module's outside a request"""
+    from flask import current_app
+    try:
+        return current_app._get_current_object()
+    except RuntimeError:
+        from app import app
+        return app
+
+
+def is_transient(err):
+    """true for send errors worth retrying: 4xx replies and lost connections"""
+    if isinstance(err, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in err.recipients.values())
+    if isinstance(err, smtplib.SMTPResponseException):
+        return 400 <= err.smtp_code < 500
+    return isinstance(err, (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError))
+
+
+class SMTPBackend:
+    """sends over one Flask-Mail connection, opened on first use"""
+
+    def __init__(self):
+        self._conn = None
+
+    def send(self, msg):
+        if self._conn is None:
+            conn = mail.connect()
+            conn.__enter__()
+            self._conn = conn
+        self._conn.send(msg)
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            try:
+                conn.__exit__(None, None, None)
+            except Exception:
+                pass
+
+
+class FileBackend:
+    """writes each message to an .eml file under root, for local testing"""
+
+    def __init__(self, root=MAIL_SINK_DIR):
+        self.root = root
+
+    def send(self, msg):
+        os.makedirs(self.root, exist_ok=True)
+        name = re.sub(r"[^A-Za-z0-9.-]", "_", msg.msgId.strip("<>"))
+        path = os.path.join(self.root, f"{datetime.now():%Y%m%d-%H%M%S}-{name}.eml")
+        with open(path, "wb") as out:
+            out.write(msg.as_bytes())
+
+    def close(self):
+        pass
+
+
+# backend name -> class, made once per worker thread; a backend provides send and close
+BACKENDS = {
+    "smtp": SMTPBackend,
+    "file": FileBackend,
+}
+
+
+class MailWorker:
+    """delivers queued messages from worker threads, each over a persistent
+    connection of its own
+
+    backend is called once per thread to create that thread's backend
+    """
+
+    def __init__(self, app, backend, workers=MAIL_WORKERS, batch_size=MAIL_BATCH_SIZE,
+                 idle_seconds=MAIL_IDLE_SECONDS, rate_per_second=MAIL_RATE_PER_SECOND,
+                 retries=MAIL_SEND_RETRIES, retry_seconds=MAIL_RETRY_SECONDS):
+        self.app = app
+        self.backend = backend
+        self.workers = max(workers, 1)
+        self.batch_size = batch_size
+        self.idle_seconds = idle_seconds
+        self.interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self.retries = retries
+        self.retry_seconds = retry_seconds
+
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._pace_lock = threading.Lock()
+        self._next_send = 0.0
+
+        self._queued = 0
+        self._sent = 0
+        self._failed = 0
+        self._retried = 0
+        self._sessions = 0
+        self._latency_total = 0.0
+        self._latency_histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+        self._last_error = None
+
+    def submit(self, msg):
+        """queue msg for delivery and return a Future of its outcome"""
+        future = Future()
+        with self._lock:
+            self._queued += 1
+            self._threads = [t for t in self._threads if t.is_alive()]
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._run, name=f"mail-worker-{len(self._threads)}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        self._queue.put((msg, future, time.monotonic()))
+        return future
+
+    def _run(self):
+        backend = self.backend()
+        while True:
+            item = self._queue.get()
+            with self.app.app_context():
+                with self._lock:
+                    self._sessions += 1
+                try:
+                    sent = 0
+                    while item is not None:
+                        self._deliver(backend, *item)
+                        sent += 1
+                        if sent >= self.batch_size:
+                            break
+                        try:
+                            item = self._queue.get(timeout=self.idle_seconds)
+                        except queue.Empty:
+                            item = None
+                finally:
+                    backend.close()
+
+    def _pace(self):
+        """wait for this thread's turn to send, shared by all threads"""
+        if self.interval:
+            with self._pace_lock:
+                now = time.monotonic()
+                slot = max(self._next_send, now)
+                self._next_send = slot + self.interval
+            if slot > now:
+                time.sleep(slot - now)
+
+    def _deliver(self, backend, msg, future, queued_at):
+        attempt = 0
+        while True:
+            self._pace()
+            try:
+                backend.send(msg)
+                break
+            except Exception as err:
+                backend.close()
+                if attempt >= self.retries or not is_transient(err):
+                    self._record(queued_at, error=err)
+                    future.set_exception(err)
+                    return
+                with self._lock:
+                    self._retried += 1
+                time.sleep(self.retry_seconds * 2 ** attempt)
+                attempt += 1
+        self._record(queued_at)
+        future.set_result(None)
+
+    def _record(self, queued_at, error=None):
+        seconds = time.monotonic() - queued_at
+        with self._lock:
+            if error is None:
+                self._sent += 1
+            else:
+                self._failed += 1
+                self._last_error = str(error)
+            self._latency_total += seconds
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    self._latency_histogram[i] += 1
+                    return
+            self._latency_histogram[-1] += 1
+
+    def stats(self):
+        """return a snapshot of delivery counters for monitoring"""
+        with self._lock:
+            histogram = {}
+            for bound, count in zip(LATENCY_BUCKETS, self._latency_histogram):
+                histogram[f"le_{bound}s"] = count
+            histogram["gt_{}s".format(LATENCY_BUCKETS[-1])] = self._latency_histogram[-1]
+            done = self._sent + self._failed
+            return {
+                "backend": getattr(self.backend, "__name__", type(self.backend).__name__),
+                "workers": self.workers,
+                "queue_depth": self._queue.qsize(),
+                "queued": self._queued,
+                "sent": self._sent,
+                "failed": self._failed,
+                "retried": self._retried,
+                "sessions": self._sessions,
+                "latency_total": round(self._latency_total, 6),
+                "latency_average": round(self._latency_total / done, 6) if done else None,
+                "latency_histogram": histogram,
+                "last_error": self._last_error,
+            }
+
+
+_mailer = None
+_mailer_lock = threading.Lock()
+
+
+def get_mailer(app=None):
+    """return the process-wide mail worker, created on first use"""
+    global _mailer
+    if _mailer is None:
+        with _mailer_lock:
+            if _mailer is None:
+                if MAIL_BACKEND not in BACKENDS:
+                    raise ValueError(f"Unknown mail backend {MAIL_BACKEND!r}")
+                _mailer = MailWorker(app or get_app(), BACKENDS[MAIL_BACKEND])
+    return _mailer
+
+
+def mailer_stats():
+    return get_mailer().stats()
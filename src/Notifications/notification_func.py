@@ -42,12 +42,10 @@ def create_promo_message(title, description, business):
     msg.subject = msg.subject + f"at {business}"
     return msg
 
-def email_message(app, msg:Message, to):
-    with app.app_context():
-        msg.sender = os.getenv('MAIL_USERNAME')
-        msg.recipients = to
-        mail.send(msg)
-        print(f"Sent email to {to} at {datetime.now()}")
+def address_message(msg:Message, to) -> Message:
+    msg.sender = os.getenv('MAIL_USERNAME')
+    msg.recipients = to
+    return msg
 
 def check_appointment_subscription(cid) -> bool:
     """Return true if user wants to recieve appointment emails
@@ -107,16 +105,17 @@ def get_business_customers(bid):
         raise e
     
 def send_password_reset(email, uid):
-    msg = Message(
-        subject = 'Password Reset',
-        sender = os.getenv('MAIL_USERNAME'),
-        recipients=[email]
-    )
-    msg.html = f"""
+    """queue the password reset email and return its outbox id, or None if
+    it could not be queued"""
+    from .outbox import send_email
+    html = f"""
     <p>Follow this link to reset your account password</p>
     <p><a href="{os.getenv('FRONTEND')}/password-reset/{uid}" style="color: blue; text-decoration: underline;">
     Password Reset
     </a></p>
     """
-    mail.send(msg)
-
+    try:
+        return send_email('Password Reset', [email], html=html)
+    except Exception as e:
+        print(f"Error queueing password reset email: {e}")
+        return None
@@ -5,6 +5,8 @@ from src.extensions import mail
 from flask_mail import Message
 from dotenv import load_dotenv
 from src.extensions import scheduler
+from flask_login import login_required, current_user
+from src.Notifications.outbox import get_notification_status
 import os
 
 load_dotenv()
@@ -16,6 +18,32 @@ def get_jobs():
     print(scheduler.get_jobs())
     return jsonify("hello")
 
+@notification.route('/status/<int:notification_id>', methods=['GET'])
+@login_required
+def notification_status(notification_id):
+    """Return the delivery status of an email the current user queued: pending, sending, sent, failed or cancelled"""
+    try:
+        status = get_notification_status(notification_id, current_user.id)
+    except Exception as e:
+        print(f"Error {e}")
+        return jsonify({
+            "status":"failure",
+            "message":"Error",
+            "error":str(e)
+        }), 500
+    if status is None:
+        return jsonify({
+            "status":"failure",
+            "message":"notification not found"
+        }), 404
+    for field in ('run_at', 'sent_at', 'created_at'):
+        if status[field]:
+            status[field] = status[field].isoformat()
+    return jsonify({
+        "status":"success",
+        "notification":status
+    }), 200
+
 @notification.route('/test_email',methods=['POST'])
 def email_appointment():
     msg = Message('Hello', sender =os.getenv('MAIL_USERNAME'), recipients = [os.getenv('MAIL_USERNAME')] )
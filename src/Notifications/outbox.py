@@ -0,0 +1,343 @@
+"""Durable notification outbox.
+
+Reminders and promotion emails are rows of ``notification_outbox`` instead of
+in-memory scheduler jobs, so they survive restarts and are sent once however
+many workers run. A row holds the template name and a JSON payload of plain
+values (ids, addresses); the message is built when it is sent.
+
+Every process polls the outbox, but a MySQL named lock lets only one of them
+dispatch at a time. The leader claims due rows by stamping them with a
+lease, sends them and marks them sent. A row whose lease runs out before it
+is marked, because its process died mid-send, is claimed again, so delivery
+is at least once.
+"""
+
+import json
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask_mail import Message
+
+from helper.utils import get_db_connection
+from .notification_func import address_message, create_appt_message
+from .fanout import chunk_key, chunk_message, promotion_chunks
+from .mailer import get_app, get_mailer
+
+OUTBOX_POLL_SECONDS = int(os.getenv("OUTBOX_POLL_SECONDS", "10"))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+# seconds a claimed row is reserved for the process sending it
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "300"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+# a failed send is retried after this many seconds, doubled on every attempt
+OUTBOX_RETRY_SECONDS = int(os.getenv("OUTBOX_RETRY_SECONDS", "60"))
+
+OUTBOX_JOB_ID = "NotificationOutbox"
+# MySQL named lock held by the one process dispatching
+OUTBOX_LOCK_NAME = "salon_app.notification_outbox"
+
+upsert_notification = """
+    INSERT INTO notification_outbox (kind, job_key, payload, run_at, requested_by, status, attempts)
+    VALUES (%s, %s, %s, %s, %s, 'pending', 0)
+    ON DUPLICATE KEY UPDATE kind = VALUES(kind), payload = VALUES(payload), run_at = VALUES(run_at),
+        requested_by = VALUES(requested_by), status = 'pending', attempts = 0, claimed_by = NULL, claimed_until = NULL, last_error = NULL
+"""
+
+# like upsert_notification, but an existing row is left as it is
+insert_notification_once = """
+    INSERT INTO notification_outbox (kind, job_key, payload, run_at, requested_by, status, attempts)
+    VALUES (%s, %s, %s, %s, %s, 'pending', 0)
+    ON DUPLICATE KEY UPDATE id = id
+"""
+
+cancel_notification_key = """
+    UPDATE notification_outbox SET status = 'cancelled'
+    WHERE job_key = %s AND status = 'pending'
+"""
+
+# appointment reminder keys are Appointment:<aid>:<cid>
+cancel_customer_reminders = """
+    UPDATE notification_outbox SET status = 'cancelled'
+    WHERE kind = 'appointment_reminder' AND job_key LIKE %s AND status = 'pending'
+"""
+
+# due rows, and rows whose sender's lease ran out
+claim_due_notifications = """
+    UPDATE notification_outbox
+    SET status = 'sending', claimed_by = %s, claimed_until = %s, attempts = attempts + 1
+    WHERE (status = 'pending' AND run_at <= %s)
+    OR (status = 'sending' AND claimed_until < %s)
+    ORDER BY run_at
+    LIMIT %s
+"""
+
+query_claimed_notifications = """
+    SELECT id, kind, payload, attempts FROM notification_outbox
+    WHERE claimed_by = %s AND status = 'sending'
+    ORDER BY run_at
+"""
+
+mark_notification_sent = """
+    UPDATE notification_outbox
+    SET status = 'sent', sent_at = %s, claimed_by = NULL, claimed_until = NULL, last_error = NULL
+    WHERE id = %s AND claimed_by = %s
+"""
+
+# only the user who queued a row may read it
+query_notification_status = """
+    SELECT id, kind, status, attempts, last_error, run_at, sent_at, created_at
+    FROM notification_outbox WHERE id = %s AND requested_by = %s
+"""
+
+mark_notification_failed = """
+    UPDATE notification_outbox
+    SET status = %s, run_at = %s, claimed_by = NULL, claimed_until = NULL, last_error = %s
+    WHERE id = %s AND claimed_by = %s
+"""
+
+
+def appointment_reminder(payload):
+    return [address_message(create_appt_message(payload['aid']), [payload['email']])]
+
+
+def promotion(payload):
+    """split the audience into chunk rows, which carry the emails; a chunk
+    left from an earlier try is kept, so no chunk is sent twice"""
+    conn = get_db_connection()
+    if conn is None:
+        raise ValueError("Database connection failed")
+    cursor = conn.cursor()
+    try:
+        for index, recipients in enumerate(promotion_chunks(payload['bid'])):
+            enqueue_notification(cursor, "promotion_chunk", dict(payload, recipients=recipients),
+                                 job_key=chunk_key(payload['promo_id'], index), replace=False)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+    # the dispatch pass running this still holds the outbox lock, so it
+    # picks the chunks up itself, see run_outbox
+    return []
+
+
+def promotion_chunk(payload):
+    return [chunk_message(payload)]
+
+
+def email(payload):
+    msg = Message(subject=payload['subject'], body=payload.get('body'), html=payload.get('html'))
+    return [address_message(msg, payload['recipients'])]
+
+
+# template name -> function building the messages of a payload
+TEMPLATES = {
+    "appointment_reminder": appointment_reminder,
+    "promotion": promotion,
+    "promotion_chunk": promotion_chunk,
+    "email": email,
+}
+
+# templates that add due outbox rows of their own when sent
+ENQUEUING_TEMPLATES = {"promotion"}
+
+
+def enqueue_notification(cursor, kind, payload, run_at=None, job_key=None, replace=True, requested_by=None):
+    """add a notification to the outbox, sent at run_at (now by default),
+    and return its id
+
+    runs on the caller's cursor so the row commits with the caller's
+    transaction; a row with the same job_key is replaced and sent again,
+    or kept as it is when replace is false. requested_by is the uid that
+    may read the row's status
+    """
+    if kind not in TEMPLATES:
+        raise ValueError(f"Unknown notification template {kind!r}")
+    query = upsert_notification if replace else insert_notification_once
+    cursor.execute(query, (kind, job_key, json.dumps(payload, default=str), run_at or datetime.now(), requested_by))
+    return cursor.lastrowid
+
+
+def enqueue_email(cursor, subject, recipients, body=None, html=None, requested_by=None):
+    """add an email rendered now to the outbox and return its id"""
+    payload = {"subject": subject, "recipients": recipients, "body": body, "html": html}
+    return enqueue_notification(cursor, "email", payload, requested_by=requested_by)
+
+
+def send_email(subject, recipients, body=None, html=None, requested_by=None):
+    """queue an email and return its outbox id without waiting for delivery
+
+    the outcome is recorded on the outbox row, see get_notification_status
+    """
+    conn = get_db_connection()
+    if conn is None:
+        raise ValueError("Database connection failed")
+    cursor = conn.cursor()
+    try:
+        notification_id = enqueue_email(cursor, subject, recipients, body, html, requested_by)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+    wake_dispatcher()
+    return notification_id
+
+
+def get_notification_status(notification_id, uid):
+    """return the delivery status of an outbox row queued by uid, or None"""
+    conn = get_db_connection()
+    if conn is None:
+        raise ValueError("Database connection failed")
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(query_notification_status, (notification_id, uid))
+        return cursor.fetchone()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def cancel_notification(cursor, job_key):
+    """cancel the pending notification with job_key, if any"""
+    cursor.execute(cancel_notification_key, (job_key,))
+
+
+def cancel_reminders(cursor, cid):
+    """cancel every pending appointment reminder of a customer"""
+    cursor.execute(cancel_customer_reminders, (f"Appointment:%:{cid}",))
+
+
+def retry_delay(attempts):
+    """seconds to wait before sending again after attempts failed sends"""
+    return OUTBOX_RETRY_SECONDS * 2 ** max(attempts - 1, 0)
+
+
+def dispatch_due(batch_size=OUTBOX_BATCH_SIZE):
+    """send the notifications that are due
+
+    returns a summary of the pass, or None when another process is
+    dispatching; enqueued counts sent rows that added due rows of their own
+    """
+    conn = get_db_connection()
+    if conn is None:
+        raise ValueError("Database connection failed")
+
+    cursor = conn.cursor(dictionary=True, buffered=True)
+    locked = False
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, 0) AS locked", (OUTBOX_LOCK_NAME,))
+        locked = cursor.fetchone()['locked'] == 1
+        if not locked:
+            return None
+
+        token = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        now = datetime.now()
+        cursor.execute(claim_due_notifications,
+                       (token, now + timedelta(seconds=OUTBOX_LEASE_SECONDS), now, now, batch_size))
+        conn.commit()
+        cursor.execute(query_claimed_notifications, (token,))
+        claimed = cursor.fetchall()
+
+        # queue every message of the batch before waiting, so the mail
+        # worker sends them over one connection
+        app = get_app()
+        mailer = get_mailer(app)
+        queued = []
+        with app.app_context():
+            for row in claimed:
+                try:
+                    messages = TEMPLATES[row['kind']](json.loads(row['payload']))
+                    queued.append((row, [mailer.submit(msg) for msg in messages]))
+                except Exception as err:
+                    queued.append((row, err))
+
+        sent = failed = enqueued = 0
+        for row, futures in queued:
+            try:
+                if isinstance(futures, Exception):
+                    raise futures
+                for future in futures:
+                    future.result()
+                cursor.execute(mark_notification_sent, (datetime.now(), row['id'], token))
+                sent += 1
+                if row['kind'] in ENQUEUING_TEMPLATES:
+                    enqueued += 1
+            except Exception as err:
+                print(f"[WARN] Notification {row['id']} failed (attempt {row['attempts']}): {err}")
+                status = 'failed' if row['attempts'] >= OUTBOX_MAX_ATTEMPTS else 'pending'
+                run_at = datetime.now() + timedelta(seconds=retry_delay(row['attempts']))
+                cursor.execute(mark_notification_failed, (status, run_at, str(err)[:1000], row['id'], token))
+                failed += 1
+            conn.commit()
+        return {
+            "claimed": len(claimed),
+            "sent": sent,
+            "failed": failed,
+            "enqueued": enqueued,
+            "finished_at": datetime.now().isoformat(),
+        }
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        if locked:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (OUTBOX_LOCK_NAME,))
+            cursor.fetchall()
+        cursor.close()
+        conn.close()
+
+
+def run_outbox():
+    """scheduler entry point: drain due notifications one batch at a time
+
+    a pass that enqueued rows is followed by another, since a wake sent
+    while this process holds the lock would find it taken
+    """
+    try:
+        while True:
+            summary = dispatch_due()
+            if not summary:
+                return
+            if summary["claimed"] < OUTBOX_BATCH_SIZE and not summary["enqueued"]:
+                return
+    except Exception as err:
+        print(f"[ERROR] Notification dispatch failed: {err}")
+
+
+_wake_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="outbox-wake")
+_wake_lock = threading.Lock()
+_wake_queued = False
+
+
+def _woken():
+    global _wake_queued
+    with _wake_lock:
+        _wake_queued = False
+    run_outbox()
+
+
+def wake_dispatcher():
+    """dispatch due notifications now, in the background, instead of at the
+    next poll; call after committing the rows"""
+    global _wake_queued
+    with _wake_lock:
+        if _wake_queued:
+            return
+        _wake_queued = True
+    _wake_executor.submit(_woken)
+
+
+def start_outbox_job(scheduler, interval_seconds=OUTBOX_POLL_SECONDS):
+    """poll the outbox now and every interval_seconds on scheduler"""
+    scheduler.add_job(
+        func=run_outbox,
+        trigger="interval",
+        seconds=interval_seconds,
+        id=OUTBOX_JOB_ID,
+        next_run_time=datetime.now(),
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True,
+    )
@@ -6,11 +6,27 @@ where c.cid = %s;
 """
 
 query_customers_business = """
-select u.uid, c.cid, u.first_name, u.last_name, auth.email
+select distinct u.uid, c.cid, u.first_name, u.last_name, auth.email
 from salon_app.customers c
 join salon_app.appointments a on c.cid=a.cid
 join salon_app.users u on c.uid=u.uid
 join salon_app.authenticate auth on u.uid=auth.uid
 join salon_app.services s on a.sid=s.sid
 where s.bid=%s;
-"""
\ No newline at end of file
+"""
+# customers with an appointment at the business who accept promotion emails
+query_promotion_audience = """
+select c.cid, u.first_name, u.last_name, auth.email
+from salon_app.customers c
+join salon_app.email_subscription es on es.cid=c.cid
+join salon_app.users u on c.uid=u.uid
+join salon_app.authenticate auth on u.uid=auth.uid
+where es.promotion = true
+and exists (
+    select 1
+    from salon_app.appointments a
+    join salon_app.services s on a.sid=s.sid
+    where a.cid=c.cid and s.bid=%s
+)
+order by c.cid;
+"""
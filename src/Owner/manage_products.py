@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
 from mysql.connector import Error
+from helper.blobstore import image_url, store_image
 from .owner_func import *
 
 manage_products = Blueprint("manage_products", __name__, url_prefix='/owner')
@@ -54,7 +55,7 @@ def add_new_product():
         price = data["price"]
         stock = data["stock"]
         description = data.get("description")
-        image = data.get("image")
+        image = store_image(data.get("image"))
         
         pid = add_product(bid, name, price, stock, description, image)
         
@@ -66,7 +67,7 @@ def add_new_product():
                 "price": float(price),
                 "stock": stock,
                 "description": description,
-                "image": image
+                "image": image_url(image)
             }
         }), 201
     except ValueError as e:
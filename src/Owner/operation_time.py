@@ -3,6 +3,7 @@ from flask_login import current_user, login_required
 from mysql.connector import Error
 from datetime import datetime, time
 from helper.utils import *
+from src.Appointments.availability import invalidate_all
 
 operation = Blueprint('operation', __name__, url_prefix='/operation')
 
@@ -109,6 +110,7 @@ def insert_hours():
         cursor.execute(insert_hours_of_operation, param)
         id = cursor.lastrowid
         conn.commit()
+        invalidate_all()
         return jsonify({
             "status":"success",
             "message":"inserted hours of operation",
@@ -156,6 +158,7 @@ def delete_slot():
         """
         cursor.execute(delete_time_slot, [id])
         conn.commit()
+        invalidate_all()
         return jsonify({
             "status":"success",
             "message":"time slot deleted"
@@ -1,27 +1,14 @@
 import os
-import base64
 from dotenv import load_dotenv
 import mysql.connector
 from mysql.connector import Error
+from helper.utils import get_db_connection, get_curr_bid
+from helper.blobstore import image_url, store_image
+from helper.image_variants import schedule_variants
 from .queries import *
 
 load_dotenv()
 
-def get_db_connection():
-    """create database connection"""
-    try:
-        connection = mysql.connector.connect(
-            host=os.getenv('DB_HOST'),
-            user=os.getenv('DB_USER'),
-            port=int(os.getenv("DB_PORT")),
-            password=os.getenv('DB_PASSWORD'),
-            database=os.getenv('DB_NAME')
-        )
-        return connection
-    except Error as e:
-        print(f"Error connecting to MySQL: {e}")
-        return None
-
 def get_salon_details_by_uid(uid):
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True, buffered=True)
@@ -63,11 +50,7 @@ def get_products_by_bid(bid):
         products = cursor.fetchall()
         
         for product in products:
-            if product.get('image'):
-                image_data = product['image'].decode('utf-8') if isinstance(product['image'], bytes) else product['image']
-                product['image'] = image_data
-            else:
-                product['image'] = None
+            product['image'] = image_url(product.get('image'))
         
         return products
     except Error as e:
@@ -79,6 +62,9 @@ def get_products_by_bid(bid):
             conn.close()
 
 def add_product(bid, name, price, stock, description=None, image=None):
+    """insert a product and return its pid; a base64 image is moved to the
+    blob store and only its key saved"""
+    image = store_image(image)
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True, buffered=True)
     cursor.execute(create_product, [bid, name, price, stock, description, image])
@@ -86,6 +72,7 @@ def add_product(bid, name, price, stock, description=None, image=None):
     pid = cursor.lastrowid
     cursor.close()
     conn.close()
+    schedule_variants(image)
     return pid
 
 def update_product_stock_by_pid(pid, stock):
@@ -104,9 +91,8 @@ def get_product_by_id(pid):
         cursor.execute(get_product_by_id_query, (pid,))
         product = cursor.fetchone()
         
-        if product and product.get('image'):
-            image_data = product['image'].decode('utf-8') if isinstance(product['image'], bytes) else product['image']
-            product['image'] = image_data
+        if product:
+            product['image'] = image_url(product.get('image'))
         
         return product
     except Error as e:
@@ -124,29 +110,3 @@ def delete_product_by_pid(pid):
     conn.commit()
     cursor.close()
     conn.close()
-
-def get_curr_bid():
-    from flask_login import current_user
-    uid = getattr(current_user, "id", None)
-    if uid is None:
-        raise ValueError("Current user is not logged in")
-
-    conn = get_db_connection()
-    if conn is None:
-        raise ValueError("Database connection failed")
-
-    try:
-        cursor = conn.cursor(dictionary=True, buffered=True)
-        cursor.execute("SELECT bid FROM business WHERE uid = %s", (uid,))
-        row = cursor.fetchone()
-        cursor.close()
-        conn.close()
-
-        if not row or row["bid"] is None:
-            raise ValueError("Business ID not found for current user")
-        return row["bid"]
-    except Exception as e:
-        conn.close()
-        raise e
-
-
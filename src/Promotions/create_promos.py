@@ -4,39 +4,20 @@ import mysql.connector
 from flask_login import current_user, login_required
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
-from src.extensions import scheduler
 from src.Notifications.notification_func import *
+from src.Notifications.outbox import enqueue_notification
+from src.Notifications.fanout import promotion_key, promotion_progress
 import os
 from .promo_func import *
+from helper.utils import get_db_connection
+from src.Clients.pricing import invalidate_rules
 
 load_dotenv()
 
 promotions = Blueprint('promotions', __name__)
 
 def get_db():
-
-    try:
-        db = mysql.connector.connect(
-            host=os.getenv("DB_HOST"),
-            user=os.getenv("DB_USER"),
-            port=int(os.getenv("DB_PORT")),
-            password=os.getenv("DB_PASSWORD"),
-            database=os.getenv("DB_NAME")
-            )
-        return db
-    except mysql.connector.Error as err:
-        print(f"Error: Database could not connect. : {err}")
-        return None
-
-def send_promo(msg, email):
-    from app import app
-    from flask import current_app
-    try:
-        app_context = current_app._get_current_object()
-    except RuntimeError:
-        app_context = app
-    with app_context.app_context():
-        email_message(current_app._get_current_object(),msg,email)
+    return get_db_connection()
 
 #Owners can create promotions
 @promotions.route("/api/owner/create-promotion", methods=["POST"])
@@ -111,22 +92,19 @@ def create_promos():
          """
         cursor.execute(query, (lprog_id, title, start_date, end_date, is_recurring, recurr_days, start_time, end_time, description))
         promo_id = cursor.lastrowid
-        db.commit() 
-        
+
         cursor.execute("select b.bid, b.name from business b join users u on b.uid=u.uid where u.uid=%s",[current_user.id])
         row = cursor.fetchone()
-        msg = create_promo_message(title, description, row[1])
-        customers = get_business_customers(row[0])
-        send_to = []
-        for c in customers:
-            if check_promotion_subscription(c['cid']):
-                send_to.append(c['email'])
-        scheduler.add_job(
-            func=lambda:send_promo(msg,send_to),
-            trigger='date',
-            run_date=datetime.now()+timedelta(seconds=30),
-            id=f"Promotion:{promo_id}:{row[0]}"
+        # the audience is resolved when the email is sent, the request does not wait for it
+        enqueue_notification(
+            cursor,
+            "promotion",
+            {"promo_id": promo_id, "bid": row[0], "title": title, "description": description, "business": row[1]},
+            run_at=datetime.now()+timedelta(seconds=30),
+            job_key=promotion_key(promo_id, row[0])
         )
+        db.commit() 
+        invalidate_rules(bid)
 
         return jsonify({"message": "Promotion created successfully.", "promotion_id":promo_id}), 201
     except mysql.connector.Error as err:
@@ -141,3 +119,32 @@ def create_promos():
             db.close()
 
 
+
+#Owners can follow the emails of a promotion
+@promotions.route("/api/owner/promotions/<int:promo_id>/progress", methods=["GET"])
+@login_required
+def get_promotion_progress(promo_id):
+    bid = get_curr_bid()
+    db = None
+    cursor = None
+    try:
+        db = get_db()
+        if db is None:
+            return jsonify({"message": "Could not connect to database."}), 500
+        cursor = db.cursor(buffered=True)
+        cursor.execute("""
+        select p.promo_id
+        from promotions p join loyalty_programs l on p.lprog_id=l.lprog_id
+        where p.promo_id=%s and l.bid=%s;
+        """, (promo_id, bid))
+        if cursor.fetchone() is None:
+            return jsonify({"message": "Promotion not found."}), 404
+        return jsonify(promotion_progress(promo_id)), 200
+    except mysql.connector.Error as err:
+        print(f"Error: Could not fetch promotion progress. : {err}")
+        return jsonify({"message": "Failed to fetch promotion progress."}), 500
+    finally:
+        if cursor:
+            cursor.close()
+        if db:
+            db.close()
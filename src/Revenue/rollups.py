@@ -0,0 +1,110 @@
+# per-business revenue counters in revenue_daily and monthly_revenue, bumped
+# in the same database transaction as every insert into transactions so reads
+# never scan transactions
+insert_transaction = """
+    INSERT INTO transactions (cid, bid, aid, pid, amount, payment_method_id)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+# multi-row forms, {rows} is one placeholder group per row
+insert_transactions = """
+    INSERT INTO transactions (cid, bid, aid, pid, amount, payment_method_id)
+    VALUES {rows}
+"""
+
+upsert_revenue_daily = """
+    INSERT INTO revenue_daily (bid, day, revenue, trans_count)
+    VALUES (%s, CURDATE(), %s, 1)
+    ON DUPLICATE KEY UPDATE revenue = revenue + VALUES(revenue), trans_count = trans_count + 1
+"""
+
+upsert_monthly_revenue = """
+    INSERT INTO monthly_revenue (bid, year, month, revenue)
+    VALUES (%s, YEAR(CURDATE()), MONTH(CURDATE()), %s)
+    ON DUPLICATE KEY UPDATE revenue = revenue + VALUES(revenue)
+"""
+
+upsert_revenue_daily_many = """
+    INSERT INTO revenue_daily (bid, day, revenue, trans_count)
+    VALUES {rows}
+    ON DUPLICATE KEY UPDATE revenue = revenue + VALUES(revenue), trans_count = trans_count + VALUES(trans_count)
+"""
+
+upsert_monthly_revenue_many = """
+    INSERT INTO monthly_revenue (bid, year, month, revenue)
+    VALUES {rows}
+    ON DUPLICATE KEY UPDATE revenue = revenue + VALUES(revenue)
+"""
+
+# today, this ISO week, this month and this year of one business, read from
+# at most a year of revenue_daily rows by primary key
+query_business_revenue = """
+    SELECT
+        COALESCE(SUM(CASE WHEN day = CURDATE() THEN revenue END), 0) AS daily,
+        COALESCE(SUM(CASE WHEN day >= CURDATE() - INTERVAL WEEKDAY(CURDATE()) DAY THEN revenue END), 0) AS weekly,
+        COALESCE(SUM(CASE WHEN day >= CURDATE() - INTERVAL (DAYOFMONTH(CURDATE()) - 1) DAY THEN revenue END), 0) AS monthly,
+        COALESCE(SUM(CASE WHEN day >= MAKEDATE(YEAR(CURDATE()), 1) THEN revenue END), 0) AS yearly
+    FROM revenue_daily
+    WHERE bid = %s
+    AND day >= LEAST(MAKEDATE(YEAR(CURDATE()), 1), CURDATE() - INTERVAL WEEKDAY(CURDATE()) DAY)
+"""
+
+
+def record_revenue(cursor, bid, amount):
+    """add amount to today's and this month's revenue of bid"""
+    if bid is None or not amount:
+        return
+    cursor.execute(upsert_revenue_daily, (bid, float(amount)))
+    cursor.execute(upsert_monthly_revenue, (bid, float(amount)))
+
+
+def record_transaction(cursor, cid, bid, amount, aid=None, pid=None, payment_method_id=None):
+    """insert a transactions row and update the revenue rollups, return its id
+
+    the caller commits, so the row and the counters land together or not at all
+    """
+    cursor.execute(insert_transaction, (cid, bid, aid, pid, float(amount), payment_method_id))
+    trans_id = cursor.lastrowid
+    record_revenue(cursor, bid, amount)
+    return trans_id
+
+
+def record_transactions(cursor, rows):
+    """insert (cid, bid, amount, aid, pid, payment_method_id) rows into
+    transactions and update the revenue rollups, a statement per table
+
+    the caller commits
+    """
+    if not rows:
+        return
+    params = []
+    totals = {}
+    for cid, bid, amount, aid, pid, payment_method_id in rows:
+        params.extend((cid, bid, aid, pid, float(amount), payment_method_id))
+        if bid is not None and amount:
+            revenue, count = totals.get(bid, (0.0, 0))
+            totals[bid] = (revenue + float(amount), count + 1)
+    cursor.execute(insert_transactions.format(rows=", ".join(["(%s, %s, %s, %s, %s, %s)"] * len(rows))), params)
+
+    if not totals:
+        return
+    bids = sorted(totals)
+    cursor.execute(
+        upsert_revenue_daily_many.format(rows=", ".join(["(%s, CURDATE(), %s, %s)"] * len(bids))),
+        [value for bid in bids for value in (bid, totals[bid][0], totals[bid][1])],
+    )
+    cursor.execute(
+        upsert_monthly_revenue_many.format(rows=", ".join(["(%s, YEAR(CURDATE()), MONTH(CURDATE()), %s)"] * len(bids))),
+        [value for bid in bids for value in (bid, totals[bid][0])],
+    )
+
+
+def business_revenue(cursor, bid):
+    """return {daily, weekly, monthly, yearly} revenue of bid"""
+    cursor.execute(query_business_revenue, (bid,))
+    row = cursor.fetchone()
+    if not row:
+        return {"daily": 0.0, "weekly": 0.0, "monthly": 0.0, "yearly": 0.0}
+    if not isinstance(row, dict):
+        row = dict(zip(("daily", "weekly", "monthly", "yearly"), row))
+    return {key: float(row[key] or 0) for key in ("daily", "weekly", "monthly", "yearly")}
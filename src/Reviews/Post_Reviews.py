@@ -4,6 +4,8 @@ from flask_login import login_required, current_user
 import mysql.connector
 from dotenv import load_dotenv
 import os
+from datetime import datetime
+from helper.utils import get_db_connection
 
 load_dotenv()
 
@@ -14,19 +16,7 @@ post_reviews = Blueprint('post_reviews', __name__)
 
 
 def get_db():
-
-    try:
-        db = mysql.connector.connect(
-            host=os.getenv("DB_HOST"),
-            user=os.getenv("DB_USER"),
-            port=int(os.getenv("DB_PORT")),
-            password=os.getenv("DB_PASSWORD"),
-            database=os.getenv("DB_NAME")
-            )
-        return db
-    except mysql.connector.Error as err:
-        print(f"Error: Database could not connect. : {err}")
-        return None
+    return get_db_connection()
 
 
 
@@ -85,8 +75,159 @@ def get_cid():
         cursor.close()
         db.close()
 
+REVIEWS_PAGE_DEFAULT = 50
+REVIEWS_PAGE_MAX = 100
+
+# reviews without a created_at come after every dated one, ordered by id;
+# a cursor into them holds this in place of the date
+UNDATED_CURSOR = "null"
+
+reviews_select = """
+    SELECT r.rvw_id, r.rating, r.comment, r.created_at,
+           u.first_name, u.last_name, r.cid
+    FROM reviews r
+    JOIN customers c ON r.cid = c.cid
+    JOIN users u ON c.uid = u.uid
+    WHERE r.bid = %s
+"""
+
+
+def parse_review_page_args(args):
+    """return (after, limit) from ?after=<created_at,rvw_id>&limit=
+
+    after is (created_at, rvw_id), with created_at None for a cursor into
+    the undated reviews. both are None when neither is given, so the whole list is returned as
+    before paging; with only after the default limit applies. raise
+    ValueError on a malformed cursor or limit
+    """
+    raw_limit = args.get("limit")
+    after = args.get("after")
+    if raw_limit is None and not after:
+        return None, None
+
+    limit = REVIEWS_PAGE_DEFAULT
+    if raw_limit is not None:
+        try:
+            limit = int(raw_limit)
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            raise ValueError("limit must be a positive integer")
+        limit = min(limit, REVIEWS_PAGE_MAX)
+
+    if not after:
+        return None, limit
+    created_at, _, rvw_id = after.rpartition(",")
+    try:
+        if created_at == UNDATED_CURSOR:
+            return (None, int(rvw_id)), limit
+        return (datetime.fromisoformat(created_at), int(rvw_id)), limit
+    except ValueError:
+        raise ValueError("after must be '<created_at>,<rvw_id>'")
+
+
+def fetch_review_rows(cursor, bid, after=None, limit=None):
+    """return up to limit + 1 review rows after the cursor, dated ones
+    newest first and then the undated ones
+
+    each segment is read with its own query on plain columns, so both walk
+    the (bid, created_at, rvw_id) index instead of sorting every review
+    """
+    rows = []
+    if after is None or after[0] is not None:
+        query = reviews_select + " AND r.created_at IS NOT NULL"
+        params = [bid]
+        if after:
+            query += " AND (r.created_at < %s OR (r.created_at = %s AND r.rvw_id < %s))"
+            params += [after[0], after[0], after[1]]
+        query += " ORDER BY r.created_at DESC, r.rvw_id DESC"
+        if limit is not None:
+            query += " LIMIT %s"
+            params.append(limit + 1)
+        cursor.execute(query, params)
+        rows = list(cursor.fetchall())
+        if limit is not None and len(rows) > limit:
+            return rows
+
+    query = reviews_select + " AND r.created_at IS NULL"
+    params = [bid]
+    if after and after[0] is None:
+        query += " AND r.rvw_id < %s"
+        params.append(after[1])
+    query += " ORDER BY r.rvw_id DESC"
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit + 1 - len(rows))
+    cursor.execute(query, params)
+    return rows + list(cursor.fetchall())
+
+
+def fetch_reviews_page(cursor, bid, after=None, limit=None):
+    """return (formatted reviews, next cursor) for one page of a business's
+    reviews, or for all of them when limit is None
+
+    reviews are keyset-paginated newest first and the latest reply of every
+    review on the page is loaded with one query, so the cost of a page does
+    not grow with the total number of reviews
+    """
+    reviews = fetch_review_rows(cursor, bid, after, limit)
+    has_more = limit is not None and len(reviews) > limit
+    if limit is not None:
+        reviews = reviews[:limit]
+
+    replies = {}
+    if reviews:
+        placeholders = ", ".join(["%s"] * len(reviews))
+        replies_query = f"""
+        SELECT rvw_id, comment, created_at, first_name, last_name
+        FROM (
+            SELECT rr.rvw_id, rr.comment, rr.created_at, u.first_name, u.last_name,
+                   ROW_NUMBER() OVER (PARTITION BY rr.rvw_id ORDER BY rr.created_at DESC) AS rn
+            FROM review_replies rr
+            JOIN users u ON rr.uid = u.uid
+            WHERE rr.rvw_id IN ({placeholders})
+        ) latest
+        WHERE rn = 1
+        """
+        cursor.execute(replies_query, [r['rvw_id'] for r in reviews])
+        for reply in cursor.fetchall():
+            replies[reply['rvw_id']] = {
+                'text': reply['comment'],
+                'createdAt': reply['created_at'].isoformat() if reply['created_at'] else None,
+                'ownerName': f"{reply['first_name']} {reply['last_name']}"
+            }
+
+    formatted_reviews = [{
+        'id': str(r['rvw_id']),
+        'reviewerName': f"{r['first_name']} {r['last_name']}",
+        'rating': r['rating'],
+        'comment': r['comment'],
+        'createdAt': r['created_at'].isoformat() if r['created_at'] else None,
+        'reply': replies.get(r['rvw_id'])
+    } for r in reviews]
+
+    next_cursor = None
+    if has_more:
+        last = reviews[-1]
+        created_at = last['created_at'].isoformat() if last['created_at'] else UNDATED_CURSOR
+        next_cursor = f"{created_at},{last['rvw_id']}"
+    return formatted_reviews, next_cursor
+
+
+def reviews_response(formatted_reviews, next_cursor):
+    """list body as before, with the next page cursor in X-Next-Cursor"""
+    response = jsonify(formatted_reviews)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response, 200
+
 @post_reviews.route("/api/client/get-reviews/<int:business_id>", methods=["GET"])
 def get_business_reviews_public(business_id):
+    try:
+        after, limit = parse_review_page_args(request.args)
+    except ValueError as err:
+        return jsonify({"message": str(err)}), 400
+
     db = None
     cursor = None
     
@@ -96,53 +237,8 @@ def get_business_reviews_public(business_id):
             return jsonify({"message": "Could not connect to database."}), 500
         
         cursor = db.cursor(dictionary=True, buffered=True)
-        
-        # Get reviews with customer names
-        reviews_query = """
-        SELECT r.rvw_id, r.rating, r.comment, r.created_at,
-               u.first_name, u.last_name, r.cid
-        FROM reviews r
-        JOIN customers c ON r.cid = c.cid
-        JOIN users u ON c.uid = u.uid
-        WHERE r.bid = %s
-        ORDER BY r.created_at DESC
-        """
-        cursor.execute(reviews_query, (business_id,))
-        reviews = cursor.fetchall()
-        
-        # For each review, get replies
-        for review in reviews:
-            replies_query = """
-            SELECT rr.comment, rr.created_at, u.first_name, u.last_name
-            FROM review_replies rr
-            JOIN users u ON rr.uid = u.uid
-            WHERE rr.rvw_id = %s
-            ORDER BY rr.created_at DESC
-            LIMIT 1
-            """
-            cursor.execute(replies_query, (review['rvw_id'],))
-            reply = cursor.fetchone()
-            
-            if reply:
-                review['reply'] = {
-                    'text': reply['comment'],
-                    'createdAt': reply['created_at'].isoformat() if reply['created_at'] else None,
-                    'ownerName': f"{reply['first_name']} {reply['last_name']}"
-                }
-            else:
-                review['reply'] = None
-        
-        # Format response
-        formatted_reviews = [{
-            'id': str(r['rvw_id']),
-            'reviewerName': f"{r['first_name']} {r['last_name']}",
-            'rating': r['rating'],
-            'comment': r['comment'],
-            'createdAt': r['created_at'].isoformat() if r['created_at'] else None,
-            'reply': r['reply']
-        } for r in reviews]
-        
-        return jsonify(formatted_reviews), 200
+        formatted_reviews, next_cursor = fetch_reviews_page(cursor, business_id, after, limit)
+        return reviews_response(formatted_reviews, next_cursor)
         
     except mysql.connector.Error as err:
         print(f"Error fetching reviews: {err}")
@@ -161,6 +257,11 @@ def get_business_reviews():
     
     if not bid:
         return jsonify({"message": "Business not found for current user."}), 404
+
+    try:
+        after, limit = parse_review_page_args(request.args)
+    except ValueError as err:
+        return jsonify({"message": str(err)}), 400
     
     db = None
     cursor = None
@@ -171,53 +272,8 @@ def get_business_reviews():
             return jsonify({"message": "Could not connect to database."}), 500
         
         cursor = db.cursor(dictionary=True, buffered=True)
-        
-        # Get reviews with customer names
-        reviews_query = """
-        SELECT r.rvw_id, r.rating, r.comment, r.created_at,
-               u.first_name, u.last_name, r.cid
-        FROM reviews r
-        JOIN customers c ON r.cid = c.cid
-        JOIN users u ON c.uid = u.uid
-        WHERE r.bid = %s
-        ORDER BY r.created_at DESC
-        """
-        cursor.execute(reviews_query, (bid,))
-        reviews = cursor.fetchall()
-        
-        # For each review, get replies
-        for review in reviews:
-            replies_query = """
-            SELECT rr.comment, rr.created_at, u.first_name, u.last_name
-            FROM review_replies rr
-            JOIN users u ON rr.uid = u.uid
-            WHERE rr.rvw_id = %s
-            ORDER BY rr.created_at DESC
-            LIMIT 1
-            """
-            cursor.execute(replies_query, (review['rvw_id'],))
-            reply = cursor.fetchone()
-            
-            if reply:
-                review['reply'] = {
-                    'text': reply['comment'],
-                    'createdAt': reply['created_at'].isoformat() if reply['created_at'] else None,
-                    'ownerName': f"{reply['first_name']} {reply['last_name']}"
-                }
-            else:
-                review['reply'] = None
-        
-        # Format response
-        formatted_reviews = [{
-            'id': str(r['rvw_id']),
-            'reviewerName': f"{r['first_name']} {r['last_name']}",
-            'rating': r['rating'],
-            'comment': r['comment'],
-            'createdAt': r['created_at'].isoformat() if r['created_at'] else None,
-            'reply': r['reply']
-        } for r in reviews]
-        
-        return jsonify(formatted_reviews), 200
+        formatted_reviews, next_cursor = fetch_reviews_page(cursor, bid, after, limit)
+        return reviews_response(formatted_reviews, next_cursor)
         
     except mysql.connector.Error as err:
         print(f"Error fetching reviews: {err}")
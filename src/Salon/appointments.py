@@ -3,6 +3,8 @@ from flask_login import current_user, login_required
 from mysql.connector import Error
 from helper.utils import *
 from .queries import *
+from src.Appointments.availability import invalidate_worker_day
+from src.Notifications.outbox import cancel_notification
 from datetime import datetime
 
 business_appointments = Blueprint("business_appointments", __name__, url_prefix="/business/appointments")
@@ -148,7 +150,9 @@ def cancel_appointment(aid):
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute(delete_appointment, [aid])
+        cancel_notification(cursor, f"Appointment:{aid}:{appointment['cid']}")
         conn.commit()
+        invalidate_worker_day(appointment['eid'], appointment['start_time'])
         return jsonify({
             "status":"success",
             "message":"deleted appointment",
@@ -4,6 +4,7 @@ from mysql.connector import Error
 from helper.utils import get_db_connection, check_role
 import os
 from .salon_func import *
+from src.Auth.User import invalidate_user
 
 approve_workers = Blueprint("approve_workers", __name__, url_prefix="/worker")
 
@@ -116,8 +117,12 @@ def approve_worker(eid):
     try:
         db = get_db_connection()
         cursor = db.cursor(buffered=True)
+        cursor.execute("SELECT uid FROM employee WHERE eid=%s", (eid,))
+        row = cursor.fetchone()
         cursor.execute("UPDATE employee SET approved=TRUE WHERE eid=%s", (eid,))
         db.commit()
+        if row:
+            invalidate_user(row[0])
         return jsonify({"message": "Worker approved"}), 200
     except mysql.connector.Error as e:
         print(f"Database Error {e}")
@@ -154,8 +159,12 @@ def reject_worker(eid):
     try:
         db = get_db_connection()
         cursor = db.cursor(buffered=True)
+        cursor.execute("SELECT uid FROM employee WHERE eid=%s", (eid,))
+        row = cursor.fetchone()
         cursor.execute("DELETE FROM employee WHERE eid=%s", (eid,))
         db.commit()
+        if row:
+            invalidate_user(row[0])
         return jsonify({"message": "Worker rejected"})
     except mysql.connector.Error as e:
         print(f"Database Error {e}")
@@ -4,6 +4,7 @@ import mysql.connector
 from dotenv import load_dotenv
 import os
 from flask_login import login_required, current_user
+from helper.utils import get_db_connection
 
 
 load_dotenv()
@@ -15,19 +16,7 @@ visit_hist = Blueprint('visit_hist', __name__)
 
 
 def get_db():
-
-    try:
-        db = mysql.connector.connect(
-            host=os.getenv("DB_HOST"),
-            user=os.getenv("DB_USER"),
-            port=int(os.getenv("DB_PORT")),
-            password=os.getenv("DB_PASSWORD"),
-            database=os.getenv("DB_NAME")
-            )
-        return db
-    except mysql.connector.Error as err:
-        print(f"Error: Database could not connect. : {err}")
-        return None
+    return get_db_connection()
 
 #get current logged-in owner's business id
 def get_current_owner_bid():
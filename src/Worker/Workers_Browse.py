@@ -3,6 +3,7 @@ from flask_cors import CORS
 import mysql.connector
 from dotenv import load_dotenv
 import os
+from helper.utils import get_db_connection
 
 
 load_dotenv()
@@ -10,17 +11,6 @@ load_dotenv()
 workers_browse = Blueprint('workers', __name__)
 
 
-db = mysql.connector.connect(
-    host=os.getenv("DB_HOST"),
-    user=os.getenv("DB_USER"),
-    port=int(os.getenv("DB_PORT")),
-    password=os.getenv("DB_PASSWORD"),
-    database=os.getenv("DB_NAME")
-)
-
-cursor = db.cursor()
-
-
 #workers can browse previous appointments
 @workers_browse.route("/api/workers/view-prev-appointments", methods=["GET"])
 def worker_view_appoints():
@@ -32,8 +22,14 @@ join customers c on a.cid = c.cid
 join services s on a.sid = s.sid
 join users u on c.uid = u.uid
 """
-    cursor.execute(query)
-    rows = cursor.fetchall()    
+    db = get_db_connection()
+    cursor = db.cursor()
+    try:
+        cursor.execute(query)
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+        db.close()
     appointments = [{"appointment_id": row[0], "service_name": row[1], 
                 "service_price": row[2], "first_name": row[3],
                 "last_name": row[4], "customer_id": row[5],
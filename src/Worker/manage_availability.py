@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
 from .worker_func import *
 from datetime import timedelta
+from src.Appointments.availability import invalidate_worker
 
 worker_avail = Blueprint("worker_avail",__name__,url_prefix='/worker')
 
@@ -82,6 +83,7 @@ def save_availability():
             }), 400
         
         insert_avail(eid, week_data)
+        invalidate_worker(eid)
 
         return jsonify({
             "status": "Success",
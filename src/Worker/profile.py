@@ -4,7 +4,9 @@ from mysql.connector import Error
 from helper.utils import *
 from .queries import *
 import re
-import base64
+from helper.blobstore import UploadError, image_url, store_upload
+from helper.image_variants import CARD_SIZE, schedule_variants, variant_for
+from src.Auth.User import invalidate_user
 
 profile = Blueprint("profile", __name__, url_prefix='/employee')
 
@@ -32,12 +34,7 @@ def get_employee_profile(eid):
                     "message": "employee not found"
                 }), 404
 
-            profile_picture = info.get('profile_picture')
-            if profile_picture:
-                if isinstance(profile_picture, bytes):
-                    info['profile_picture'] = f"data:image/jpeg;base64,{profile_picture.decode('utf-8')}"
-                else:
-                    info['profile_picture'] = f"data:image/jpeg;base64,{profile_picture}"
+            info['profile_picture'] = image_url(info.get('profile_picture'))
         except mysql.connector.Error as e:
             print(f"Database Error {e}")
             return jsonify({
@@ -114,15 +111,12 @@ def get_employee_pictures(eid):
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
-        cursor.execute(query_employee_images, [eid])
+        variant = variant_for(request.args.get("image_size", CARD_SIZE, type=int))
+        cursor.execute(query_employee_images, [variant, eid])
         images = cursor.fetchall()
 
         for image in images:
-            if image['picture']:
-                if isinstance(image['picture'], bytes):
-                    image['picture'] = f"data:image/jpeg;base64,{image['picture'].decode('utf-8')}"
-                else:
-                    image['picture'] = f"data:image/jpeg;base64,{image['picture']}"
+            image['picture'] = image_url(image.pop('picture_variant') or image['picture'])
                     
         return jsonify(images), 200
 
@@ -319,6 +313,7 @@ def update_name():
         cursor = conn.cursor()
         cursor.execute(update_employee_name, [nameList[0], nameList[1], eid])
         conn.commit()
+        invalidate_user(current_user.id)
         return jsonify({
             "status":"success",
             "message":"updated employee name",
@@ -387,6 +382,7 @@ def update_business():
             bid = result[0]
         cursor.execute(update_employee_business, [bid, eid])
         conn.commit()
+        invalidate_user(current_user.id)
         return jsonify({
             "status":"success",
             "message":"updated employee business",
@@ -494,22 +490,24 @@ def upload_profile_image():
     conn = None
     cursor = None
     try:
-        image_data = file.read()
-        image_base64 = base64.b64encode(image_data).decode('utf-8')
-        
-        mime_type = file.content_type or 'image/jpeg'
-        if not mime_type.startswith('image/'):
-            mime_type = 'image/jpeg'
+        image_key = store_upload(file)
         
         conn = get_db_connection()
         cursor = conn.cursor()
-        cursor.execute(update_profile_picture, [image_base64, eid])
+        cursor.execute(update_profile_picture, [image_key, eid])
         conn.commit()
+        schedule_variants(image_key)
         return jsonify({
             "status":"success",
             "message":"updated employee picture",
-            "employee id": eid
+            "employee id": eid,
+            "image": image_url(image_key)
         }), 200
+    except UploadError as e:
+        return jsonify({
+            "status":"failure",
+            "message":str(e)
+        }), e.status
     except mysql.connector.Error as e:
         print(f"Database Error {e}")
         return jsonify({
@@ -554,22 +552,24 @@ def upload_picture():
     conn = None
     cursor = None
     try:
-        image_data = file.read()
-        image_base64 = base64.b64encode(image_data).decode('utf-8')
-        
-        mime_type = file.content_type or 'image/jpeg'
-        if not mime_type.startswith('image/'):
-            mime_type = 'image/jpeg'
+        image_key = store_upload(file)
         
         conn = get_db_connection()
         cursor = conn.cursor()
-        cursor.execute(insert_employee_picture, [eid, image_base64])
+        cursor.execute(insert_employee_picture, [eid, image_key])
         conn.commit()
+        schedule_variants(image_key)
         return jsonify({
             "status":"success",
             "message":"inserted picture",
-            "employee id": eid
+            "employee id": eid,
+            "image": image_url(image_key)
         }), 200
+    except UploadError as e:
+        return jsonify({
+            "status":"failure",
+            "message":str(e)
+        }), e.status
     except mysql.connector.Error as e:
         print(f"Database Error {e}")
         return jsonify({
@@ -3,9 +3,10 @@ query_appointments = "select * from salon_app.appointments where eid = %s and st
 query_availability = "select * from salon_app.schedule where eid = %s"
 
 query_employee_images = """
-    select id, picture, active
-    from employee_work_pictures
-    where eid=%s;
+    select p.id, p.picture, v.variant_key as picture_variant, p.active
+    from employee_work_pictures p
+    left join image_variants v on v.blob_key = p.picture and v.variant = %s
+    where p.eid=%s;
 """
 
 query_employee_info = """
@@ -2,30 +2,18 @@ import os
 from dotenv import load_dotenv
 import mysql.connector
 from mysql.connector import Error
+from helper.utils import get_db_connection
 from .queries import query_eid, query_appointments, query_availability
 
 load_dotenv()
 
-def get_db_connection():
-    """create database connection"""
-    try:
-        connection = mysql.connector.connect(
-            host=os.getenv('DB_HOST'),
-            user=os.getenv('DB_USER'),
-            port=int(os.getenv("DB_PORT")),
-            password=os.getenv('DB_PASSWORD'),
-            database=os.getenv('DB_NAME')
-        )
-        return connection
-    except Error as e:
-        print(f"Error connecting to MySQL: {e}")
-        return None
-
 def get_eid(uid):
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True, buffered=True)
     cursor.execute(query_eid,[uid])
     result = cursor.fetchone()
+    cursor.close()
+    conn.close()
     return result
 
 def get_appointments(eid, date_filter=None):
@@ -67,6 +55,8 @@ def get_avail(eid):
     cursor = conn.cursor(dictionary=True, buffered=True)
     cursor.execute(query_availability,[eid])
     schedule = cursor.fetchall()
+    cursor.close()
+    conn.close()
     print(schedule)
     return schedule
 
@@ -0,0 +1,64 @@
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from src.Auth import User as user_module
+from src.Auth.User import invalidate_user, load_user, user_cache
+
+
+@pytest.fixture
+def queries(monkeypatch):
+    """count user_info queries, answering from a dict of uid -> row"""
+    rows = {"7": {"uid": 7, "email": "a@example.com", "first_name": "Ada", "last_name": "Lane", "role": "owner"}}
+    calls = []
+
+    def query_user(uid):
+        calls.append(uid)
+        return rows.get(str(uid))
+
+    monkeypatch.setattr(user_module, "query_user", query_user)
+    user_cache.clear()
+    yield rows, calls
+    user_cache.clear()
+
+
+class TestUserCache:
+    """Test cases for the flask-login user cache."""
+
+    def test_hit_skips_the_query(self, queries):
+        """Test a cached user is loaded without querying again."""
+        rows, calls = queries
+        first = load_user("7")
+        second = load_user("7")
+        assert calls == ["7"]
+        assert (second.id, second.email, second.role) == ("7", "a@example.com", "owner")
+        assert first.firstName == second.firstName == "Ada"
+
+    def test_miss_is_not_cached(self, queries):
+        """Test an unknown user is queried every time and never cached."""
+        rows, calls = queries
+        assert load_user("8") is None
+        assert load_user("8") is None
+        assert calls == ["8", "8"]
+        assert user_cache.get("8") is None
+
+    def test_invalidate_reloads_the_user(self, queries):
+        """Test an invalidated user is read again, picking up changes."""
+        rows, calls = queries
+        load_user("7")
+        rows["7"] = dict(rows["7"], role="employee")
+        assert load_user("7").role == "owner"
+        invalidate_user(7)
+        assert load_user("7").role == "employee"
+        assert calls == ["7", "7"]
+
+    def test_invalidated_deleted_user_is_signed_out(self, queries):
+        """Test a deleted user stops loading once invalidated."""
+        rows, calls = queries
+        load_user("7")
+        del rows["7"]
+        invalidate_user("7")
+        assert load_user("7") is None
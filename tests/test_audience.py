@@ -0,0 +1,53 @@
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.Notifications import audience
+
+
+class FakeCursor:
+    """serves rows in fetchmany batches and records the queries run"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+        self.closed = False
+
+    def execute(self, query, params=()):
+        self.queries.append((query, params))
+
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.closed = False
+
+    def cursor(self, dictionary=False):
+        return self._cursor
+
+    def close(self):
+        self.closed = True
+
+
+class TestPromotionAudience:
+    """Test cases for set-based promotion audience resolution"""
+
+    def test_audience_is_streamed_from_one_query(self, monkeypatch):
+        rows = [{"cid": i, "email": f"c{i}@example.com"} for i in range(5)]
+        cursor = FakeCursor(rows)
+        conn = FakeConnection(cursor)
+        monkeypatch.setattr(audience, "get_db_connection", lambda: conn)
+
+        batches = list(audience.iter_promotion_audience(7, batch_size=2))
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        assert cursor.queries == [(audience.query_promotion_audience, [7])]
+        assert cursor.closed and conn.closed
@@ -0,0 +1,259 @@
+import sys
+import os
+from datetime import date, datetime, timedelta
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.Appointments import availability
+from src.Appointments.availability import (
+    day_cache, invalidate_all, invalidate_worker, invalidate_worker_day, merge_intervals, worker_slots,
+)
+
+MONDAY = date(2025, 6, 2)
+
+
+def schedule(eid, day, start, finish):
+    return {"eid": eid, "day": day, "start_time": timedelta(hours=start), "finish_time": timedelta(hours=finish)}
+
+
+def appointment(eid, day, start, end):
+    return {"eid": eid,
+            "start_time": datetime.combine(day, datetime.min.time()) + timedelta(hours=start),
+            "expected_end_time": datetime.combine(day, datetime.min.time()) + timedelta(hours=end)}
+
+
+def hhmm(slots):
+    return [s.strftime("%H:%M") for s in slots]
+
+
+class FakeCursor:
+    """serves the worker, schedule, hours and appointment queries from lists"""
+
+    def __init__(self, schedule=(), hours=(), appointments=(), workers=()):
+        self.schedule = list(schedule)
+        self.hours = list(hours)
+        self.appointments = list(appointments)
+        self.workers = list(workers)
+        self.executed = []
+        self.result = []
+
+    def execute(self, query, params=()):
+        self.executed.append((query, params))
+        if "FROM schedule" in query:
+            self.result = [r for r in self.schedule if r["eid"] in params]
+        elif "FROM hours_of_operation" in query:
+            self.result = [r for r in self.hours if r["eid"] in params]
+        elif "FROM appointments" in query:
+            eids, (range_end, range_start) = params[:-2], params[-2:]
+            self.result = [a for a in self.appointments
+                           if a["eid"] in eids and a["start_time"] < range_end and a["expected_end_time"] > range_start]
+        elif "FROM employee e" in query:
+            self.result = [{k: v for k, v in w.items() if k != "sids"} for w in self.workers
+                           if "AND EXISTS" not in query or int(params[1]) in w["sids"]]
+        else:
+            self.result = []
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    invalidate_all()
+    yield
+    invalidate_all()
+
+
+class TestSlotEngine:
+    """Test cases for the worker slot engine."""
+
+    def test_merge_intervals(self):
+        """Test overlapping and touching intervals are merged."""
+        assert merge_intervals([(5, 7), (1, 3), (2, 4), (7, 8)]) == [(1, 4), (5, 8)]
+
+    def test_appointments_block_overlapping_slots(self):
+        """Test slots overlapping an appointment are skipped on the duration grid."""
+        cursor = FakeCursor([schedule(1, "monday", 9, 13)], appointments=[appointment(1, MONDAY, 10.5, 11)])
+        result = worker_slots(cursor, 1, MONDAY, MONDAY, 60)
+        assert hhmm(result[MONDAY]) == ["09:00", "11:00", "12:00"]
+
+    def test_business_hours_limit_schedule(self):
+        """Test slots are restricted to hours of operation and closed days have none."""
+        hours = [
+            {"eid": 1, "day": "monday", "open_time": timedelta(hours=10), "close_time": timedelta(hours=12), "is_closed": 0},
+            {"eid": 1, "day": "tuesday", "open_time": None, "close_time": None, "is_closed": 1},
+        ]
+        cursor = FakeCursor([schedule(1, "monday", 9, 17), schedule(1, "tuesday", 9, 17)], hours)
+        result = worker_slots(cursor, 1, MONDAY, MONDAY + timedelta(days=1), 60)
+        assert hhmm(result[MONDAY]) == ["10:00", "11:00"]
+        assert result[MONDAY + timedelta(days=1)] == []
+
+    def test_range_covers_every_day(self):
+        """Test a range returns each day, including days without a schedule."""
+        sunday = MONDAY + timedelta(days=6)
+        cursor = FakeCursor([schedule(1, "monday", 9, 13), schedule(1, "sunday", 12, 14)],
+                            appointments=[appointment(1, sunday, 12, 13)])
+        result = worker_slots(cursor, 1, MONDAY, sunday, 120)
+        assert len(result) == 7
+        assert hhmm(result[MONDAY]) == ["09:00", "11:00"]
+        assert result[sunday] == []
+
+    def test_other_workers_rows_are_ignored(self):
+        """Test one worker's appointments do not block another's slots."""
+        cursor = FakeCursor([schedule(1, "monday", 9, 11), schedule(2, "monday", 9, 11)],
+                            appointments=[appointment(2, MONDAY, 9, 11)])
+        assert hhmm(worker_slots(cursor, 1, MONDAY, MONDAY, 60)[MONDAY]) == ["09:00", "10:00"]
+
+
+class TestDayCache:
+    """Test cases for the cached day bitmaps."""
+
+    def test_cached_days_are_not_queried_again(self):
+        """Test a second read of the same days runs no query."""
+        cursor = FakeCursor([schedule(1, "monday", 9, 11)])
+        first = worker_slots(cursor, 1, MONDAY, MONDAY + timedelta(days=1), 60)
+        assert len(cursor.executed) == 3
+        assert worker_slots(cursor, 1, MONDAY, MONDAY + timedelta(days=1), 60) == first
+        assert len(cursor.executed) == 3
+
+    def test_only_missing_days_are_loaded(self):
+        """Test widening a cached range loads just the new day."""
+        cursor = FakeCursor([schedule(1, "monday", 9, 11)])
+        worker_slots(cursor, 1, MONDAY, MONDAY, 60)
+        cursor.executed.clear()
+        worker_slots(cursor, 1, MONDAY, MONDAY + timedelta(days=1), 60)
+        _, params = cursor.executed[-1]
+        tuesday = datetime.combine(MONDAY + timedelta(days=1), datetime.min.time())
+        assert params == [1, tuesday + timedelta(days=1), tuesday]
+
+    def test_booking_invalidates_the_day(self):
+        """Test a booked slot disappears once its day is invalidated, as the booking routes do."""
+        cursor = FakeCursor([schedule(1, "monday", 9, 11)])
+        assert hhmm(worker_slots(cursor, 1, MONDAY, MONDAY, 60)[MONDAY]) == ["09:00", "10:00"]
+
+        booked = appointment(1, MONDAY, 9, 10)
+        cursor.appointments.append(booked)
+        # until invalidated the cached bitmap is served
+        assert hhmm(worker_slots(cursor, 1, MONDAY, MONDAY, 60)[MONDAY]) == ["09:00", "10:00"]
+        invalidate_worker_day(1, booked["start_time"])
+        assert hhmm(worker_slots(cursor, 1, MONDAY, MONDAY, 60)[MONDAY]) == ["10:00"]
+
+    def test_rescheduling_invalidates_both_days(self):
+        """Test moving an appointment frees the old day and blocks the new one."""
+        tuesday = MONDAY + timedelta(days=1)
+        cursor = FakeCursor([schedule(1, "monday", 9, 10), schedule(1, "tuesday", 9, 10)],
+                            appointments=[appointment(1, MONDAY, 9, 10)])
+        before = worker_slots(cursor, 1, MONDAY, tuesday, 60)
+        assert (before[MONDAY], hhmm(before[tuesday])) == ([], ["09:00"])
+
+        old = cursor.appointments[0]["start_time"]
+        cursor.appointments = [appointment(1, tuesday, 9, 10)]
+        invalidate_worker_day(1, old)
+        invalidate_worker_day(1, cursor.appointments[0]["start_time"])
+        after = worker_slots(cursor, 1, MONDAY, tuesday, 60)
+        assert (hhmm(after[MONDAY]), after[tuesday]) == (["09:00"], [])
+
+    def test_invalidate_worker_drops_only_that_worker(self):
+        """Test a schedule change drops every day of that worker and no other."""
+        cursor = FakeCursor([schedule(1, "monday", 9, 10), schedule(2, "monday", 9, 10)])
+        worker_slots(cursor, 1, MONDAY, MONDAY + timedelta(days=1), 60)
+        worker_slots(cursor, 2, MONDAY, MONDAY, 60)
+        invalidate_worker(1)
+        assert day_cache.get((1, MONDAY)) is None
+        assert day_cache.get((1, MONDAY + timedelta(days=1))) is None
+        assert day_cache.get((2, MONDAY)) is not None
+
+    def test_is_free_checks_the_whole_duration(self):
+        """Test a start is free only when every cell of the duration is."""
+        cursor = FakeCursor([schedule(1, "monday", 9, 11)], appointments=[appointment(1, MONDAY, 10, 10.5)])
+        avail = availability.load_days(cursor, [1], [MONDAY])[(1, MONDAY)]
+        at = datetime.combine(MONDAY, datetime.min.time())
+        assert availability.is_free(avail, at + timedelta(hours=9), 60)
+        assert not availability.is_free(avail, at + timedelta(hours=9.5), 60)
+        assert availability.is_free(avail, at + timedelta(hours=10.5), 30)
+        assert not availability.is_free(avail, at + timedelta(hours=10.5), 60)
+
+
+def worker(eid, sids):
+    return {"employee_id": eid, "employee_first_name": f"W{eid}", "employee_last_name": "Lee",
+            "services": "Cut", "sids": sids}
+
+
+class TestAvailableWorkers:
+    """Test cases for resolving a business's available workers in one pass."""
+
+    AT = datetime.combine(MONDAY, datetime.min.time()) + timedelta(hours=10)
+
+    def cursor(self):
+        # 1 is scheduled and free, 2 is not scheduled on monday, 3 does not
+        # offer service 5, 4 has an appointment at 10:00
+        return FakeCursor(
+            schedule=[schedule(1, "monday", 9, 17), schedule(2, "tuesday", 9, 17),
+                      schedule(3, "monday", 9, 17), schedule(4, "monday", 9, 17)],
+            appointments=[appointment(4, MONDAY, 9.5, 10.5), appointment(1, MONDAY, 11, 12)],
+            workers=[worker(1, [5]), worker(2, [5]), worker(3, [6]), worker(4, [5])],
+        )
+
+    def ids(self, workers):
+        return [w["employee_id"] for w in workers]
+
+    def test_without_a_time_every_worker_is_returned(self):
+        """Test all approved workers come back when no time is asked."""
+        cursor = self.cursor()
+        assert self.ids(availability.available_workers(cursor, 3)) == [1, 2, 3, 4]
+        assert len(cursor.executed) == 1
+
+    def test_service_filter(self):
+        """Test only workers offering the service are returned."""
+        cursor = self.cursor()
+        assert self.ids(availability.available_workers(cursor, 3, sid=5)) == [1, 2, 4]
+
+    def test_only_scheduled_and_free_workers_at_a_time(self):
+        """Test unscheduled and booked workers are left out at the asked time."""
+        cursor = self.cursor()
+        assert self.ids(availability.available_workers(cursor, 3, sid=5, at=self.AT)) == [1]
+        assert self.ids(availability.available_workers(cursor, 3, at=self.AT)) == [1, 3]
+
+    def test_lookup_is_set_wise(self):
+        """Test every worker's day is loaded with one query per table, not one per worker."""
+        cursor = self.cursor()
+        availability.available_workers(cursor, 3, at=self.AT)
+        assert len(cursor.executed) == 4
+        _, params = cursor.executed[1]
+        assert params == [1, 2, 3, 4]
+
+    def test_outside_working_hours_nobody_is_free(self):
+        """Test a time outside every schedule returns no worker."""
+        cursor = self.cursor()
+        late = self.AT.replace(hour=18)
+        assert availability.available_workers(cursor, 3, at=late) == []
+
+    def test_route_lists_the_free_workers(self, monkeypatch):
+        """Test the endpoint answers with the free workers at the asked time."""
+        from app import app
+        from src.Appointments import get_available_workers as route
+
+        class Connection:
+            def __init__(self, cursor):
+                self._cursor = cursor
+
+            def cursor(self, **kwargs):
+                return self._cursor
+
+            def close(self):
+                pass
+
+        cursor = self.cursor()
+        cursor.workers[0]["services"] = None
+        monkeypatch.setattr(route, "get_db_connection", lambda: Connection(cursor))
+        res = app.test_client().get("/api/business/3/available-workers",
+                                    query_string={"date": "2025-06-02", "start_time": "10:00", "sid": "5"})
+        assert res.status_code == 200
+        assert res.get_json() == [{"employee_id": 1, "employee_first_name": "W1", "employee_last_name": "Lee",
+                                   "services": "No services listed"}]
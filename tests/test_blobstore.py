@@ -0,0 +1,82 @@
+import sys
+import os
+import base64
+import io
+
+import pytest
+from flask import Flask
+from werkzeug.datastructures import FileStorage
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from helper import blobstore
+from helper.blobstore import LocalBlobStore, UploadError, blob_key, image_url, store_image, store_upload
+from src.Images.images import images
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 4
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    local = LocalBlobStore(str(tmp_path))
+    monkeypatch.setattr(blobstore, "_store", local)
+    return local
+
+
+@pytest.fixture
+def client(store):
+    app = Flask(__name__)
+    app.register_blueprint(images)
+    return app.test_client()
+
+
+class TestBlobStore:
+    """Test cases for the content-addressed image store"""
+
+    def test_put_is_keyed_by_content(self, store):
+        key = store.put(PNG)
+        assert key == blob_key(PNG)
+        assert store.put(PNG) == key
+        with store.open(key) as blob:
+            assert blob.read() == PNG
+
+    def test_store_image_keeps_only_the_key(self, store):
+        data_uri = "data:image/png;base64," + base64.b64encode(PNG).decode()
+        key = store_image(data_uri)
+        assert store.exists(key)
+        assert store_image(key) == key
+        assert image_url(key) == f"/api/images/{key}"
+        assert store_image("https://example.com/a.png") == "https://example.com/a.png"
+
+    def test_endpoint_serves_etag_and_ranges(self, client, store):
+        key = store.put(PNG)
+        response = client.get(f"/api/images/{key}")
+        assert response.status_code == 200
+        assert response.mimetype == "image/png"
+        assert response.data == PNG
+
+        response = client.get(f"/api/images/{key}", headers={"If-None-Match": f'"{key}"'})
+        assert response.status_code == 304
+
+        response = client.get(f"/api/images/{key}", headers={"Range": "bytes=0-7"})
+        assert response.status_code == 206
+        assert response.data == PNG[:8]
+
+    def test_unknown_key_is_not_found(self, client):
+        assert client.get("/api/images/" + "0" * 64).status_code == 404
+        assert client.get("/api/images/../secret").status_code == 404
+
+    def test_upload_is_streamed_and_validated(self, store, tmp_path):
+        key = store_upload(FileStorage(io.BytesIO(PNG), "a.png"), max_size=len(PNG))
+        assert key == blob_key(PNG)
+        assert store.exists(key)
+
+        with pytest.raises(UploadError) as err:
+            store_upload(FileStorage(io.BytesIO(PNG), "a.png"), max_size=len(PNG) - 1)
+        assert err.value.status == 413
+        with pytest.raises(UploadError) as err:
+            store_upload(FileStorage(io.BytesIO(b"<svg/>"), "a.png"))
+        assert err.value.status == 415
+        # rejected uploads leave no temporary files behind
+        assert not [name for name in os.listdir(tmp_path) if name.startswith(".tmp-")]
@@ -0,0 +1,102 @@
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from mysql.connector.errors import PoolError
+from helper import db_pool
+from helper.db_pool import ConnectionPool
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.unread_result = False
+        self.in_transaction = False
+        self.rollbacks = 0
+
+    def ping(self, reconnect=False):
+        if self.closed:
+            raise Exception("gone")
+
+    def is_connected(self):
+        return not self.closed
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    conns = []
+
+    def connect(**kwargs):
+        conn = FakeConnection()
+        conns.append(conn)
+        return conn
+
+    monkeypatch.setattr(db_pool.mysql.connector, "connect", connect)
+    return conns
+
+
+class TestConnectionPool:
+    """Test cases for helper.db_pool.ConnectionPool."""
+
+    def test_close_returns_connection_for_reuse(self, opened):
+        """Test a closed connection is handed out again instead of reconnecting."""
+        pool = ConnectionPool({}, size=2, max_overflow=0)
+        conn = pool.connect()
+        conn.close()
+        pool.connect().close()
+        assert len(opened) == 1
+        assert pool.stats()["idle"] == 1
+        assert pool.stats()["checkouts"] == 2
+
+    def test_open_transaction_is_rolled_back_on_release(self, opened):
+        """Test uncommitted work does not leak into the next borrower."""
+        pool = ConnectionPool({}, size=1, max_overflow=0)
+        conn = pool.connect()
+        opened[0].in_transaction = True
+        conn.close()
+        assert opened[0].rollbacks == 1
+
+    def test_overflow_connections_are_closed_on_release(self, opened):
+        """Test connections beyond the pool size are not kept idle."""
+        pool = ConnectionPool({}, size=1, max_overflow=1)
+        first = pool.connect()
+        second = pool.connect()
+        assert pool.stats()["overflow"] == 1
+        first.close()
+        second.close()
+        assert pool.stats()["idle"] == 1
+        assert opened[1].closed
+
+    def test_exhausted_pool_times_out(self, opened):
+        """Test checkout raises PoolError once size and overflow are used up."""
+        pool = ConnectionPool({}, size=1, max_overflow=0, timeout=0.01)
+        held = pool.connect()
+        with pytest.raises(PoolError):
+            pool.connect()
+        assert pool.stats()["timeouts"] == 1
+
+    def test_dead_connection_is_replaced(self, opened):
+        """Test pre-ping discards a connection the server has dropped."""
+        pool = ConnectionPool({}, size=1, max_overflow=0)
+        pool.connect().close()
+        opened[0].closed = True
+        pool.connect()
+        assert len(opened) == 2
+        assert pool.stats()["invalidated"] == 1
+
+    def test_dropped_connection_frees_its_slot(self, opened):
+        """Test a connection garbage collected without close() does not leak a slot."""
+        pool = ConnectionPool({}, size=1, max_overflow=0, timeout=0.01)
+        pool.connect()
+        pool.connect().close()
+        assert pool.stats()["in_use"] == 0
@@ -0,0 +1,84 @@
+import sys
+import os
+import json
+
+from flask import Flask
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.extensions import mail
+from src.Notifications import fanout, outbox
+
+PAYLOAD = {"promo_id": 9, "bid": 3, "title": "Half off", "description": "Mondays only", "business": "Salon"}
+
+
+def audience(size, batch_size=4):
+    rows = [{"cid": i, "email": f"c{i}@example.com"} for i in range(size)]
+
+    def iter_audience(bid):
+        for start in range(0, size, batch_size):
+            yield rows[start:start + batch_size]
+    return iter_audience
+
+
+class FakeCursor:
+    def __init__(self):
+        self.executed = []
+        self.lastrowid = 1
+
+    def execute(self, query, params=()):
+        self.executed.append((query, params))
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.committed = False
+
+    def cursor(self, **kwargs):
+        return self._cursor
+
+    def commit(self):
+        self.committed = True
+
+    def close(self):
+        pass
+
+
+class TestPromotionFanOut:
+    """Test cases for chunked promotion emails"""
+
+    def test_audience_is_split_into_bounded_chunks(self, monkeypatch):
+        monkeypatch.setattr(fanout, "iter_promotion_audience", audience(11))
+        chunks = list(fanout.promotion_chunks(3, chunk_size=5))
+        assert [len(chunk) for chunk in chunks] == [5, 5, 1]
+        assert chunks[0][0] == "c0@example.com" and chunks[-1] == ["c10@example.com"]
+
+    def test_promotion_row_fans_out_into_chunk_rows(self, monkeypatch):
+        monkeypatch.setattr(fanout, "iter_promotion_audience", audience(120))
+        cursor = FakeCursor()
+        conn = FakeConnection(cursor)
+        monkeypatch.setattr(outbox, "get_db_connection", lambda: conn)
+
+        assert outbox.TEMPLATES["promotion"](PAYLOAD) == []
+        assert conn.committed
+        assert {query for query, _ in cursor.executed} == {outbox.insert_notification_once}
+        keys = [params[1] for _, params in cursor.executed]
+        assert keys == [f"PromotionChunk:9:{i}" for i in range(3)]
+        sizes = [len(json.loads(params[2])["recipients"]) for _, params in cursor.executed]
+        assert sizes == [fanout.PROMO_CHUNK_SIZE, fanout.PROMO_CHUNK_SIZE, 120 - 2 * fanout.PROMO_CHUNK_SIZE]
+
+    def test_chunk_recipients_are_blind_copied(self, monkeypatch):
+        app = Flask(__name__)
+        mail.init_app(app)
+        monkeypatch.setenv("MAIL_USERNAME", "salon@example.com")
+        with app.app_context():
+            [msg] = outbox.TEMPLATES["promotion_chunk"](dict(PAYLOAD, recipients=["a@example.com", "b@example.com"]))
+            raw = msg.as_bytes()
+        assert msg.send_to == {"a@example.com", "b@example.com"}
+        assert b"a@example.com" not in raw
+        assert b"To: undisclosed-recipients:;" in raw
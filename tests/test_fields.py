@@ -0,0 +1,27 @@
+import sys
+import os
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from helper.fields import select_fields
+
+FIELDS = {"pid": "p.pid", "product_name": "p.name", "image": "p.image"}
+
+
+class TestSelectFields:
+    """Test cases for ?fields= selection on list endpoints"""
+
+    def test_every_field_by_default(self):
+        assert select_fields({}, FIELDS, images=["image"]) == ["pid", "product_name", "image"]
+
+    def test_fields_pick_and_include_images(self):
+        assert select_fields({"fields": "product_name, pid"}, FIELDS, images=["image"]) == ["pid", "product_name"]
+        args = {"fields": "pid", "include": "images"}
+        assert select_fields(args, FIELDS, images=["image"]) == ["pid", "image"]
+
+    def test_unknown_fields_are_rejected(self):
+        with pytest.raises(ValueError, match="colour"):
+            select_fields({"fields": "pid,colour"}, FIELDS)
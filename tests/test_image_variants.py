@@ -0,0 +1,33 @@
+import sys
+import os
+import io
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from helper.image_variants import VARIANTS, render_variants, variant_for
+
+
+class TestImageVariants:
+    """Test cases for the image variant pipeline"""
+
+    def test_smallest_variant_that_fits(self):
+        assert variant_for(64) == "thumb"
+        assert variant_for(128) == "thumb"
+        assert variant_for(129) == "card"
+        assert variant_for(5000) == "full"
+
+    def test_variants_are_downscaled_only(self):
+        Image = pytest.importorskip("PIL.Image")
+        out = io.BytesIO()
+        Image.new("RGB", (1000, 500), "red").save(out, "PNG")
+
+        variants = {name: (data, width, height) for name, data, width, height in render_variants(out.getvalue())}
+        assert list(variants) == [name for name, _ in VARIANTS]
+        assert variants["thumb"][1:] == (128, 64)
+        assert variants["card"][1:] == (480, 240)
+        assert variants["thumb"][0].startswith(b"\xff\xd8\xff")
+        # already smaller than the full variant, the original is reused
+        assert variants["full"] == (None, 1000, 500)
@@ -0,0 +1,39 @@
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.LoyaltyProgram.accrual import _next_mark, query_first_pending_visit, query_last_aid
+
+
+class FakeCursor:
+    def __init__(self, last_aid, first_pending):
+        self.results = {query_last_aid: (last_aid,), query_first_pending_visit: (first_pending,)}
+
+    def execute(self, query, params=None):
+        self.current = self.results[query]
+
+    def fetchone(self):
+        return self.current
+
+
+class TestAccrualMark:
+    """Test cases for the loyalty accrual high-water mark."""
+
+    def test_mark_moves_to_last_appointment(self):
+        """Test the mark passes every appointment when nothing is pending."""
+        assert _next_mark(FakeCursor(40, None), 10, [11, 12], [], False) == 40
+
+    def test_mark_stops_before_future_appointment(self):
+        """Test an appointment that has not happened yet holds the mark back."""
+        assert _next_mark(FakeCursor(40, 15), 10, [11, 12, 20], [], False) == 14
+
+    def test_mark_stops_before_failed_award(self):
+        """Test a failed award is retried on the next pass."""
+        assert _next_mark(FakeCursor(40, None), 10, [11, 13], [12], False) == 11
+        assert _next_mark(FakeCursor(40, None), 10, [], [11], False) == 10
+
+    def test_full_batch_stops_at_last_processed(self):
+        """Test a full batch only advances past the visits it handled."""
+        assert _next_mark(FakeCursor(40, None), 10, [11, 12], [], True) == 12
@@ -0,0 +1,97 @@
+import sys
+import os
+from decimal import Decimal
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.LoyaltyProgram.loyalty_service import award_points_for_visits
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.rows = []
+
+    def execute(self, query, params=()):
+        self.db.statements.append(query)
+        params = list(params)
+        if "FROM loyalty_point_events" in query:
+            self.rows = [{"aid": aid} for aid in params if aid in self.db.events]
+        elif "FROM loyalty_programs" in query:
+            self.rows = [dict(p, bid=bid) for bid, p in self.db.programs.items() if bid in params]
+        elif query.strip().startswith("INSERT IGNORE INTO customer_loyalty_points"):
+            for cid, bid in zip(params[::2], params[1::2]):
+                self.db.balances.setdefault((cid, bid), [Decimal("0")] * 4)
+            self.rows = []
+        elif "FROM customer_loyalty_points" in query:
+            pairs = set(zip(params[::2], params[1::2]))
+            self.rows = [
+                {"cid": cid, "bid": bid, "pts_balance": b[0], "appt_complete": b[1],
+                 "prod_purchased": b[2], "amount_spent": b[3]}
+                for (cid, bid), b in self.db.balances.items() if (cid, bid) in pairs
+            ]
+        elif "INTO customer_loyalty_points" in query:
+            for i in range(0, len(params), 6):
+                cid, bid, *values = params[i:i + 6]
+                self.db.balances[(cid, bid)] = [Decimal(str(v)) for v in values]
+            self.rows = []
+        elif "INTO loyalty_point_events" in query:
+            for i in range(0, len(params), 5):
+                self.db.events[params[i]] = params[i + 3]
+            self.rows = []
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, programs=None):
+        self.programs = programs or {}
+        self.balances = {}
+        self.events = {}
+        self.statements = []
+        self.commits = 0
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+class TestBatchAward:
+    """Test cases for the batch loyalty award."""
+
+    def test_awards_many_visits_in_few_statements(self):
+        """Test statement count does not grow with the number of visits."""
+        conn = FakeConnection()
+        visits = [(aid, aid % 3, 1, Decimal("20.00"), None) for aid in range(1, 101)]
+        results = award_points_for_visits(conn, visits)
+        assert all(r["awarded"] and r["points"] == 20 for r in results)
+        assert len(conn.statements) == 6
+        assert conn.commits == 1
+        assert conn.balances[(1, 1)][0] == Decimal("680")
+        assert len(conn.events) == 100
+
+    def test_skips_awarded_visits(self):
+        """Test visits that already have an event are not awarded again."""
+        conn = FakeConnection()
+        conn.events[1] = 10
+        results = award_points_for_visits(conn, [(1, 7, 1, 30, None), (2, 7, 1, 30, None), (2, 7, 1, 30, None)])
+        assert [r["awarded"] for r in results] == [False, True, False]
+        assert conn.balances[(7, 1)][0] == Decimal("30")
+
+    def test_threshold_bonus_applies_in_order(self):
+        """Test appointment thresholds carry over between visits of one customer."""
+        conn = FakeConnection({1: {"threshold": 2, "appts_thresh": 1, "is_points": 1, "rwd_value": 50}})
+        results = award_points_for_visits(conn, [(aid, 7, 1, 30, None) for aid in (1, 2, 3)])
+        assert [r["points"] for r in results] == [0, 50, 0]
+        assert conn.balances[(7, 1)][:2] == [Decimal("50"), Decimal("1")]
+        assert conn.events == {1: 0, 2: 50, 3: 0}
@@ -0,0 +1,93 @@
+import sys
+import os
+import smtplib
+
+import pytest
+from flask import Flask
+from flask_mail import Message
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.extensions import mail
+from src.Notifications.mailer import FileBackend, MailWorker
+
+
+class FlakyBackend:
+    """refuses the first sends with the given errors, then accepts"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.sent = []
+        self.closed = 0
+
+    def send(self, msg):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append(msg.subject)
+
+    def close(self):
+        self.closed += 1
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config["MAIL_DEFAULT_SENDER"] = "salon@example.com"
+    mail.init_app(app)
+    return app
+
+
+def message(app, subject):
+    with app.app_context():
+        return Message(subject=subject, recipients=["client@example.com"], body="hello")
+
+
+class TestMailWorker:
+    """Test cases for the batched email delivery worker"""
+
+    def test_messages_share_a_session(self, app):
+        backend = FlakyBackend()
+        worker = MailWorker(app, lambda: backend, workers=1, rate_per_second=0)
+        futures = [worker.submit(message(app, f"m{i}")) for i in range(3)]
+        for future in futures:
+            future.result(timeout=5)
+        assert backend.sent == ["m0", "m1", "m2"]
+        stats = worker.stats()
+        assert (stats["sent"], stats["failed"], stats["queue_depth"]) == (3, 0, 0)
+
+    def test_transient_errors_are_retried(self, app):
+        backend = FlakyBackend(smtplib.SMTPResponseException(421, b"too many messages"),
+                               smtplib.SMTPServerDisconnected("gone"))
+        worker = MailWorker(app, lambda: backend, workers=1, rate_per_second=0, retry_seconds=0)
+        worker.submit(message(app, "retry")).result(timeout=5)
+        assert backend.sent == ["retry"]
+        assert worker.stats()["retried"] == 2
+
+    def test_permanent_errors_fail_the_send(self, app):
+        backend = FlakyBackend(smtplib.SMTPResponseException(550, b"no such user"))
+        worker = MailWorker(app, lambda: backend, workers=1, rate_per_second=0, retry_seconds=0)
+        with pytest.raises(smtplib.SMTPResponseException):
+            worker.submit(message(app, "bounce")).result(timeout=5)
+        assert worker.stats()["failed"] == 1
+
+    def test_file_backend_writes_eml(self, app, tmp_path):
+        worker = MailWorker(app, lambda: FileBackend(str(tmp_path)), rate_per_second=0)
+        worker.submit(message(app, "sink")).result(timeout=5)
+        files = os.listdir(tmp_path)
+        assert len(files) == 1 and files[0].endswith(".eml")
+        assert b"Subject: sink" in (tmp_path / files[0]).read_bytes()
+
+    def test_workers_send_concurrently(self, app):
+        backends = []
+
+        def make_backend():
+            backends.append(FlakyBackend())
+            return backends[-1]
+
+        worker = MailWorker(app, make_backend, workers=3, rate_per_second=0)
+        futures = [worker.submit(message(app, f"m{i}")) for i in range(6)]
+        for future in futures:
+            future.result(timeout=5)
+        assert len(backends) == 3
+        assert sorted(subject for b in backends for subject in b.sent) == [f"m{i}" for i in range(6)]
@@ -0,0 +1,89 @@
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.Admin import snapshot as snapshot_module
+from src.Admin.snapshot import MetricsSnapshot, _one, compute_metrics
+
+
+class FakeCursor:
+    def __init__(self, results):
+        self.results = results
+        self.executed = []
+
+    def execute(self, query, params=None):
+        self.executed.append(query)
+        self.current = self.results[query]
+
+    def fetchone(self):
+        if isinstance(self.current, Exception):
+            raise self.current
+        return self.current
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self, **kwargs):
+        return self._cursor
+
+    def close(self):
+        pass
+
+
+def make_snapshot(monkeypatch, results):
+    cursor = FakeCursor(results)
+    monkeypatch.setattr(snapshot_module, "get_db_connection", lambda: FakeConnection(cursor))
+    metrics = {
+        "users": ("q_users", _one(lambda r: {"users": r["n"]})),
+        "broken": ("q_broken", _one(lambda r: {"broken": r["n"]})),
+    }
+    return MetricsSnapshot(metrics=metrics, max_age=60, workers=1), cursor
+
+
+class TestMetricsSnapshot:
+    """Test cases for the admin metrics snapshot."""
+
+    def test_serves_from_snapshot(self, monkeypatch):
+        """Test metrics are computed once and then served without queries."""
+        snap, cursor = make_snapshot(monkeypatch, {"q_users": {"n": 7}, "q_broken": {"n": 1}})
+        assert snap.get("users") == ({"users": 7}, None)
+        assert snap.get("users") == ({"users": 7}, None)
+        assert cursor.executed == ["q_users", "q_broken"]
+        assert snap.stats()["refreshes"] == 1
+
+    def test_failed_metric_keeps_others(self, monkeypatch):
+        """Test a failing query is reported without hiding other metrics."""
+        snap, _ = make_snapshot(monkeypatch, {"q_users": {"n": 3}, "q_broken": ValueError("boom")})
+        assert snap.get("broken") == (None, "boom")
+        assert snap.get("users") == ({"users": 3}, None)
+
+    def test_stale_snapshot_is_refreshed(self, monkeypatch):
+        """Test a snapshot older than max_age is recomputed on read."""
+        snap, cursor = make_snapshot(monkeypatch, {"q_users": {"n": 1}, "q_broken": {"n": 1}})
+        snap.get("users")
+        snap.max_age = -1
+        snap.get("users")
+        assert len(cursor.executed) == 4
+
+    def test_compute_metrics_splits_across_connections(self, monkeypatch):
+        """Test metrics are spread over at most workers connections."""
+        connections = []
+
+        def connect():
+            cursor = FakeCursor({"q_a": {"n": 1}, "q_b": {"n": 2}, "q_c": {"n": 3}})
+            connections.append(cursor)
+            return FakeConnection(cursor)
+
+        monkeypatch.setattr(snapshot_module, "get_db_connection", connect)
+        metrics = {name: ("q_" + name, _one(lambda r: {"n": r["n"]})) for name in "abc"}
+        values, errors = compute_metrics(["a", "b", "c"], metrics, workers=2)
+        assert values == {"a": {"n": 1}, "b": {"n": 2}, "c": {"n": 3}}
+        assert errors == {}
+        assert sorted(len(c.executed) for c in connections) == [1, 2]
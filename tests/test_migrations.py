@@ -0,0 +1,119 @@
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from helper.migrations import (
+    migrate, insert_applied_version, merge_monthly_revenue, query_applied_versions, query_unique_keys,
+)
+
+
+class FakeCursor:
+    def __init__(self, applied):
+        self.applied = applied
+        self.executed = []
+        self.current = []
+
+    def execute(self, query, params=None):
+        self.executed.append(query)
+        if query.startswith("SELECT GET_LOCK"):
+            self.current = [(1,)]
+        elif query == query_applied_versions:
+            self.current = [(v,) for v in self.applied]
+        elif query == insert_applied_version:
+            self.applied.append(params[0])
+            self.current = []
+        else:
+            self.current = []
+
+    def fetchone(self):
+        return self.current[0]
+
+    def fetchall(self):
+        return self.current
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.commits = 0
+
+    def cursor(self, **kwargs):
+        return self._cursor
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+MIGRATIONS = [
+    (2, "second", ["STEP 2"]),
+    (1, "first", ["STEP 1a", lambda cursor: cursor.execute("STEP 1b")]),
+    (3, "third", ["STEP 3"]),
+]
+
+
+class TestMigrations:
+    """Test cases for the schema migration runner."""
+
+    def test_applies_pending_in_order(self):
+        """Test pending migrations run oldest first and are recorded."""
+        cursor = FakeCursor([])
+        conn = FakeConnection(cursor)
+        assert migrate(conn, MIGRATIONS) == [1, 2, 3]
+        steps = [q for q in cursor.executed if q.startswith("STEP")]
+        assert steps == ["STEP 1a", "STEP 1b", "STEP 2", "STEP 3"]
+        assert conn.commits == 3
+
+    def test_skips_applied(self):
+        """Test migrations already recorded are not run again."""
+        cursor = FakeCursor([1, 2, 3])
+        assert migrate(FakeConnection(cursor), MIGRATIONS) == []
+        assert not [q for q in cursor.executed if q.startswith("STEP")]
+
+
+class KeyCursor(FakeCursor):
+    """answers the unique key lookup with the given (index_name, columns) rows"""
+
+    def __init__(self, keys):
+        super().__init__([])
+        self.keys = keys
+
+    def execute(self, query, params=None):
+        super().execute(query, params)
+        if query == query_unique_keys:
+            self.current = self.keys
+
+
+class TestMergeMonthlyRevenue:
+    """Test cases for keying monthly_revenue in migration 10."""
+
+    def test_duplicates_are_summed_into_a_keyed_table(self):
+        """Test a table without the key is rebuilt from summed rows and swapped in."""
+        cursor = KeyCursor([])
+        merge_monthly_revenue(cursor)
+        statements = [" ".join(q.split()) for q in cursor.executed]
+        assert any("SUM(revenue)" in q and "GROUP BY bid, year, month" in q for q in statements)
+        assert any("PRIMARY KEY (bid, year, month)" in q for q in statements)
+        assert statements[-2:] == [
+            "RENAME TABLE monthly_revenue TO monthly_revenue_old, monthly_revenue_merged TO monthly_revenue",
+            "DROP TABLE monthly_revenue_old",
+        ]
+
+    def test_keyed_table_is_left_alone(self):
+        """Test a rerun after the swap only drops the leftover table."""
+        cursor = KeyCursor([("PRIMARY", "bid,year,month")])
+        merge_monthly_revenue(cursor)
+        assert cursor.executed == ["DROP TABLE IF EXISTS monthly_revenue_old", query_unique_keys]
+
+    def test_other_unique_keys_do_not_count(self):
+        """Test a unique key on other columns still gets the merge."""
+        cursor = KeyCursor([("PRIMARY", "id"), ("uq_bid_month", "bid,month")])
+        merge_monthly_revenue(cursor)
+        assert "DROP TABLE monthly_revenue_old" in cursor.executed
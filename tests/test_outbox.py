@@ -0,0 +1,199 @@
+import sys
+import os
+import json
+import threading
+
+import pytest
+from concurrent.futures import Future
+from flask import Flask
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.extensions import mail
+from src.Notifications import outbox
+
+
+class FakeCursor:
+    """answers the lock and claim queries of a dispatch pass"""
+
+    def __init__(self, claimed, locked=1):
+        self.claimed = claimed
+        self.locked = locked
+        self.executed = []
+        self.result = []
+        self.lastrowid = 41
+
+    def execute(self, query, params=()):
+        self.executed.append((query, params))
+        if "GET_LOCK" in query:
+            self.result = [{"locked": self.locked}]
+        elif query is outbox.query_claimed_notifications:
+            self.result = self.claimed
+        else:
+            self.result = []
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.commits = 0
+
+    def cursor(self, **kwargs):
+        return self._cursor
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeMailer:
+    """resolves every submitted message at once, failing those marked so"""
+
+    def __init__(self):
+        self.sent = []
+
+    def submit(self, msg):
+        future = Future()
+        if msg == "bounce":
+            future.set_exception(RuntimeError("mailbox unavailable"))
+        else:
+            self.sent.append(msg)
+            future.set_result(None)
+        return future
+
+
+def updates(cursor, query):
+    return [params for q, params in cursor.executed if q is query]
+
+
+class TestNotificationOutbox:
+    """Test cases for the durable notification outbox"""
+
+    def test_dispatch_marks_sent_and_reschedules_failures(self, monkeypatch):
+        claimed = [
+            {"id": 1, "kind": "ok", "payload": json.dumps({"aid": 1}), "attempts": 1},
+            {"id": 2, "kind": "broken", "payload": json.dumps({"aid": 2}), "attempts": 1},
+            {"id": 3, "kind": "bounced", "payload": json.dumps({"aid": 3}), "attempts": outbox.OUTBOX_MAX_ATTEMPTS},
+        ]
+        cursor = FakeCursor(claimed)
+        monkeypatch.setattr(outbox, "get_db_connection", lambda: FakeConnection(cursor))
+        mailer = FakeMailer()
+        monkeypatch.setattr(outbox, "get_app", lambda: Flask(__name__))
+        monkeypatch.setattr(outbox, "get_mailer", lambda app: mailer)
+
+        def broken(payload):
+            raise RuntimeError("template failed")
+
+        templates = {"ok": lambda payload: [f"reminder {payload['aid']}"], "broken": broken,
+                     "bounced": lambda payload: ["bounce"]}
+        monkeypatch.setattr(outbox, "TEMPLATES", templates)
+
+        summary = outbox.dispatch_due()
+        assert (summary["claimed"], summary["sent"], summary["failed"]) == (3, 1, 2)
+        assert mailer.sent == ["reminder 1"]
+        assert [params[1] for params in updates(cursor, outbox.mark_notification_sent)] == [1]
+        failures = updates(cursor, outbox.mark_notification_failed)
+        assert [(params[0], params[3]) for params in failures] == [("pending", 2), ("failed", 3)]
+        assert "RELEASE_LOCK" in cursor.executed[-1][0]
+
+    def test_dispatch_skipped_without_the_lock(self, monkeypatch):
+        cursor = FakeCursor([], locked=0)
+        monkeypatch.setattr(outbox, "get_db_connection", lambda: FakeConnection(cursor))
+        assert outbox.dispatch_due() is None
+        assert len(cursor.executed) == 1
+
+    def test_enqueue_serializes_the_payload(self):
+        cursor = FakeCursor([])
+        outbox.enqueue_notification(cursor, "appointment_reminder", {"aid": 5, "email": "a@example.com"},
+                                    job_key="Appointment:5:9")
+        params = cursor.executed[0][1]
+        assert params[:3] == ("appointment_reminder", "Appointment:5:9", '{"aid": 5, "email": "a@example.com"}')
+        with pytest.raises(ValueError):
+            outbox.enqueue_notification(cursor, "unknown", {})
+        assert outbox.retry_delay(3) == outbox.OUTBOX_RETRY_SECONDS * 4
+
+    def test_emails_are_queued_rendered(self, monkeypatch):
+        cursor = FakeCursor([])
+        assert outbox.enqueue_email(cursor, "Appointment Rescheduled", ["e@example.com"], body="moved") == 41
+        kind, job_key, payload = cursor.executed[0][1][:3]
+        assert (kind, job_key) == ("email", None)
+
+        app = Flask(__name__)
+        mail.init_app(app)
+        monkeypatch.setenv("MAIL_USERNAME", "salon@example.com")
+        with app.app_context():
+            [msg] = outbox.TEMPLATES[kind](json.loads(payload))
+        assert (msg.subject, msg.body, msg.recipients) == ("Appointment Rescheduled", "moved", ["e@example.com"])
+        assert msg.sender == "salon@example.com"
+
+    def test_wakes_are_coalesced(self, monkeypatch):
+        started, release = threading.Event(), threading.Event()
+        runs = []
+
+        def run_outbox():
+            runs.append(1)
+            started.set()
+            release.wait(5)
+
+        monkeypatch.setattr(outbox, "run_outbox", run_outbox)
+        outbox.wake_dispatcher()
+        started.wait(5)
+        # one run is going, the next wakes share a single follow-up run
+        outbox.wake_dispatcher()
+        outbox.wake_dispatcher()
+        release.set()
+        outbox._wake_executor.submit(lambda: None).result(5)
+        assert len(runs) == 2
+
+    def test_status_is_read_only_by_the_requester(self, monkeypatch):
+        cursor = FakeCursor([])
+        outbox.enqueue_email(cursor, "Update", ["c@example.com"], body="late", requested_by=12)
+        assert cursor.executed[0][1][4] == 12
+
+        monkeypatch.setattr(outbox, "get_db_connection", lambda: FakeConnection(cursor))
+        assert outbox.get_notification_status(41, 13) is None
+        query, params = cursor.executed[-1]
+        assert query is outbox.query_notification_status
+        assert params == (41, 13)
+        assert "requested_by = %s" in query
+
+    def test_fan_out_is_reported_and_drained(self, monkeypatch):
+        claimed = [
+            {"id": 1, "kind": "promotion", "payload": json.dumps({"promo_id": 9}), "attempts": 1},
+            {"id": 2, "kind": "ok", "payload": json.dumps({"aid": 2}), "attempts": 1},
+        ]
+        cursor = FakeCursor(claimed)
+        monkeypatch.setattr(outbox, "get_db_connection", lambda: FakeConnection(cursor))
+        monkeypatch.setattr(outbox, "get_app", lambda: Flask(__name__))
+        monkeypatch.setattr(outbox, "get_mailer", lambda app: FakeMailer())
+        monkeypatch.setattr(outbox, "TEMPLATES", {"promotion": lambda payload: [], "ok": lambda payload: ["hi"]})
+        summary = outbox.dispatch_due()
+        assert (summary["sent"], summary["enqueued"]) == (2, 1)
+
+        # a short pass that enqueued rows is followed by another, which
+        # picks them up while this process still holds the lock
+        passes = iter([{"claimed": 1, "enqueued": 1}, {"claimed": 3, "enqueued": 0}])
+        runs = []
+
+        def dispatch_due():
+            runs.append(1)
+            return next(passes)
+
+        monkeypatch.setattr(outbox, "dispatch_due", dispatch_due)
+        outbox.run_outbox()
+        assert len(runs) == 2
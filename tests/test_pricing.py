@@ -0,0 +1,83 @@
+import sys
+import os
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.Clients.pricing import (
+    BusinessRules, Promotion, ThresholdProgram, day_of_week, parse_days, price_order,
+)
+
+REWARD_FLAGS = {"is_appt": 0, "is_product": 0, "is_price": 0, "is_points": 0, "is_discount": 0}
+
+
+def promotion(promo_id, reward, value, start, end, recurring=False, days=None, window=(None, None)):
+    row = dict(REWARD_FLAGS, promo_id=promo_id, lprog_id=promo_id, title=f"promo {promo_id}",
+               description="", start_date=start, end_date=end, is_recurring=recurring,
+               recurr_days=days, start_time=window[0], end_time=window[1], rwd_value=value)
+    row[reward] = 1
+    return Promotion(row)
+
+
+def program(lprog_id, prog_type, threshold, reward, value):
+    row = dict(REWARD_FLAGS, lprog_id=lprog_id, rwd_id=lprog_id, description="", threshold=threshold,
+               appts_thresh=0, pdct_thresh=0, price_thresh=0, points_thresh=0, rwd_value=value)
+    row[prog_type] = 1
+    row[reward] = 1
+    return ThresholdProgram(row)
+
+
+def no_progress():
+    return {"points": Decimal("0"), "appts": Decimal("0"), "products": Decimal("0"), "price": Decimal("0")}
+
+
+class TestPricing:
+    """Test cases for the compiled pricing rules"""
+
+    now = datetime(2025, 3, 5, 14, 30)  # a Wednesday
+
+    def test_day_of_week_matches_mysql(self):
+        assert day_of_week(date(2025, 3, 2)) == 1  # Sunday
+        assert day_of_week(date(2025, 3, 5)) == 4
+        assert parse_days("4, saturday") == {4, 7}
+
+    def test_active_promotions_follow_dates_and_recurrence(self):
+        today = self.now.date()
+        rules = BusinessRules(Decimal("1"), [
+            promotion(1, "is_price", 5, today - timedelta(days=1), today),
+            promotion(2, "is_price", 5, today + timedelta(days=1), today + timedelta(days=5)),
+            promotion(3, "is_price", 5, today, today, recurring=True, days="4",
+                      window=(timedelta(hours=14), timedelta(hours=15))),
+            promotion(4, "is_price", 5, today, today, recurring=True, days="5",
+                      window=(timedelta(hours=14), timedelta(hours=15))),
+            promotion(5, "is_price", 5, today, today, recurring=True, days="4",
+                      window=(timedelta(hours=9), timedelta(hours=10))),
+        ])
+        assert [p.promo_id for p in rules.active_promotions(self.now)] == [1, 3]
+
+    def test_price_order_applies_promotions_and_thresholds(self):
+        today = self.now.date()
+        rules = BusinessRules(Decimal("1"), [
+            promotion(1, "is_discount", 10, today, today),
+            # only product purchases get product promotions
+            promotion(2, "is_product", Decimal("0.5"), today, today),
+        ], [
+            program(10, "appts_thresh", 3, "is_price", 5),
+            program(11, "price_thresh", 100, "is_points", 20),
+        ])
+        progress = no_progress()
+        progress["appts"] = Decimal("2")
+        progress["price"] = Decimal("150")
+
+        result = price_order(rules, progress, subtotal=Decimal("80"), unit_price=Decimal("80"),
+                             is_product_purchase=False, now=self.now)
+
+        assert result.promo_discount == Decimal("8.00")
+        assert [p["promo_id"] for p in result.promotions] == [1]
+        assert result.loyalty_discount == Decimal("5.00")
+        assert result.points_bonus == Decimal("40")
+        assert result.consumed == {"appts": Decimal("3"), "price": Decimal("200")}
+        assert result.tax == Decimal("4.90")
+        assert result.total == Decimal("71.90")
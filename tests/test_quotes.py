@@ -0,0 +1,124 @@
+import sys
+import os
+from decimal import Decimal
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.Clients import quotes
+from src.Clients.pricing import invalidate_rules
+from src.Clients.quotes import (
+    QuoteError, build_quote, discard_quote, get_quote, load_order, quote_cache, save_quote, verify_quote,
+)
+
+
+class FakeCursor:
+    """answers the quote queries from an in-memory cart and loyalty row"""
+
+    def __init__(self):
+        self.cart = [{"pid": 1, "amount": 2, "price": Decimal("10.00")}]
+        self.progress = {"pts_balance": Decimal("50"), "appt_complete": 0,
+                         "prod_purchased": 0, "amount_spent": Decimal("0")}
+        # checkout_quotes rows by quote_id
+        self.quotes = {}
+        self.rows = []
+
+    def execute(self, query, params=()):
+        if query is quotes.insert_quote:
+            columns = ("quote_id", "cid", "bid", "aid", "is_product_purchase", "points", "version", "total",
+                       "expires_at")
+            self.quotes[params[0]] = dict(zip(columns, params))
+            self.rows = []
+        elif query is quotes.query_quote:
+            quote_id, cid, now = params
+            row = self.quotes.get(quote_id)
+            self.rows = [row] if row and row["cid"] == cid and row["expires_at"] > now else []
+        elif query is quotes.delete_quote:
+            self.quotes.pop(params[0], None)
+            self.rows = []
+        elif "FROM cart" in query:
+            self.rows = [dict(line) for line in self.cart]
+        elif "FROM loyalty_points" in query:
+            self.rows = [{"pts_value": Decimal("1")}]
+        elif "FROM customer_loyalty_points" in query:
+            self.rows = [dict(self.progress)]
+        else:
+            self.rows = []
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+
+class TestQuotes:
+    """Test cases for checkout quotes"""
+
+    def setup_method(self):
+        invalidate_rules(7)
+        self.cursor = FakeCursor()
+
+    def quote(self, points=0):
+        order = load_order(self.cursor, 3, 7, True)
+        return save_quote(self.cursor, build_quote(self.cursor, 3, order, points))
+
+    def test_quote_prices_order_and_redemption(self):
+        quote = self.quote(points=20)
+        assert quote.order.subtotal == Decimal("20.00")
+        assert quote.pricing.manual_discount == Decimal("2.00")
+        assert quote.pricing.total == Decimal("19.22")
+        assert get_quote(self.cursor, quote.quote_id, 3) is quote
+
+    def test_quote_belongs_to_its_customer(self):
+        quote = self.quote()
+        with pytest.raises(QuoteError) as err:
+            get_quote(self.cursor, quote.quote_id, 4)
+        assert err.value.status == 409
+
+    def test_changed_cart_makes_quote_stale(self):
+        quote = self.quote()
+        assert verify_quote(self.cursor, quote).subtotal == Decimal("20.00")
+
+        self.cursor.cart[0]["amount"] = 3
+        with pytest.raises(QuoteError) as err:
+            verify_quote(self.cursor, quote)
+        assert err.value.status == 409
+
+    def test_insufficient_points_are_rejected(self):
+        with pytest.raises(QuoteError):
+            self.quote(points=80)
+
+    def test_quote_from_another_process_is_priced_again(self):
+        quote = self.quote(points=20)
+        # the checkout reaches a process that did not make the preview
+        quote_cache.clear()
+        again = get_quote(self.cursor, quote.quote_id, 3)
+        assert again is not quote
+        assert (again.quote_id, again.version, again.pricing.total) == (quote.quote_id, quote.version, quote.pricing.total)
+        assert again.points == 20
+        with pytest.raises(QuoteError):
+            get_quote(self.cursor, quote.quote_id, 4)
+
+    def test_quote_from_another_process_is_rejected_once_changed(self):
+        quote = self.quote()
+        quote_cache.clear()
+        self.cursor.cart[0]["amount"] = 3
+        with pytest.raises(QuoteError) as err:
+            get_quote(self.cursor, quote.quote_id, 3)
+        assert err.value.status == 409
+
+    def test_expired_and_used_quotes_are_rejected(self):
+        quote = self.quote()
+        quote_cache.clear()
+        self.cursor.quotes[quote.quote_id]["expires_at"] = quote.expires_at.replace(year=2000)
+        with pytest.raises(QuoteError):
+            get_quote(self.cursor, quote.quote_id, 3)
+
+        quote = self.quote()
+        discard_quote(self.cursor, quote.quote_id)
+        assert quote.quote_id not in self.cursor.quotes
+        with pytest.raises(QuoteError):
+            get_quote(self.cursor, quote.quote_id, 3)
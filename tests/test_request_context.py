@@ -0,0 +1,116 @@
+import sys
+import os
+
+import pytest
+from flask import Flask
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from helper import request_context
+from helper.request_context import get_request_connection, lookup_one, request_memo
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query, params=()):
+        self.conn.queries.append((query, params))
+        # a read opens a transaction, as with autocommit off
+        self.conn.in_transaction = True
+
+    def fetchone(self):
+        return {"uid": 1}
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.queries = []
+        self.in_transaction = False
+        self.rollbacks = 0
+        self.closed = False
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self)
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakePool:
+    def __init__(self):
+        self.borrowed = []
+
+    def connect(self):
+        conn = FakeConnection()
+        self.borrowed.append(conn)
+        return conn
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = FakePool()
+    monkeypatch.setattr(request_context, "get_pool", lambda: pool)
+    return pool
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    request_context.init_app(app)
+    return app
+
+
+class TestRequestContext:
+    """Test cases for the per-request connection and memo"""
+
+    def test_lookups_share_one_connection_released_at_teardown(self, pool, app):
+        with app.app_context():
+            assert lookup_one("SELECT 1", []) == {"uid": 1}
+            lookup_one("SELECT 2", [])
+            assert get_request_connection() is pool.borrowed[0]
+            assert len(pool.borrowed) == 1
+            conn = pool.borrowed[0]
+            assert not conn.closed
+            # every lookup ends its read so later ones see new commits
+            assert conn.rollbacks == 2
+        assert conn.closed
+
+    def test_lookup_outside_a_request_borrows_and_returns(self, pool):
+        lookup_one("SELECT 1", [])
+        lookup_one("SELECT 2", [])
+        assert len(pool.borrowed) == 2
+        assert all(conn.closed for conn in pool.borrowed)
+
+    def test_teardown_without_a_connection_borrows_none(self, pool, app):
+        with app.app_context():
+            pass
+        assert pool.borrowed == []
+
+    def test_memo_loads_once_per_request(self, app):
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return len(calls)
+
+        with app.app_context():
+            assert request_memo(("role", "1"), loader) == 1
+            assert request_memo(("role", "1"), loader) == 1
+            assert request_memo(("role", "2"), loader) == 2
+        with app.app_context():
+            assert request_memo(("role", "1"), loader) == 3
+
+    def test_memo_outside_a_request_always_loads(self):
+        calls = []
+        request_memo("key", lambda: calls.append(1))
+        request_memo("key", lambda: calls.append(1))
+        assert len(calls) == 2
@@ -0,0 +1,165 @@
+import sys
+import os
+from datetime import date, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.Revenue import rollups
+from src.Revenue.rollups import business_revenue, record_transaction, record_transactions
+
+
+def prefix(query):
+    return query.split("{rows}")[0]
+
+
+class FakeCursor:
+    """keeps transactions, revenue_daily and monthly_revenue in dicts,
+    applying the rollup statements the way MySQL would with CURDATE() = today
+    """
+
+    def __init__(self, today):
+        self.today = today
+        self.transactions = []
+        self.daily = {}
+        self.monthly = {}
+        self.statements = 0
+        self.lastrowid = 0
+        self.result = None
+
+    def _transaction(self, cid, bid, aid, pid, amount, payment_method_id):
+        self.lastrowid += 1
+        self.transactions.append({"bid": bid, "amount": amount, "day": self.today})
+
+    def _daily(self, bid, revenue, count):
+        old = self.daily.get((bid, self.today), (0.0, 0))
+        self.daily[(bid, self.today)] = (old[0] + revenue, old[1] + count)
+
+    def _monthly(self, bid, revenue):
+        key = (bid, self.today.year, self.today.month)
+        self.monthly[key] = self.monthly.get(key, 0.0) + revenue
+
+    def execute(self, query, params=()):
+        self.statements += 1
+        if query is rollups.insert_transaction:
+            self._transaction(*params)
+        elif query.startswith(prefix(rollups.insert_transactions)):
+            for i in range(0, len(params), 6):
+                self._transaction(*params[i:i + 6])
+        elif query is rollups.upsert_revenue_daily:
+            self._daily(params[0], params[1], 1)
+        elif query.startswith(prefix(rollups.upsert_revenue_daily_many)):
+            for i in range(0, len(params), 3):
+                self._daily(*params[i:i + 3])
+        elif query is rollups.upsert_monthly_revenue:
+            self._monthly(*params)
+        elif query.startswith(prefix(rollups.upsert_monthly_revenue_many)):
+            for i in range(0, len(params), 2):
+                self._monthly(*params[i:i + 2])
+        elif query is rollups.query_business_revenue:
+            self.result = self._business_revenue(params[0])
+        else:
+            raise AssertionError(f"unexpected query {query}")
+
+    def _business_revenue(self, bid):
+        # query_business_revenue over revenue_daily
+        today = self.today
+        week_start = today - timedelta(days=today.weekday())
+        month_start = today.replace(day=1)
+        year_start = today.replace(month=1, day=1)
+        rows = [(day, revenue) for (b, day), (revenue, _) in self.daily.items()
+                if b == bid and day >= min(year_start, week_start)]
+        return {
+            "daily": sum(r for d, r in rows if d == today),
+            "weekly": sum(r for d, r in rows if d >= week_start),
+            "monthly": sum(r for d, r in rows if d >= month_start),
+            "yearly": sum(r for d, r in rows if d >= year_start),
+        }
+
+    def fetchone(self):
+        return self.result
+
+
+def old_totals(transactions, bid, today):
+    """the four aggregates get_revenue ran over transactions before the rollups"""
+    def yearweek(day):
+        return day.isocalendar()[:2]
+
+    rows = [t for t in transactions if t["bid"] == bid]
+    return {
+        "daily": sum(t["amount"] for t in rows if t["day"] == today),
+        "weekly": sum(t["amount"] for t in rows if yearweek(t["day"]) == yearweek(today)),
+        "monthly": sum(t["amount"] for t in rows if (t["day"].year, t["day"].month) == (today.year, today.month)),
+        "yearly": sum(t["amount"] for t in rows if t["day"].year == today.year),
+    }
+
+
+SALES = [
+    # cid, bid, amount, aid, pid, payment_method_id
+    (1, 10, 25.0, 100, None, None),
+    (2, 10, 12.5, None, 7, 3),
+    (3, 11, 40.0, 101, None, None),
+    (1, 10, 0, None, 8, None),
+    (4, None, 9.0, None, None, None),
+    (2, 11, 5.25, None, 9, 1),
+]
+
+
+class TestRevenueRollups:
+    """Test cases for the revenue rollups"""
+
+    def test_batched_and_single_writes_match(self):
+        today = date(2025, 6, 4)
+        single, batched = FakeCursor(today), FakeCursor(today)
+        for cid, bid, amount, aid, pid, payment_method_id in SALES:
+            record_transaction(single, cid, bid, amount, aid=aid, pid=pid, payment_method_id=payment_method_id)
+        record_transactions(batched, SALES)
+
+        assert batched.daily == single.daily == {(10, today): (37.5, 2), (11, today): (45.25, 2)}
+        assert batched.monthly == single.monthly
+        assert batched.transactions == single.transactions
+        assert len(batched.transactions) == len(SALES)
+        # one statement per table, however many rows
+        assert batched.statements == 3
+
+    def test_batch_without_revenue_writes_no_rollups(self):
+        cursor = FakeCursor(date(2025, 6, 4))
+        record_transactions(cursor, [(1, None, 5.0, None, None, None), (1, 10, 0, None, None, None)])
+        record_transactions(cursor, [])
+        assert cursor.daily == {} and cursor.monthly == {}
+        assert cursor.statements == 1
+
+    def test_business_revenue_matches_the_old_totals(self):
+        # a Wednesday whose ISO week began in the previous year
+        today = date(2025, 1, 1)
+        cursor = FakeCursor(today)
+        days = [today, today - timedelta(days=1), today - timedelta(days=2), today - timedelta(days=3),
+                date(2024, 12, 1), date(2024, 6, 4)]
+        for n, day in enumerate(days):
+            cursor.today = day
+            record_transaction(cursor, 1, 10, 10.0 * (n + 1))
+            record_transaction(cursor, 2, 11, 1.0)
+        cursor.today = today
+
+        for bid in (10, 11, 12):
+            assert business_revenue(cursor, bid) == old_totals(cursor.transactions, bid, today)
+        assert business_revenue(cursor, 10) == {"daily": 10.0, "weekly": 60.0, "monthly": 10.0, "yearly": 10.0}
+
+    def test_business_revenue_mid_year(self):
+        today = date(2025, 6, 4)
+        cursor = FakeCursor(today)
+        for day in (today, date(2025, 6, 2), date(2025, 6, 1), date(2025, 5, 31), date(2025, 1, 1), date(2024, 12, 31)):
+            cursor.today = day
+            record_transactions(cursor, [(1, 10, 3.0, None, None, None), (2, 10, 4.0, None, None, None)])
+        cursor.today = today
+        assert business_revenue(cursor, 10) == old_totals(cursor.transactions, 10, today)
+
+    def test_tuple_rows_are_read_by_position(self):
+        class TupleCursor:
+            def execute(self, query, params):
+                pass
+
+            def fetchone(self):
+                return (1, 2, "3.5", None)
+
+        assert business_revenue(TupleCursor(), 10) == {"daily": 1.0, "weekly": 2.0, "monthly": 3.5, "yearly": 0.0}
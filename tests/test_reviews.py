@@ -0,0 +1,132 @@
+import sys
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.Reviews.Post_Reviews import (
+    REVIEWS_PAGE_DEFAULT, REVIEWS_PAGE_MAX, UNDATED_CURSOR, fetch_reviews_page, parse_review_page_args,
+)
+
+NOON = datetime(2025, 6, 2, 12, 0)
+
+
+def review(rvw_id, created_at):
+    return {"rvw_id": rvw_id, "rating": 5, "comment": "great", "created_at": created_at,
+            "first_name": "Cam", "last_name": "Lee", "cid": 9}
+
+
+class FakeCursor:
+    """answers each reviews query with its segment of rows, honouring its
+    LIMIT, and the replies query with replies"""
+
+    def __init__(self, rows, replies=()):
+        self.rows = rows
+        self.replies = list(replies)
+        self.executed = []
+        self.result = []
+
+    def execute(self, query, params=()):
+        self.executed.append((query, params))
+        if "FROM reviews r" in query:
+            undated = "created_at IS NULL" in query
+            rows = [r for r in self.rows if (r["created_at"] is None) == undated]
+            self.result = rows[:params[-1]] if "LIMIT" in query else rows
+        else:
+            self.result = [r for r in self.replies if r["rvw_id"] in params]
+
+    def fetchall(self):
+        return self.result
+
+
+class TestReviewPageArgs:
+    """Test cases for parsing the review paging parameters"""
+
+    def test_no_paging_without_limit_or_after(self):
+        assert parse_review_page_args(MultiDict()) == (None, None)
+
+    def test_limit_is_capped(self):
+        assert parse_review_page_args(MultiDict({"limit": "10"})) == (None, 10)
+        assert parse_review_page_args(MultiDict({"limit": "1000"})) == (None, REVIEWS_PAGE_MAX)
+
+    def test_after_alone_uses_the_default_limit(self):
+        after, limit = parse_review_page_args(MultiDict({"after": "2025-06-02T12:00:00,17"}))
+        assert after == (NOON, 17)
+        assert limit == REVIEWS_PAGE_DEFAULT
+
+    @pytest.mark.parametrize("args", [
+        {"limit": "0"}, {"limit": "-3"}, {"limit": "ten"},
+        {"after": "17"}, {"after": "yesterday,17"}, {"after": "2025-06-02T12:00:00,x"},
+    ])
+    def test_malformed_args_are_rejected(self, args):
+        with pytest.raises(ValueError):
+            parse_review_page_args(MultiDict(args))
+
+
+class TestFetchReviewsPage:
+    """Test cases for reading a page of reviews"""
+
+    def test_full_page_has_a_cursor(self):
+        rows = [review(i, NOON - timedelta(hours=i)) for i in range(1, 4)]
+        reviews, next_cursor = fetch_reviews_page(FakeCursor(rows), 3, limit=2)
+        assert [r["id"] for r in reviews] == ["1", "2"]
+        assert next_cursor == f"{(NOON - timedelta(hours=2)).isoformat()},2"
+
+    def test_last_page_has_no_cursor(self):
+        rows = [review(i, NOON - timedelta(hours=i)) for i in range(1, 3)]
+        reviews, next_cursor = fetch_reviews_page(FakeCursor(rows), 3, limit=2)
+        assert len(reviews) == 2
+        assert next_cursor is None
+
+    def test_without_a_limit_every_review_is_returned(self):
+        rows = [review(i, NOON) for i in range(1, REVIEWS_PAGE_DEFAULT + 6)]
+        cursor = FakeCursor(rows)
+        reviews, next_cursor = fetch_reviews_page(cursor, 3)
+        assert len(reviews) == REVIEWS_PAGE_DEFAULT + 5
+        assert next_cursor is None
+        assert not [q for q, _ in cursor.executed if "LIMIT" in q]
+
+    def test_undated_reviews_get_a_cursor(self):
+        rows = [review(1, NOON), review(3, None), review(2, None)]
+        cursor = FakeCursor(rows)
+        reviews, next_cursor = fetch_reviews_page(cursor, 3, limit=2)
+        assert [r["id"] for r in reviews] == ["1", "3"]
+        assert reviews[1]["createdAt"] is None
+        assert next_cursor == f"{UNDATED_CURSOR},3"
+        # the undated segment is asked only for what the page still needs
+        assert [params for _, params in cursor.executed[:2]] == [[3, 3], [3, 2]]
+
+        # the cursor round-trips and reads only the undated rows after it
+        after, limit = parse_review_page_args(MultiDict({"after": next_cursor, "limit": "2"}))
+        assert after == (None, 3)
+        cursor = FakeCursor([review(2, None)])
+        reviews, next_cursor = fetch_reviews_page(cursor, 3, after, limit)
+        assert [r["id"] for r in reviews] == ["2"] and next_cursor is None
+        query, params = cursor.executed[0]
+        assert "r.created_at IS NULL AND r.rvw_id < %s" in query
+        assert params == [3, 3, 3]
+
+    def test_dated_pages_compare_plain_columns(self):
+        after, limit = parse_review_page_args(MultiDict({"after": f"{NOON.isoformat()},7", "limit": "2"}))
+        cursor = FakeCursor([review(6, NOON), review(5, NOON - timedelta(hours=1)),
+                             review(4, NOON - timedelta(hours=2)), review(2, None)])
+        reviews, next_cursor = fetch_reviews_page(cursor, 3, after, limit)
+        query, params = cursor.executed[0]
+        assert "COALESCE" not in query
+        assert "r.created_at < %s OR (r.created_at = %s AND r.rvw_id < %s)" in query
+        assert "ORDER BY r.created_at DESC, r.rvw_id DESC" in query
+        assert params == [3, NOON, NOON, 7, 3]
+        # a full dated page does not read the undated segment
+        assert len([q for q, _ in cursor.executed if "FROM reviews r" in q]) == 1
+        assert next_cursor == f"{(NOON - timedelta(hours=1)).isoformat()},5"
+
+    def test_latest_reply_is_attached(self):
+        rows = [review(1, NOON), review(2, NOON)]
+        replies = [{"rvw_id": 2, "comment": "thanks", "created_at": NOON, "first_name": "Ola", "last_name": "Fay"}]
+        reviews, _ = fetch_reviews_page(FakeCursor(rows, replies), 3, limit=5)
+        assert reviews[0]["reply"] is None
+        assert reviews[1]["reply"] == {"text": "thanks", "createdAt": NOON.isoformat(), "ownerName": "Ola Fay"}
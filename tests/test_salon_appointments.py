@@ -0,0 +1,79 @@
+import sys
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import app
+from src.Salon import appointments
+from src.Notifications import outbox
+
+
+class FakeCursor:
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, query, params=()):
+        self.executed.append((query, params))
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.commits = 0
+
+    def cursor(self, **kwargs):
+        return self._cursor
+
+    def commit(self):
+        self.commits += 1
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def client(monkeypatch):
+    app.testing = True
+    monkeypatch.setitem(app.config, "LOGIN_DISABLED", True)
+    return app.test_client()
+
+
+class TestBusinessCancelAppointment:
+    """Test cases for a business cancelling an appointment"""
+
+    START = (datetime.now() + timedelta(days=2)).replace(microsecond=0)
+
+    @pytest.fixture
+    def cursor(self, monkeypatch):
+        cursor = FakeCursor()
+        self.invalidated = []
+        details = {"aid": 5, "bid": 3, "cid": 9, "eid": 2, "start_time": self.START}
+        monkeypatch.setattr(appointments, "get_curr_bid", lambda: 3)
+        monkeypatch.setattr(appointments, "check_role", lambda uid=None: "business")
+        monkeypatch.setattr(appointments, "get_appointment_details", lambda aid: details)
+        monkeypatch.setattr(appointments, "get_db_connection", lambda: FakeConnection(cursor))
+        monkeypatch.setattr(appointments, "invalidate_worker_day",
+                            lambda eid, day: self.invalidated.append((eid, day)))
+        return cursor
+
+    def test_cancel_frees_the_day_and_its_reminder(self, client, cursor):
+        res = client.delete("/business/appointments/cancel/5")
+        assert res.status_code == 200
+        queries = [query for query, _ in cursor.executed]
+        assert queries == [appointments.delete_appointment, outbox.cancel_notification_key]
+        assert cursor.executed[1][1] == ("Appointment:5:9",)
+        assert self.invalidated == [(2, self.START)]
+
+    def test_other_business_cannot_cancel(self, client, cursor, monkeypatch):
+        monkeypatch.setattr(appointments, "get_curr_bid", lambda: 4)
+        res = client.delete("/business/appointments/cancel/5")
+        assert res.status_code == 400
+        assert cursor.executed == []
+        assert self.invalidated == []
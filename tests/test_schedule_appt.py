@@ -0,0 +1,214 @@
+import sys
+import os
+import re
+from datetime import datetime, timedelta
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import app
+from src.Appointments import schedule_appt
+from src.Notifications import outbox
+
+
+# columns of the tables the booking's lookups read, so a query naming a
+# column the schema lacks fails
+SCHEMA = {
+    "customers": {"cid", "uid"},
+    "users": {"uid", "first_name", "last_name"},
+    "authenticate": {"uid", "email", "pw_hash", "salt"},
+}
+
+
+def check_columns(query):
+    aliases = {alias: table for table, alias in re.findall(r"(?:FROM|JOIN)\s+(\w+)\s+(\w+)", query)}
+    for alias, column in re.findall(r"\b(\w+)\.(\w+)\b", query):
+        assert column in SCHEMA[aliases[alias]], f"{aliases[alias]} has no column {column}"
+
+
+class FakeCursor:
+    """answers the service and customer email lookups of a booking"""
+
+    def __init__(self, email="c@example.com"):
+        self.email = email
+        self.executed = []
+        self.result = None
+        self.lastrowid = 77
+
+    def execute(self, query, params=()):
+        self.executed.append((query, params))
+        if "select duration" in query:
+            self.result = {"duration": 30}
+        elif "FROM services" in query:
+            self.result = (25.0, 3)
+        elif "FROM customers" in query:
+            check_columns(query)
+            if isinstance(self.email, Exception):
+                raise self.email
+            self.result = (self.email,) if self.email else None
+        else:
+            self.result = None
+
+    def fetchone(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self, **kwargs):
+        return self._cursor
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def client():
+    app.testing = True
+    return app.test_client()
+
+
+def booking():
+    start = (datetime.now() + timedelta(days=2)).replace(microsecond=0)
+    return {"sid": 4, "eid": 2, "cid": 9, "start_time": start.isoformat()}
+
+
+def outbox_rows(cursor):
+    return [params for query, params in cursor.executed if query is outbox.upsert_notification]
+
+
+class FakeUser:
+    id = 12
+    email = "e@example.com"
+    is_authenticated = True
+
+
+class TestCreateAppointment:
+    """Test cases for booking an appointment"""
+
+    @pytest.fixture
+    def fakes(self, monkeypatch):
+        cursor = FakeCursor()
+        conn = FakeConnection(cursor)
+        transactions = []
+        self.invalidated = []
+        monkeypatch.setattr(schedule_appt, "get_db_connection", lambda: conn)
+        monkeypatch.setattr(schedule_appt, "invalidate_worker_day", lambda eid, day: self.invalidated.append((eid, day)))
+        monkeypatch.setattr(schedule_appt, "record_transaction",
+                            lambda cur, cid, bid, amount, aid=None: transactions.append((cid, bid, amount, aid)))
+        monkeypatch.setattr(schedule_appt, "check_appointment_subscription", lambda cid: True)
+        return cursor, conn, transactions
+
+    def test_anonymous_booking_reminds_the_customer_of_cid(self, client, fakes):
+        cursor, conn, transactions = fakes
+        data = booking()
+        res = client.post("/api/client/create-appointment", json=data)
+        assert res.status_code == 201
+        assert res.get_json()["appointment_id"] == 77
+        # the worker's cached day no longer shows the booked slot as free
+        assert self.invalidated == [(2, datetime.fromisoformat(data["start_time"]))]
+        assert transactions == [(9, 3, 25.0, 77)]
+        [row] = outbox_rows(cursor)
+        assert row[:2] == ("appointment_reminder", "Appointment:77:9")
+        assert '"email": "c@example.com"' in row[2]
+        assert conn.rollbacks == 0
+
+    def test_booking_without_a_customer_email_skips_the_reminder(self, client, fakes):
+        cursor, conn, transactions = fakes
+        cursor.email = None
+        res = client.post("/api/client/create-appointment", json=booking())
+        assert res.status_code == 201
+        assert transactions == [(9, 3, 25.0, 77)]
+        assert outbox_rows(cursor) == []
+        assert conn.rollbacks == 0
+
+    def test_failed_reminder_keeps_the_booking(self, client, fakes):
+        cursor, conn, transactions = fakes
+        cursor.email = RuntimeError("lookup failed")
+        res = client.post("/api/client/create-appointment", json=booking())
+        assert res.status_code == 201
+        assert transactions == [(9, 3, 25.0, 77)]
+        # the appointment and its transaction were committed before the lookup
+        assert conn.commits == 2
+        assert conn.rollbacks == 1
+
+    def test_email_lookup_reads_existing_columns(self):
+        with pytest.raises(AssertionError):
+            check_columns("SELECT u.email FROM customers c JOIN users u ON c.uid = u.uid WHERE c.cid = %s")
+        cursor = FakeCursor()
+        assert schedule_appt.get_email_for_cid(cursor, 9) == "c@example.com"
+
+    def test_anonymous_booking_needs_a_cid(self, client, fakes):
+        data = booking()
+        del data["cid"]
+        res = client.post("/api/client/create-appointment", json=data)
+        assert res.status_code == 403
+
+
+class TestEmployeeReschedule:
+    """Test cases for an employee moving an appointment"""
+
+    @pytest.fixture
+    def cursor(self, monkeypatch):
+        cursor = FakeCursor()
+        ids = iter(range(100, 110))
+
+        def execute(query, params=()):
+            FakeCursor.execute(cursor, query, params)
+            cursor.lastrowid = next(ids)
+
+        cursor.execute = execute
+        start = datetime.now() + timedelta(days=1)
+        details = {"eid": 2, "cid": 9, "sid": 4, "start_time": start, "email": "c@example.com",
+                   "customer_first": "Cam", "customer_last": "Lee",
+                   "employee_first": "Eve", "employee_last": "Ray"}
+        monkeypatch.setitem(app.config, "LOGIN_DISABLED", True)
+        monkeypatch.setattr(schedule_appt, "current_user", FakeUser())
+        monkeypatch.setattr(schedule_appt, "check_role", lambda uid=None: "employee")
+        monkeypatch.setattr(schedule_appt, "get_curr_eid", lambda: 2)
+        monkeypatch.setattr(schedule_appt, "get_appointment_details", lambda aid: details)
+        self.invalidated = []
+        monkeypatch.setattr(schedule_appt, "get_db_connection", lambda: FakeConnection(cursor))
+        monkeypatch.setattr(schedule_appt, "invalidate_worker_day", lambda eid, day: self.invalidated.append((eid, day)))
+        monkeypatch.setattr(schedule_appt, "wake_dispatcher", lambda: None)
+        return cursor
+
+    def reschedule(self, client):
+        self.new_time = (datetime.now() + timedelta(days=3)).replace(microsecond=0)
+        return client.put("/api/employee/reschedule", json={"aid": 5, "new_time": self.new_time.isoformat()})
+
+    def test_invalidates_the_old_and_new_days(self, client, cursor, monkeypatch):
+        monkeypatch.setattr(schedule_appt, "check_appointment_subscription", lambda cid: False)
+        old_time = schedule_appt.get_appointment_details(5)["start_time"]
+        assert self.reschedule(client).status_code == 200
+        assert self.invalidated == [(2, old_time), (2, self.new_time)]
+
+    def test_returns_the_queued_email_ids(self, client, cursor, monkeypatch):
+        monkeypatch.setattr(schedule_appt, "check_appointment_subscription", lambda cid: True)
+        res = self.reschedule(client)
+        assert res.status_code == 200
+        # rows 100 and 101 are the duration lookup and the update, 102 the reminder
+        assert res.get_json()["notification_ids"] == [103, 104]
+        emails = [row for row in outbox_rows(cursor) if row[0] == "email"]
+        assert [row[4] for row in emails] == [12, 12]
+
+    def test_unsubscribed_customer_gets_no_email(self, client, cursor, monkeypatch):
+        monkeypatch.setattr(schedule_appt, "check_appointment_subscription", lambda cid: False)
+        res = self.reschedule(client)
+        assert res.status_code == 200
+        assert res.get_json()["notification_ids"] == [102]
@@ -0,0 +1,72 @@
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.Clients.stock import decrement_stock, short_stock
+
+
+class FakeCursor:
+    """applies the conditional decrement to an in-memory products table"""
+
+    def __init__(self, stock):
+        self.stock = stock
+        self.statements = []
+        self.rowcount = 0
+        self.rows = []
+
+    def execute(self, query, params=()):
+        self.statements.append(query)
+        if query.strip().startswith("UPDATE products"):
+            pairs = list(zip(params[::2], params[1::2]))
+            # like MySQL, rows left at NULL match but are not counted as changed
+            changed = [pid for pid, qty in pairs if self.stock.get(pid) is not None and self.stock[pid] >= qty]
+            for pid, qty in pairs:
+                if pid in changed:
+                    self.stock[pid] -= qty
+            self.rowcount = len(changed)
+        elif "stock IS NULL" in query:
+            self.rows = [{"unlimited": sum(1 for pid in params if pid in self.stock and self.stock[pid] is None)}]
+        else:
+            self.rows = [{"pid": pid, "name": f"product {pid}", "stock": stock}
+                         for pid, stock in self.stock.items() if pid in params]
+
+    def fetchone(self):
+        return self.rows[0]
+
+    def fetchall(self):
+        return self.rows
+
+
+class TestStock:
+    """Test cases for the set-based stock decrement"""
+
+    def test_decrement_is_one_statement(self):
+        cursor = FakeCursor({1: 5, 2: 5})
+        assert decrement_stock(cursor, [(2, 1), (1, 2), (2, 3)])
+        assert cursor.stock == {1: 3, 2: 1}
+        assert len(cursor.statements) == 1
+
+    def test_short_items_are_reported(self):
+        cursor = FakeCursor({1: 5, 2: 1})
+        lines = [(1, 2), (2, 3), (3, 1)]
+        assert not decrement_stock(cursor, lines)
+
+        cursor.stock = {1: 5, 2: 1}  # the caller rolls back before asking
+        assert short_stock(cursor, lines) == [
+            {"pid": 2, "name": "product 2", "requested": 3, "available": 1},
+            {"pid": 3, "name": None, "requested": 1, "available": 0},
+        ]
+
+    def test_null_stock_is_unlimited(self):
+        cursor = FakeCursor({1: None, 2: 5})
+        assert decrement_stock(cursor, [(1, 100), (2, 2)])
+        assert cursor.stock == {1: None, 2: 3}
+        assert short_stock(cursor, [(1, 100), (2, 2)]) == []
+
+    def test_unlimited_products_do_not_cover_short_ones(self):
+        cursor = FakeCursor({1: None, 2: 1})
+        lines = [(1, 4), (2, 3), (3, 1)]
+        assert not decrement_stock(cursor, lines)
+        assert [item["pid"] for item in short_stock(cursor, lines)] == [2, 3]